@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List
 
 
 class Settings(BaseSettings):
@@ -16,8 +16,77 @@ class Settings(BaseSettings):
     # CORS
     ALLOWED_ORIGINS: List[str] = ["*"]
     
-    # Database (se necessário no futuro)
+    # Benchmarks (arquivo versionado; vazio usa app/data/benchmarks.json)
+    BENCHMARKS_FILE: str = ""
+    # Fatores de emissão (arquivo versionado; vazio usa app/data/emission_factors.json)
+    EMISSION_FACTORS_FILE: str = ""
+    # Segmento em arquivo com as tabelas compiladas, compartilhado pelos workers do host (vazio: tabelas por processo)
+    SHARED_TABLES_PATH: str = ""
+    
+    # Cache HTTP dos endpoints de referência (segundos)
+    STATIC_CACHE_MAX_AGE: int = 300
+    
+    # Streaming NDJSON
+    STREAM_CHUNK_SIZE: int = 500
+    STREAM_MAX_LINE_BYTES: int = 1_048_576
+    
+    # Upload de planilhas (CSV/Parquet): linhas lidas e analisadas por bloco
+    UPLOAD_CHUNK_ROWS: int = 5_000
+    
+    # Jobs de análise em segundo plano (diretório do estado e dos resultados; vazio desabilita)
+    JOBS_DIR: str = ""
+    JOB_WORKERS: int = 2
+    # Jobs terminados há mais tempo que isto (segundos) são removidos do disco; 0 mantém para sempre
+    JOB_RETENTION_SECONDS: float = 7 * 24 * 3600
+    
+    # Cache de análises (CACHE_SQLITE_PATH habilita o nível compartilhado entre workers)
+    CACHE_ENABLED: bool = True
+    CACHE_MAX_ENTRIES: int = 10_000
+    CACHE_TTL_SECONDS: float = 300
+    CACHE_SQLITE_PATH: str = ""
+    
+    # Requests idênticos simultâneos em /analyze compartilham uma única análise
+    COALESCE_ENABLED: bool = True
+    
+    # Controle de admissão: requests simultâneos por prefixo de rota (demais rotas: ADMISSION_DEFAULT_LIMIT),
+    # fila de espera limitada e prazo máximo na fila; acima disso, 503 com Retry-After
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_DEFAULT_LIMIT: int = 64
+    ADMISSION_ROUTE_LIMITS: Dict[str, int] = {
+        "/api/v1/sustainability/analyze": 32,
+        "/api/v1/sustainability/analyze/batch": 8,
+        "/api/v1/sustainability/analyze/stream": 8,
+        "/api/v1/sustainability/analyze/upload": 4,
+        "/api/v1/sustainability/analyze/uncertainty": 8,
+        "/api/v1/sustainability/optimize": 8,
+        "/api/v1/sustainability/jobs": 16,
+    }
+    ADMISSION_QUEUE_SIZE: int = 64
+    ADMISSION_QUEUE_TIMEOUT: float = 2.0
+    ADMISSION_RETRY_AFTER: int = 1
+    # Nunca descartados (GET/HEAD); terminados em "/" isentam o prefixo
+    ADMISSION_EXEMPT_PATHS: List[str] = [
+        "/health",
+        "/metrics",
+        "/api/v1/sustainability/benchmarks/",
+        "/api/v1/sustainability/materials",
+        "/api/v1/sustainability/company-sizes",
+        "/api/v1/sustainability/example",
+    ]
+    
+    # Pool de processos para payloads grandes (0 workers desabilita)
+    PROCESS_POOL_WORKERS: int = 2
+    PROCESS_POOL_THRESHOLD: int = 2_000
+    
+    # Monte Carlo: a partir de quantas amostras (materiais x amostras) os blocos são divididos entre os processos do pool (0 desabilita)
+    MONTE_CARLO_FANOUT_SAMPLES: int = 500_000
+    # Monte Carlo: máximo de amostras (materiais x amostras) por request; acima disso responde 422
+    MONTE_CARLO_MAX_SAMPLES: int = 10_000_000
+    
+    # Histórico de análises (sqlite:///caminho.db; outras URLs exigem SQLAlchemy; vazio desabilita)
     DATABASE_URL: str = ""
+    HISTORY_QUEUE_SIZE: int = 10_000
+    HISTORY_BATCH_SIZE: int = 500
     
     class Config:
         env_file = ".env"
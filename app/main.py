@@ -1,34 +1,92 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from app.config import settings
-from app.routers import health, sustainability
+"""
+Aplicação principal
 
-app = FastAPI(
-    title=settings.PROJECT_NAME,
-    version=settings.VERSION,
-    description="API FastAPI para Análise de Sustentabilidade e Pegada Verde",
-)
+`create_app()` monta a aplicação. FastAPI, os routers e os módulos de
+cálculo (NumPy) só são importados quando ela é criada, e os caches (tabela
+de benchmarks, respostas de referência pré-serializadas) são montados no
+startup, antes do primeiro request.
 
-# Configurar CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=settings.ALLOWED_ORIGINS,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+`app` é criada no primeiro acesso, então importar este módulo é barato:
 
-# Incluir routers
-app.include_router(health.router, tags=["Health"])
-app.include_router(sustainability.router, prefix="/api/v1", tags=["Sustentabilidade"])
+    uvicorn app.main:app
+    uvicorn --factory app.main:create_app
+"""
+from typing import TYPE_CHECKING
 
+if TYPE_CHECKING:
+    from fastapi import FastAPI
 
-@app.on_event("startup")
-async def startup_event():
-    print("🚀 Iniciando a aplicação...")
 
+def create_app() -> "FastAPI":
+    """Cria a aplicação com middlewares, routers e eventos de startup/shutdown"""
+    from fastapi import FastAPI
+    from fastapi.responses import ORJSONResponse
+    from fastapi.middleware.cors import CORSMiddleware
+    from app.config import settings
+    from app.routers import health, metrics, sustainability
+    from app.utils.benchmarks import get_benchmark_table, use_shared_tables
+    from app.utils.executor import analysis_executor
+    from app.utils.history import history_writer
+    from app.utils.jobs import job_manager
+    from app.utils.admission import AdmissionMiddleware
+    from app.utils.metrics import MetricsMiddleware
 
-@app.on_event("shutdown")
-async def shutdown_event():
-    print("👋 Encerrando a aplicação...")
+    app = FastAPI(
+        title=settings.PROJECT_NAME,
+        version=settings.VERSION,
+        description="API FastAPI para Análise de Sustentabilidade e Pegada Verde",
+        default_response_class=ORJSONResponse,
+    )
 
+    # Controle de admissão (dentro do CORS, para que os 503 levem os cabeçalhos CORS)
+    if settings.ADMISSION_ENABLED:
+        app.add_middleware(AdmissionMiddleware)
+
+    # Configurar CORS
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.ALLOWED_ORIGINS,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # Métricas (adicionado por último para envolver todos os outros middlewares)
+    app.add_middleware(MetricsMiddleware)
+
+    # Incluir routers
+    app.include_router(health.router, tags=["Health"])
+    app.include_router(metrics.router, tags=["Métricas"])
+    app.include_router(sustainability.router, prefix="/api/v1", tags=["Sustentabilidade"])
+
+    @app.on_event("startup")
+    async def startup_event():
+        print("🚀 Iniciando a aplicação...")
+        # Tabelas compartilhadas entre os workers do host (publicadas pelo primeiro a subir)
+        use_shared_tables(settings.SHARED_TABLES_PATH)
+        # Caches prontos antes do primeiro request
+        sustainability.reference_responses.refresh(get_benchmark_table())
+        # O pool de processos aquece em segundo plano
+        analysis_executor.start()
+        history_writer.start(settings.DATABASE_URL)
+        # Jobs interrompidos na última execução são retomados
+        job_manager.start(settings.JOBS_DIR)
+
+    @app.on_event("shutdown")
+    async def shutdown_event():
+        print("👋 Encerrando a aplicação...")
+        # Os jobs param antes do pool que executa os seus blocos
+        job_manager.shutdown()
+        analysis_executor.shutdown()
+        history_writer.shutdown()
+
+    return app
+
+
+def __getattr__(name: str):
+    # `app` é criada no primeiro acesso (ex.: `from app.main import app`)
+    if name == "app":
+        app = create_app()
+        globals()["app"] = app
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,105 @@
+"""
+Representação interna das análises
+
+Os cálculos produzem estes registros leves (sem validação); os modelos
+Pydantic e o JSON de resposta são montados uma única vez, na borda.
+"""
+from dataclasses import dataclass
+from typing import List, Optional
+
+from app.schemas.sustainability import Benchmark, CompanyData, CompanySize, MaterialType
+from app.utils.messages import Message
+
+
+@dataclass
+class MaterialResult:
+    """Resultado da análise de um material"""
+
+    __slots__ = (
+        "material_type",
+        "proposed_quantity",
+        "company_size",
+        "benchmark",
+        "is_eco_efficient",
+        "efficiency_percentage",
+        "carbon_footprint_reduction",
+        "recommendation",
+    )
+
+    material_type: MaterialType
+    proposed_quantity: float
+    company_size: CompanySize
+    benchmark: Benchmark  # referência ao benchmark da tabela ativa, não uma cópia
+    is_eco_efficient: bool
+    efficiency_percentage: float
+    carbon_footprint_reduction: Optional[float]
+    recommendation: Message  # texto montado na borda, no idioma do request
+
+
+@dataclass
+class AnalysisResult:
+    """Resultado completo da análise de uma empresa"""
+
+    __slots__ = (
+        "company",
+        "materials_analysis",
+        "overall_score",
+        "overall_recommendation",
+        "is_eco_efficient",
+        "potential_savings",
+        "improvements",
+        "benchmarks_version",
+    )
+
+    company: CompanyData
+    materials_analysis: List[MaterialResult]
+    overall_score: float
+    overall_recommendation: Message
+    is_eco_efficient: bool
+    potential_savings: Optional[float]
+    improvements: List[Message]
+    benchmarks_version: str
+
+
+@dataclass
+class MaterialComparison:
+    """Comparação entre o consumo atual e o proposto de um tipo de material"""
+
+    __slots__ = (
+        "material_type",
+        "current_quantity",
+        "proposed_quantity",
+        "current_efficiency",
+        "proposed_efficiency",
+        "carbon_change",
+        "score_change",
+    )
+
+    material_type: MaterialType
+    current_quantity: float
+    proposed_quantity: float
+    current_efficiency: Optional[float]  # None se o material não aparece no consumo atual
+    proposed_efficiency: Optional[float]  # None se o material não aparece na proposta
+    carbon_change: float  # kg CO2 (negativo = redução)
+    score_change: float  # variação da contribuição do material para o score geral
+
+
+@dataclass
+class ComparisonResult:
+    """Comparação completa entre o consumo atual e o proposto de uma empresa"""
+
+    __slots__ = (
+        "company",
+        "materials",
+        "current_score",
+        "proposed_score",
+        "carbon_change",
+        "benchmarks_version",
+    )
+
+    company: CompanyData
+    materials: List[MaterialComparison]
+    current_score: float
+    proposed_score: float
+    carbon_change: float
+    benchmarks_version: str
@@ -0,0 +1,12 @@
+from fastapi import APIRouter, Response
+from app.utils.metrics import render_metrics
+
+router = APIRouter()
+
+
+@router.get("/metrics")
+def metrics():
+    """
+    Endpoint de métricas no formato de exposição do Prometheus
+    """
+    return Response(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
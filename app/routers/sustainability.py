@@ -1,23 +1,83 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, File, Header, HTTPException, Query, Request, Response, UploadFile
+from app.config import settings
 from app.schemas.sustainability import (
     SustainabilityCalculationRequest,
     SustainabilityAnalysisResponse,
+    CompactSustainabilityAnalysisResponse,
+    BatchAnalysisRequest,
+    BatchAnalysisResponse,
+    CompactBatchAnalysisResponse,
     MaterialType,
     CompanySize,
+    HistoryDimension,
+    HistoryAggregateResponse,
+    ComparisonResponse,
+    TargetQuantitiesRequest,
+    TargetQuantitiesResponse,
+    SweepResponse,
+    OptimizationRequest,
+    OptimizationResponse,
+    UncertaintyAnalysisRequest,
+    UncertaintyAnalysisResponse,
+    JobStatusResponse,
 )
-from app.utils.sustainability import analyze_sustainability
-from typing import List
+from app.utils.executor import (
+    analysis_executor,
+    encode_analysis_task,
+    encode_batch_task,
+    render_comparison_task,
+    render_targets_task,
+    render_sweep_task,
+    render_optimization_task,
+    render_uncertainty_task,
+    render_uncertainty_chunks_task,
+)
+from app.utils.streaming import NDJSONStreamingResponse, analyze_ndjson_stream
+from app.utils.benchmarks import BenchmarkTable, get_benchmark_table, reload_benchmarks
+from app.utils.cache import analysis_cache, analysis_cache_key
+from app.utils.coalescing import analysis_flights
+from app.utils.formats import (
+    BATCH_MEDIA_TYPES,
+    MEDIA_JSON,
+    ROW_MEDIA_TYPES,
+    negotiate,
+    not_acceptable_detail,
+)
+from app.utils.history import HISTORY_BATCH, HISTORY_SINGLE, history_writer
+from app.utils.jobs import iter_chunks, job_manager
+from app.utils.messages import CODES_ONLY, DEFAULT_LOCALE, message_locale
+from app.utils.static_responses import StaticResponseCache
+from app.utils.uncertainty import monte_carlo_chunks, simulate_chunk
+from app.utils.uploads import UploadFormatError, UploadReader, analyze_upload, upload_format
+from functools import partial
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import StreamingResponse
+from typing import List, Optional, Union
 
 router = APIRouter(prefix="/sustainability", tags=["Sustentabilidade"])
 
+CODES_ONLY_DESCRIPTION = "Retornar recomendações e melhorias só como código e parâmetros, sem texto"
+ACCEPT_LANGUAGE_DESCRIPTION = "Idioma das recomendações: pt-BR (padrão) ou en"
+
+
+def _language_headers(locale: str) -> dict:
+    # Sem texto no modo codes_only, a resposta não tem idioma
+    return {} if locale == CODES_ONLY else {"Content-Language": locale}
+
 
 @router.post(
     "/analyze",
-    response_model=SustainabilityAnalysisResponse,
+    response_model=Union[SustainabilityAnalysisResponse, CompactSustainabilityAnalysisResponse],
     summary="Analisar sustentabilidade de materiais",
     description="Analisa se o uso proposto de materiais é ecologicamente eficiente para o tamanho da empresa"
 )
-def analyze_materials(request: SustainabilityCalculationRequest):
+async def analyze_materials(
+    request: SustainabilityCalculationRequest,
+    compact: bool = Query(False, description="Referenciar benchmarks por id em vez de repeti-los em cada material"),
+    codes_only: bool = Query(False, description=CODES_ONLY_DESCRIPTION),
+    accept: Optional[str] = Header(None, description="application/json (padrão) ou application/msgpack"),
+    accept_language: Optional[str] = Header(None, description=ACCEPT_LANGUAGE_DESCRIPTION)
+):
     """
     Endpoint principal para análise de sustentabilidade.
     
@@ -26,25 +86,537 @@ def analyze_materials(request: SustainabilityCalculationRequest):
     - Score de eficiência (0-100)
     - Recomendações específicas por material
     - Melhorias sugeridas
+    
+    Com `Accept: application/msgpack`, a mesma estrutura vem em MessagePack.
+    Requests idênticos simultâneos compartilham uma única análise
+    (`X-Cache: COALESCED`).
+    
+    As recomendações saem no idioma do `Accept-Language` (`pt-BR` ou `en`);
+    com `codes_only=true`, apenas como `{"code": ..., "params": {...}}`.
     """
+    media_type = negotiate(accept, ROW_MEDIA_TYPES)
+    if media_type is None:
+        raise HTTPException(status_code=406, detail=not_acceptable_detail(ROW_MEDIA_TYPES))
+    locale = message_locale(accept_language, codes_only)
+    
     try:
-        analysis = analyze_sustainability(
-            company=request.company,
-            proposed_materials=request.proposed_materials
+        table = get_benchmark_table()
+        key = None
+        if settings.CACHE_ENABLED or settings.COALESCE_ENABLED:
+            variant = "compact" if compact else ""
+            if media_type != MEDIA_JSON:
+                variant += f"|{media_type}"
+            if locale != DEFAULT_LOCALE:
+                variant += f"|{locale}"
+            # Chave (proporcional ao payload) e nível SQLite do cache fora do event loop
+            key = await run_in_threadpool(
+                analysis_cache_key,
+                request.company,
+                request.proposed_materials,
+                variant=variant,
+                table=table
+            )
+        if settings.CACHE_ENABLED:
+            cached = analysis_cache.get_local(key)
+            if cached is None:
+                if analysis_cache.shared is None:
+                    # Sem nível compartilhado, só contabiliza a falha
+                    analysis_cache.get_shared(key)
+                else:
+                    cached = await run_in_threadpool(analysis_cache.get_shared, key)
+            if cached is not None:
+                history_writer.record(HISTORY_SINGLE, [request], cached, media_type)
+                return Response(cached, media_type=media_type, headers={"X-Cache": "HIT", **_language_headers(locale)})
+        
+        analyze = partial(
+            analysis_executor.run,
+            encode_analysis_task,
+            request.company,
+            request.proposed_materials,
+            compact,
+            media_type,
+            locale,
+            size=len(request.proposed_materials),
+            table=table
         )
+        # Requests idênticos simultâneos compartilham a mesma execução
+        if settings.COALESCE_ENABLED:
+            body, coalesced = await analysis_flights.run(key, analyze)
+        else:
+            body, coalesced = await analyze(), False
         
-        return analysis
+        if settings.CACHE_ENABLED and not coalesced:
+            analysis_cache.set_local(key, body)
+            if analysis_cache.shared is not None:
+                await run_in_threadpool(analysis_cache.set_shared, key, body)
+        history_writer.record(HISTORY_SINGLE, [request], body, media_type)
+        
+        return Response(
+            body,
+            media_type=media_type,
+            headers={"X-Cache": "COALESCED" if coalesced else "MISS", **_language_headers(locale)}
+        )
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao analisar: {str(e)}")
 
 
+@router.post(
+    "/analyze/compare",
+    response_model=ComparisonResponse,
+    summary="Comparar consumo atual e proposto",
+    description="Avalia `current_materials` e `proposed_materials` em uma única passada e retorna as variações por material e do score geral"
+)
+async def compare_materials_usage(request: SustainabilityCalculationRequest):
+    """
+    Endpoint de comparação.
+    
+    Os materiais são pareados por tipo (entradas repetidas são somadas) e
+    cada um traz a variação de eficiência, de emissões (kg CO2) e da sua
+    contribuição para o score geral. Materiais presentes em apenas um dos
+    lados têm eficiência nula no outro.
+    """
+    if request.current_materials is None:
+        raise HTTPException(status_code=400, detail="Informe current_materials para comparar")
+    
+    try:
+        body = await analysis_executor.run(
+            render_comparison_task,
+            request.company,
+            request.current_materials,
+            request.proposed_materials,
+            size=len(request.current_materials) + len(request.proposed_materials)
+        )
+        return Response(body, media_type="application/json")
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao comparar: {str(e)}")
+
+
+@router.post(
+    "/targets",
+    response_model=TargetQuantitiesResponse,
+    summary="Quantidades para atingir scores alvo",
+    description="Calcula, em forma fechada, a maior quantidade de cada material e o fator de redução da empresa que atingem cada score alvo"
+)
+async def solve_targets(request: TargetQuantitiesRequest):
+    """
+    Endpoint do problema inverso.
+    
+    Para cada alvo retorna a maior quantidade de cada material com
+    eficiência maior ou igual ao alvo e a redução necessária a partir da
+    quantidade proposta. Para a empresa, retorna o maior fator aplicado a
+    todas as quantidades que mantém o score geral no alvo. `null` indica que
+    qualquer quantidade atinge o alvo (alvo 0).
+    """
+    try:
+        body = await analysis_executor.run(
+            render_targets_task,
+            request.company,
+            request.proposed_materials,
+            request.targets,
+            size=len(request.proposed_materials) * len(request.targets)
+        )
+        return Response(body, media_type="application/json")
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao calcular alvos: {str(e)}")
+
+
+@router.get(
+    "/sweep/{company_size}",
+    response_model=SweepResponse,
+    summary="Curvas de eficiência e carbono",
+    description="Avalia eficiência e redução de carbono de cada material sobre uma grade de quantidades"
+)
+async def sweep_materials(
+    company_size: CompanySize,
+    materials: Optional[List[MaterialType]] = Query(None, description="Materiais (padrão: todos)"),
+    min_quantity: float = Query(0, ge=0, description="Início da grade"),
+    max_quantity: Optional[float] = Query(None, ge=0, description="Fim da grade (padrão: depende do material)"),
+    points: int = Query(500, ge=2, le=10_000, description="Pontos da grade por material"),
+    breakpoints_only: bool = Query(False, description="Retornar apenas os pontos de quebra (curvas lineares entre eles)")
+):
+    """
+    Endpoint de simulação (what-if).
+    
+    Retorna, para cada material, arrays paralelos de quantidade, eficiência
+    e redução de carbono. Com `breakpoints_only`, apenas os extremos e os
+    pontos de quebra dos benchmarks são avaliados; a curva completa é a
+    interpolação linear entre eles.
+    """
+    try:
+        body = await analysis_executor.run(
+            render_sweep_task,
+            company_size,
+            materials,
+            min_quantity,
+            max_quantity,
+            points,
+            breakpoints_only,
+            size=len(materials or MaterialType) * points
+        )
+        return Response(body, media_type="application/json")
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao calcular curvas: {str(e)}")
+
+
+@router.post(
+    "/optimize",
+    response_model=OptimizationResponse,
+    summary="Otimizar redução sob orçamento",
+    description="Distribui o orçamento de redução de cada empresa entre os materiais para maximizar o score geral"
+)
+async def optimize_budget(request: OptimizationRequest):
+    """
+    Endpoint de otimização.
+    
+    Para cada empresa, retorna a redução de cada material (na ordem de
+    `proposed_materials`), as quantidades e eficiências resultantes e o
+    score antes e depois. Os custos por unidade reduzida são opcionais.
+    """
+    try:
+        body = await analysis_executor.run(
+            render_optimization_task,
+            request.items,
+            size=sum(len(item.proposed_materials) for item in request.items)
+        )
+        return Response(body, media_type="application/json")
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao otimizar: {str(e)}")
+
+
+@router.post(
+    "/analyze/uncertainty",
+    response_model=UncertaintyAnalysisResponse,
+    summary="Analisar incerteza das quantidades",
+    description="Simula (Monte Carlo) quantidades estimadas e retorna percentis do score e a probabilidade de ser eficiente"
+)
+async def analyze_uncertainty(request: UncertaintyAnalysisRequest):
+    """
+    Endpoint de análise de incerteza.
+    
+    Materiais com `std_dev` (normal truncada em 0) ou `quantity_min` e
+    `quantity_max` (uniforme) são sorteados `samples` vezes; os demais ficam
+    fixos. Retorna média, desvio e percentis da eficiência de cada material
+    e do score geral, e a probabilidade de ser eficiente. Simulações a partir
+    de `MONTE_CARLO_FANOUT_SAMPLES` são divididas entre os processos do pool;
+    acima de `MONTE_CARLO_MAX_SAMPLES` o request é rejeitado.
+    """
+    size = request.samples * len(request.proposed_materials)
+    if size > settings.MONTE_CARLO_MAX_SAMPLES:
+        raise HTTPException(
+            status_code=422,
+            detail=f"samples x materiais ({size}) excede o limite de {settings.MONTE_CARLO_MAX_SAMPLES}"
+        )
+    
+    try:
+        fanout = settings.MONTE_CARLO_FANOUT_SAMPLES
+        if not analysis_executor.ready or not fanout or size < fanout:
+            body = await analysis_executor.run(
+                render_uncertainty_task,
+                request.company,
+                request.proposed_materials,
+                request.samples,
+                request.percentiles,
+                request.seed,
+                size=size
+            )
+            return Response(body, media_type="application/json")
+        
+        table = get_benchmark_table()
+        seed, plan = monte_carlo_chunks(request.samples, request.seed)
+        chunks = await analysis_executor.map(
+            simulate_chunk,
+            [(request.company.size, request.proposed_materials, samples, sequence) for samples, sequence in plan],
+            table=table
+        )
+        body = await run_in_threadpool(
+            render_uncertainty_chunks_task, request.proposed_materials, seed, request.percentiles, chunks, table
+        )
+        return Response(body, media_type="application/json")
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao simular incerteza: {str(e)}")
+
+
+@router.post(
+    "/analyze/batch",
+    response_model=Union[BatchAnalysisResponse, CompactBatchAnalysisResponse],
+    summary="Analisar sustentabilidade em lote",
+    description="Analisa várias empresas em uma única chamada, com cálculos vetorizados sobre todos os materiais"
+)
+async def analyze_materials_batch(
+    request: BatchAnalysisRequest,
+    compact: bool = Query(False, description="Listar os benchmarks uma única vez para todo o lote"),
+    codes_only: bool = Query(False, description=CODES_ONLY_DESCRIPTION),
+    accept: Optional[str] = Header(
+        None,
+        description="application/json (padrão), application/msgpack, "
+        "application/vnd.apache.arrow.stream ou application/vnd.apache.parquet"
+    ),
+    accept_language: Optional[str] = Header(None, description=ACCEPT_LANGUAGE_DESCRIPTION)
+):
+    """
+    Endpoint de análise em lote.
+    
+    Recebe uma lista de requests no mesmo formato de `/analyze` e retorna
+    as análises na mesma ordem. Os resultados são idênticos aos da análise
+    individual, mas os cálculos são feitos de uma vez para todas as linhas
+    (empresa, material).
+    
+    Com `Accept` Arrow IPC ou Parquet, o lote vem em colunas, uma linha por
+    (empresa, material), pronto para leitura sem cópia (ex.: pandas); com
+    `codes_only=true`, as colunas de recomendação trazem só os códigos.
+    """
+    media_type = negotiate(accept, BATCH_MEDIA_TYPES)
+    if media_type is None:
+        raise HTTPException(status_code=406, detail=not_acceptable_detail(BATCH_MEDIA_TYPES))
+    locale = message_locale(accept_language, codes_only)
+    
+    try:
+        body, history_body = await analysis_executor.run(
+            encode_batch_task,
+            request.items,
+            compact,
+            media_type,
+            history_writer.started,
+            locale,
+            size=sum(len(item.proposed_materials) for item in request.items)
+        )
+        if history_body is not None:
+            history_media_type = media_type if media_type in ROW_MEDIA_TYPES else MEDIA_JSON
+            history_writer.record(HISTORY_BATCH, request.items, history_body, history_media_type)
+        return Response(body, media_type=media_type, headers=_language_headers(locale))
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao analisar lote: {str(e)}")
+
+
+@router.post(
+    "/analyze/stream",
+    response_class=NDJSONStreamingResponse,
+    summary="Analisar sustentabilidade em streaming (NDJSON)",
+    description="Recebe um request de análise por linha (NDJSON) e retorna uma análise por linha enquanto lê o corpo",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/x-ndjson": {"schema": {"type": "string"}}},
+        }
+    },
+)
+async def analyze_materials_stream(
+    request: Request,
+    codes_only: bool = Query(False, description=CODES_ONLY_DESCRIPTION),
+    accept_language: Optional[str] = Header(None, description=ACCEPT_LANGUAGE_DESCRIPTION)
+):
+    """
+    Endpoint de análise em streaming.
+    
+    Cada linha do corpo é um `SustainabilityCalculationRequest`. A resposta
+    traz, para cada linha, `{"line": n, "analysis": {...}}` ou
+    `{"line": n, "error": "..."}`. Linhas inválidas não interrompem o fluxo.
+    """
+    locale = message_locale(accept_language, codes_only)
+    return NDJSONStreamingResponse(
+        analyze_ndjson_stream(request.stream(), locale=locale), headers=_language_headers(locale)
+    )
+
+
+@router.post(
+    "/analyze/upload",
+    response_class=StreamingResponse,
+    summary="Analisar planilha (CSV ou Parquet)",
+    description="Recebe uma planilha por upload multipart (uma linha por material) e retorna uma análise por empresa em NDJSON",
+    responses={200: {"content": {"application/x-ndjson": {}}}},
+)
+async def analyze_materials_upload(
+    file: UploadFile = File(..., description="Planilha .csv ou .parquet (colunas company_id, size, employees, industry, material_type, quantity)"),
+    codes_only: bool = Query(False, description=CODES_ONLY_DESCRIPTION),
+    accept_language: Optional[str] = Header(None, description=ACCEPT_LANGUAGE_DESCRIPTION)
+):
+    """
+    Endpoint de análise de planilhas.
+    
+    Linhas consecutivas com o mesmo `company_id` formam uma empresa. O
+    arquivo é lido e analisado em blocos; a resposta traz, para cada
+    empresa, `{"company_id": ..., "rows": [primeira, última], "analysis": {...}}`
+    e, para cada linha inválida, `{"row": n, "error": "..."}` (o cabeçalho é
+    a linha 1). Linhas inválidas não interrompem o restante do arquivo.
+    """
+    file_format = upload_format(file.filename, file.content_type)
+    if file_format is None:
+        raise HTTPException(status_code=415, detail="Envie um arquivo .csv ou .parquet")
+    try:
+        reader = await run_in_threadpool(UploadReader, file.file, file_format)
+    except UploadFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    locale = message_locale(accept_language, codes_only)
+    return StreamingResponse(
+        analyze_upload(reader, locale), media_type="application/x-ndjson", headers=_language_headers(locale)
+    )
+
+
+def _require_jobs() -> None:
+    if not job_manager.started:
+        raise HTTPException(status_code=503, detail="Jobs de análise desabilitados (configure JOBS_DIR)")
+
+
+@router.post(
+    "/jobs",
+    response_model=JobStatusResponse,
+    status_code=202,
+    summary="Criar job de análise de planilha",
+    description="Recebe uma planilha (mesmo formato de /analyze/upload) e a analisa em segundo plano"
+)
+async def submit_job(
+    response: Response,
+    file: UploadFile = File(..., description="Planilha .csv ou .parquet (colunas company_id, size, employees, industry, material_type, quantity)"),
+    codes_only: bool = Query(False, description=CODES_ONLY_DESCRIPTION),
+    accept_language: Optional[str] = Header(None, description=ACCEPT_LANGUAGE_DESCRIPTION)
+):
+    """
+    Cria um job para planilhas grandes demais para `/analyze/upload`.
+    
+    Retorna `202` com o id do job; o progresso é consultado em
+    `/jobs/{job_id}` e os blocos já analisados são baixados em
+    `/jobs/{job_id}/result`, mesmo antes do fim do job.
+    """
+    _require_jobs()
+    file_format = upload_format(file.filename, file.content_type)
+    if file_format is None:
+        raise HTTPException(status_code=415, detail="Envie um arquivo .csv ou .parquet")
+    try:
+        job = await run_in_threadpool(
+            job_manager.submit, file.file, file_format, file.filename, message_locale(accept_language, codes_only)
+        )
+    except UploadFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    response.headers["Location"] = f"{settings.API_V1_STR}{router.prefix}/jobs/{job['job_id']}"
+    return job
+
+
+@router.get(
+    "/jobs/{job_id}",
+    response_model=JobStatusResponse,
+    summary="Situação de um job",
+    description="Retorna a situação e o progresso de um job de análise"
+)
+def get_job(job_id: str):
+    """
+    Retorna a situação do job (`queued`, `running`, `completed`, `failed`
+    ou `cancelled`), as linhas lidas e os blocos de resultado já gravados.
+    """
+    _require_jobs()
+    job = job_manager.status(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return job
+
+
+@router.get(
+    "/jobs/{job_id}/result",
+    response_class=StreamingResponse,
+    summary="Resultado de um job",
+    description="Retorna em NDJSON os blocos de resultado já gravados, a partir de from_chunk",
+    responses={200: {"content": {"application/x-ndjson": {}}}},
+)
+def get_job_result(
+    job_id: str,
+    from_chunk: int = Query(0, ge=0, description="Primeiro bloco retornado (para baixar só os blocos novos)")
+):
+    """
+    Retorna as linhas de `/analyze/upload` dos blocos já concluídos.
+    
+    O cabeçalho `X-Job-Chunks` traz o número de blocos gravados até aqui
+    (use-o como `from_chunk` na próxima chamada) e `X-Job-Status`, a
+    situação do job no momento da leitura.
+    """
+    _require_jobs()
+    result = job_manager.result_chunks(job_id, from_chunk)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    job, chunks = result
+    return StreamingResponse(
+        iter_chunks(chunks),
+        media_type="application/x-ndjson",
+        headers={"X-Job-Status": job["status"], "X-Job-Chunks": str(job["chunks_done"])},
+    )
+
+
+@router.post(
+    "/jobs/{job_id}/cancel",
+    response_model=JobStatusResponse,
+    summary="Cancelar um job",
+    description="Cancela um job na fila ou em andamento; os blocos já gravados continuam disponíveis"
+)
+def cancel_job(job_id: str):
+    """
+    Um job na fila não chega a rodar; um job em andamento para ao fim do
+    bloco atual. Cancelar um job já concluído não tem efeito.
+    """
+    _require_jobs()
+    job = job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return job
+
+
+@router.get(
+    "/cache/stats",
+    summary="Estatísticas do cache de análises",
+    description="Retorna os contadores de acertos e falhas do cache de resultados de análise"
+)
+def get_cache_stats():
+    """
+    Retorna o número de entradas em memória e os contadores de acertos
+    (memória e nível compartilhado) e falhas do cache de análises.
+    """
+    return analysis_cache.stats()
+
+
+@router.get(
+    "/history/aggregates/{dimension}",
+    response_model=HistoryAggregateResponse,
+    summary="Agregados do histórico de análises",
+    description="Média do overall_score e contagem de materiais não eficientes por tamanho de empresa, setor, tipo de material ou dia"
+)
+def get_history_aggregates(
+    dimension: HistoryDimension,
+    start: Optional[str] = Query(None, description="Menor chave incluída (ex.: 2024-01-01 para dias)"),
+    end: Optional[str] = Query(None, description="Maior chave incluída")
+):
+    """
+    Retorna os agregados mantidos incrementalmente a cada gravação do
+    histórico, sem varrer as análises individuais.
+    """
+    if not history_writer.started:
+        raise HTTPException(status_code=503, detail="Histórico de análises desabilitado (configure DATABASE_URL)")
+    
+    rows = history_writer.backend.aggregates(dimension, start, end)
+    return {
+        "dimension": dimension,
+        "groups": [
+            {
+                "key": key,
+                "analyses": analyses,
+                "average_score": score_sum / analyses,
+                "materials": materials,
+                "non_eco_materials": non_eco_materials,
+            }
+            for key, analyses, score_sum, materials, non_eco_materials in rows
+        ],
+    }
+
+
 @router.get(
     "/benchmarks/{company_size}",
     summary="Obter benchmarks de referência",
     description="Retorna os benchmarks de referência para um tamanho específico de empresa"
 )
-def get_benchmarks(company_size: CompanySize):
+def get_benchmarks(company_size: CompanySize, request: Request):
     """
     Retorna os benchmarks de referência para consumo de materiais
     baseado no tamanho da empresa.
@@ -54,25 +626,51 @@ def get_benchmarks(company_size: CompanySize):
     - Uso médio do setor
     - Threshold para excelência
     """
-    from app.utils.sustainability import BENCHMARKS
-    
-    if company_size not in BENCHMARKS:
-        raise HTTPException(
-            status_code=404,
-            detail=f"Benchmarks não encontrados para tamanho: {company_size}"
-        )
+    return reference_responses.respond(request, f"benchmarks:{company_size.value}")
+
+
+def benchmarks_content(table: BenchmarkTable, company_size: CompanySize) -> dict:
+    """Conteúdo de `/benchmarks/{company_size}`"""
+    return {material.value: table.benchmark_dict(company_size, material) for material in MaterialType}
+
+
+@router.post(
+    "/benchmarks/reload",
+    summary="Recarregar benchmarks",
+    description="Recarrega os arquivos de benchmarks e de fatores de emissão e troca a tabela ativa sem reiniciar a aplicação"
+)
+def reload_benchmark_table():
+    """
+    Recarrega os benchmarks e os fatores de emissão a partir dos arquivos
+    versionados configurados em `BENCHMARKS_FILE` e `EMISSION_FACTORS_FILE`
+    e retorna a versão ativa.
+    """
+    try:
+        table = reload_benchmarks()
+    except (OSError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Erro ao recarregar benchmarks: {str(e)}")
     
-    return BENCHMARKS[company_size]
+    reference_responses.refresh(table)
+    return {
+        "version": table.version,
+        "emission_factors_version": table.emission_factors.version,
+        "fingerprint": table.fingerprint,
+    }
 
 
 @router.get(
     "/materials",
     summary="Listar tipos de materiais disponíveis"
 )
-def list_materials():
+def list_materials(request: Request):
     """
     Lista todos os tipos de materiais que podem ser analisados
     """
+    return reference_responses.respond(request, "materials")
+
+
+def materials_content(table: BenchmarkTable) -> dict:
+    """Conteúdo de `/materials`"""
     return {
         "materials": [
             {
@@ -100,10 +698,15 @@ def get_material_description(material_type: MaterialType) -> str:
     "/company-sizes",
     summary="Listar tamanhos de empresa disponíveis"
 )
-def list_company_sizes():
+def list_company_sizes(request: Request):
     """
     Lista todos os tamanhos de empresa disponíveis com suas descrições
     """
+    return reference_responses.respond(request, "company-sizes")
+
+
+def company_sizes_content(table: BenchmarkTable) -> dict:
+    """Conteúdo de `/company-sizes`"""
     return {
         "company_sizes": [
             {
@@ -132,10 +735,15 @@ def get_company_size_description(size: CompanySize) -> str:
     summary="Exemplo de uso da API",
     description="Retorna um exemplo de request para análise de sustentabilidade"
 )
-def get_example():
+def get_example(request: Request):
     """
     Retorna um exemplo de como usar o endpoint de análise
     """
+    return reference_responses.respond(request, "example")
+
+
+def example_content(table: BenchmarkTable) -> dict:
+    """Conteúdo de `/example`"""
     return {
         "example_request": {
             "company": {
@@ -161,3 +769,14 @@ def get_example():
     }
 
 
+def _benchmarks_builder(company_size: CompanySize):
+    return lambda table: benchmarks_content(table, company_size)
+
+
+# Respostas dos endpoints de referência, serializadas uma vez por tabela de benchmarks
+reference_responses = StaticResponseCache({
+    "materials": materials_content,
+    "company-sizes": company_sizes_content,
+    "example": example_content,
+    **{f"benchmarks:{size.value}": _benchmarks_builder(size) for size in CompanySize},
+})
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import Optional, List
+from pydantic import BaseModel, Field, model_validator
+from typing import Annotated, Optional, List, Dict, Union
 from enum import Enum
 
 
@@ -25,15 +25,41 @@ class CompanyData(BaseModel):
     """Dados da empresa"""
     size: CompanySize = Field(..., description="Tamanho da empresa")
     employees: int = Field(..., gt=0, description="Número de funcionários")
-    current_material_consumption: Optional[float] = Field(0, ge=0, description="Consumo atual de material")
+    current_material_consumption: Optional[float] = Field(
+        0, ge=0, allow_inf_nan=False, description="Consumo atual de material"
+    )
     industry: str = Field(..., description="Setor da empresa")
+    region: Optional[str] = Field(None, description="Região, para escolher o conjunto regional de fatores de emissão")
+    reference_year: Optional[int] = Field(None, description="Ano de referência dos fatores de emissão")
 
 
 class MaterialUsage(BaseModel):
     """Uso de material"""
     type: MaterialType = Field(..., description="Tipo de material")
-    quantity: float = Field(..., ge=0, description="Quantidade (toneladas, litros, kWh, etc)")
+    # Valores não finitos (ex.: 1e400, "inf") são recusados na validação: não há resposta JSON para eles
+    quantity: float = Field(..., ge=0, allow_inf_nan=False, description="Quantidade (toneladas, litros, kWh, etc)")
     unit: str = Field(default="toneladas", description="Unidade de medida")
+    std_dev: Optional[float] = Field(
+        None, ge=0, allow_inf_nan=False, description="Desvio padrão da quantidade (estimativas)"
+    )
+    quantity_min: Optional[float] = Field(
+        None, ge=0, allow_inf_nan=False, description="Limite inferior da quantidade (estimativas)"
+    )
+    quantity_max: Optional[float] = Field(
+        None, ge=0, allow_inf_nan=False, description="Limite superior da quantidade (estimativas)"
+    )
+
+    @model_validator(mode="after")
+    def check_uncertainty(self) -> "MaterialUsage":
+        """Incerteza é informada como desvio padrão ou como faixa completa, nunca ambos"""
+        has_range = self.quantity_min is not None or self.quantity_max is not None
+        if has_range and (self.quantity_min is None or self.quantity_max is None):
+            raise ValueError("quantity_min e quantity_max devem ser informados juntos")
+        if has_range and self.quantity_min > self.quantity_max:
+            raise ValueError("quantity_min deve ser menor ou igual a quantity_max")
+        if has_range and self.std_dev is not None:
+            raise ValueError("informe std_dev ou quantity_min/quantity_max, não ambos")
+        return self
 
 
 class SustainabilityCalculationRequest(BaseModel):
@@ -46,6 +72,15 @@ class SustainabilityCalculationRequest(BaseModel):
     )
 
 
+class MessageCode(BaseModel):
+    """Mensagem no modo `codes_only`: código estável do catálogo e seus parâmetros"""
+    code: str = Field(..., description="Código da mensagem, ex.: material.high_consumption")
+    params: Dict[str, Union[str, float]] = Field(default_factory=dict, description="Parâmetros do texto")
+
+
+Message = Union[str, MessageCode]
+
+
 class Benchmark(BaseModel):
     """Benchmark de referência para o tamanho da empresa"""
     company_size: CompanySize
@@ -64,7 +99,7 @@ class MaterialAnalysis(BaseModel):
     is_eco_efficient: bool = Field(..., description="Se é ecologicamente eficiente")
     efficiency_percentage: float = Field(..., ge=0, le=100, description="Porcentagem de eficiência")
     carbon_footprint_reduction: Optional[float] = Field(None, description="Redução de pegada de carbono")
-    recommendation: str = Field(..., description="Recomendação baseada na análise")
+    recommendation: Message = Field(..., description="Recomendação baseada na análise")
 
 
 class SustainabilityAnalysisResponse(BaseModel):
@@ -72,9 +107,250 @@ class SustainabilityAnalysisResponse(BaseModel):
     company: CompanyData
     materials_analysis: List[MaterialAnalysis]
     overall_score: float = Field(..., ge=0, le=100, description="Score geral de sustentabilidade")
-    overall_recommendation: str = Field(..., description="Recomendação geral")
+    overall_recommendation: Message = Field(..., description="Recomendação geral")
     is_eco_efficient: bool
     potential_savings: Optional[float] = Field(None, description="Economia potencial")
-    improvements: List[str] = Field(default_factory=list, description="Sugestões de melhoria")
+    improvements: List[Message] = Field(default_factory=list, description="Sugestões de melhoria")
+
+
+class BatchAnalysisRequest(BaseModel):
+    """Request para análise em lote de várias empresas"""
+    items: List[SustainabilityCalculationRequest] = Field(..., description="Empresas a analisar")
+
+
+class BatchAnalysisResponse(BaseModel):
+    """Resposta da análise em lote, na mesma ordem dos itens enviados"""
+    results: List[SustainabilityAnalysisResponse]
+
+
+class CompactMaterialAnalysis(BaseModel):
+    """Análise de um material no modo compacto (benchmark referenciado por id)"""
+    material_type: MaterialType
+    proposed_quantity: float
+    company_size: CompanySize
+    benchmark_id: str = Field(..., description="Id do benchmark em `benchmarks`, ex.: media:latao")
+    is_eco_efficient: bool
+    efficiency_percentage: float = Field(..., ge=0, le=100)
+    carbon_footprint_reduction: Optional[float] = None
+    recommendation: Message
+
+
+class CompactSustainabilityAnalysis(BaseModel):
+    """Análise de sustentabilidade no modo compacto"""
+    company: CompanyData
+    materials_analysis: List[CompactMaterialAnalysis]
+    overall_score: float = Field(..., ge=0, le=100)
+    overall_recommendation: Message
+    is_eco_efficient: bool
+    potential_savings: Optional[float] = None
+    improvements: List[Message] = Field(default_factory=list)
+
+
+class CompactSustainabilityAnalysisResponse(CompactSustainabilityAnalysis):
+    """Resposta compacta: cada benchmark usado aparece uma única vez"""
+    benchmarks_version: str
+    benchmarks: Dict[str, Benchmark]
+
+
+class CompactBatchAnalysisResponse(BaseModel):
+    """Resposta compacta do lote: benchmarks compartilhados por todos os resultados"""
+    benchmarks_version: str
+    benchmarks: Dict[str, Benchmark]
+    results: List[CompactSustainabilityAnalysis]
+
+
+class HistoryDimension(str, Enum):
+    """Dimensões de agregação do histórico de análises"""
+    COMPANY_SIZE = "company_size"
+    INDUSTRY = "industry"
+    MATERIAL_TYPE = "material_type"
+    DAY = "day"
+
+
+class HistoryAggregate(BaseModel):
+    """Indicadores agregados de um grupo do histórico"""
+    key: str = Field(..., description="Valor da dimensão (ex.: media, latao, 2024-01-31)")
+    analyses: int = Field(..., description="Análises no grupo (por material, na dimensão material_type)")
+    average_score: float = Field(..., description="Média do overall_score")
+    materials: int = Field(..., description="Materiais analisados")
+    non_eco_materials: int = Field(..., description="Materiais não eficientes")
+
+
+class HistoryAggregateResponse(BaseModel):
+    """Agregados do histórico por dimensão"""
+    dimension: HistoryDimension
+    groups: List[HistoryAggregate]
+
+
+class MaterialComparison(BaseModel):
+    """Variação de um tipo de material entre o consumo atual e o proposto"""
+    material_type: MaterialType
+    current_quantity: float = Field(..., description="Quantidade atual (soma das entradas do material)")
+    proposed_quantity: float = Field(..., description="Quantidade proposta (soma das entradas do material)")
+    current_efficiency: Optional[float] = Field(None, description="Eficiência média atual")
+    proposed_efficiency: Optional[float] = Field(None, description="Eficiência média proposta")
+    efficiency_change: Optional[float] = Field(None, description="Variação da eficiência")
+    carbon_change: float = Field(..., description="Variação das emissões em kg CO2 (negativo = redução)")
+    score_change: float = Field(..., description="Variação da contribuição do material para o score geral")
+
+
+class ComparisonResponse(BaseModel):
+    """Comparação entre o consumo atual e o proposto"""
+    company: CompanyData
+    benchmarks_version: str
+    current_score: float = Field(..., ge=0, le=100)
+    proposed_score: float = Field(..., ge=0, le=100)
+    score_change: float
+    carbon_change: float = Field(..., description="Variação total das emissões em kg CO2")
+    materials: List[MaterialComparison]
+
+
+class TargetQuantitiesRequest(BaseModel):
+    """Request do cálculo de quantidades para atingir scores alvo"""
+    company: CompanyData
+    proposed_materials: List[MaterialUsage] = Field(..., description="Materiais propostos")
+    targets: List[Annotated[float, Field(ge=0, le=100)]] = Field(
+        ..., min_length=1, max_length=1000, description="Scores alvo (0-100)"
+    )
+
+
+class MaterialTargets(BaseModel):
+    """Quantidades máximas de um material para cada alvo"""
+    material_type: MaterialType
+    proposed_quantity: float
+    efficiency_percentage: float
+    max_quantity: List[Optional[float]] = Field(
+        ..., description="Maior quantidade com eficiência >= alvo (null: qualquer quantidade)"
+    )
+    required_reduction: List[float] = Field(..., description="Redução necessária a partir da quantidade proposta")
+
+
+class CompanyTargets(BaseModel):
+    """Fator de escala de todos os materiais para cada alvo"""
+    overall_score: float
+    scale: List[Optional[float]] = Field(
+        ..., description="Maior fator aplicado a todas as quantidades com score >= alvo (null: qualquer fator)"
+    )
+    required_reduction_percentage: List[float] = Field(..., description="Redução uniforme necessária, em %")
+
+
+class TargetQuantitiesResponse(BaseModel):
+    """Quantidades para atingir os scores alvo, na ordem de `targets`"""
+    targets: List[float]
+    materials: List[MaterialTargets]
+    company: CompanyTargets
+
+
+class SweepCurve(BaseModel):
+    """Curvas de um material, com um valor por quantidade da grade"""
+    material_type: MaterialType
+    recommended_max: float = Field(..., description="Quantidades até este valor são eficientes")
+    quantity: List[float]
+    efficiency_percentage: List[float]
+    carbon_footprint_reduction: List[Optional[float]]
+
+
+class SweepResponse(BaseModel):
+    """Curvas de eficiência e carbono de um tamanho de empresa"""
+    company_size: CompanySize
+    benchmarks_version: str
+    curves: List[SweepCurve]
+
+
+class OptimizationItem(BaseModel):
+    """Empresa com orçamento de redução"""
+    company: CompanyData
+    proposed_materials: List[MaterialUsage] = Field(
+        ..., max_length=1000, description="Materiais propostos (até 1000 por empresa)"
+    )
+    budget: float = Field(..., ge=0, description="Orçamento total de redução (em unidades de custo)")
+    costs: Optional[Dict[MaterialType, Annotated[float, Field(gt=0)]]] = Field(
+        None, description="Custo por unidade reduzida de cada material (padrão: 1)"
+    )
+
+
+class OptimizationRequest(BaseModel):
+    """Request de otimização para várias empresas"""
+    items: List[OptimizationItem] = Field(..., description="Empresas a otimizar")
+
+
+class OptimizationResult(BaseModel):
+    """Alocação do orçamento de uma empresa, na ordem de `proposed_materials`"""
+    overall_score: float = Field(..., description="Score geral antes da redução")
+    optimized_score: float = Field(..., description="Score geral após a redução")
+    budget_used: float
+    reductions: List[float]
+    optimized_quantities: List[float]
+    efficiency_percentage: List[float]
+
+
+class OptimizationResponse(BaseModel):
+    """Resultados da otimização, na mesma ordem dos itens enviados"""
+    results: List[OptimizationResult]
+
+
+class UncertaintyAnalysisRequest(BaseModel):
+    """Request da análise de incerteza (Monte Carlo)"""
+    company: CompanyData
+    proposed_materials: List[MaterialUsage] = Field(..., min_length=1, description="Materiais propostos, com incerteza opcional")
+    samples: int = Field(10_000, ge=1, le=1_000_000, description="Amostras por material")
+    percentiles: List[Annotated[float, Field(ge=0, le=100)]] = Field(
+        default_factory=lambda: [5.0, 25.0, 50.0, 75.0, 95.0],
+        min_length=1,
+        max_length=101,
+        description="Percentis retornados",
+    )
+    seed: Optional[int] = Field(
+        None, ge=0, le=2**63 - 1, description="Semente de até 63 bits (padrão: aleatória, retornada na resposta)"
+    )
+
+
+class UncertaintySummary(BaseModel):
+    """Distribuição de uma eficiência ou do score, na ordem de `percentiles`"""
+    mean: float
+    std: float
+    percentiles: List[float]
+    probability_eco_efficient: float = Field(..., ge=0, le=1, description="Fração das amostras eficientes")
+
+
+class MaterialUncertainty(UncertaintySummary):
+    """Distribuição da eficiência de um material"""
+    material_type: MaterialType
+    proposed_quantity: float
+
+
+class UncertaintyAnalysisResponse(BaseModel):
+    """Resultado da análise de incerteza"""
+    samples: int
+    seed: int
+    benchmarks_version: str
+    percentiles: List[float]
+    overall_score: UncertaintySummary = Field(
+        ..., description="Score geral; eficiente quando todos os materiais da amostra são eficientes"
+    )
+    materials: List[MaterialUncertainty]
+
+
+class JobStatus(str, Enum):
+    """Situação de um job de análise"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
 
 
+class JobStatusResponse(BaseModel):
+    """Situação e progresso de um job de análise de planilha"""
+    job_id: str
+    status: JobStatus
+    filename: Optional[str] = None
+    created_at: float = Field(..., description="Criação (timestamp Unix)")
+    updated_at: float = Field(..., description="Última atualização (timestamp Unix)")
+    rows_total: int = Field(..., description="Linhas de dados da planilha (estimativa no CSV)")
+    rows_read: int = Field(..., description="Linhas já lidas e analisadas")
+    progress: float = Field(..., ge=0, le=1, description="Fração concluída")
+    chunks_done: int = Field(..., description="Blocos de resultado já gravados (disponíveis para download)")
+    companies: int = Field(..., description="Empresas analisadas")
+    errors: int = Field(..., description="Linhas inválidas")
+    error: Optional[str] = Field(None, description="Motivo da falha, quando status=failed")
@@ -0,0 +1,181 @@
+"""
+Controle de admissão (load shedding) por grupo de rotas
+
+Cada grupo de rotas (prefixo do caminho em `ADMISSION_ROUTE_LIMITS`; as
+demais rotas formam o grupo `default`) tem um limite de requests em
+andamento. Acima do limite, o request espera em uma fila FIFO limitada por
+no máximo `ADMISSION_QUEUE_TIMEOUT` segundos; com a fila cheia ou o prazo
+vencido, recebe `503` com `Retry-After` na hora, em vez de esperar
+indefinidamente no threadpool junto com todos os outros.
+
+`GET`/`HEAD` em `ADMISSION_EXEMPT_PATHS` (health check, métricas e endpoints
+de referência em cache) nunca passam pelo controle. Um caminho terminado em
+`/` isenta todos os caminhos abaixo dele.
+"""
+import asyncio
+from collections import deque
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.config import settings
+from app.utils.metrics import CallbackMetric, Counter
+
+
+DEFAULT_GROUP = "default"
+
+ADMISSION_REQUESTS = Counter(
+    "http_admission_requests_total",
+    "Requests por grupo de rotas e resultado do controle de admissão "
+    "(admitted: sem espera; queued: após esperar na fila; rejected_full/rejected_timeout: 503)",
+    ("group", "result"),
+)
+
+
+class AdmissionGroup:
+    """Limite de concorrência e fila de espera de um grupo de rotas"""
+
+    def __init__(self, name: str, limit: int, queue_size: int):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._admitted = ADMISSION_REQUESTS.labels(name, "admitted")
+        self._queued = ADMISSION_REQUESTS.labels(name, "queued")
+        self._rejected_full = ADMISSION_REQUESTS.labels(name, "rejected_full")
+        self._rejected_timeout = ADMISSION_REQUESTS.labels(name, "rejected_timeout")
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, timeout: float) -> bool:
+        """
+        Ocupa uma vaga do grupo
+
+        Args:
+            timeout: Espera máxima na fila, em segundos
+
+        Returns:
+            Se o request foi admitido (`False`: fila cheia ou prazo vencido)
+        """
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self._admitted.inc()
+            return True
+        if len(self._waiters) >= self.queue_size:
+            self._rejected_full.inc()
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # shield: o prazo não cancela a vaga se ela for entregue no mesmo instante
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except asyncio.TimeoutError:
+            if not waiter.done():
+                waiter.cancel()
+                self._waiters.remove(waiter)
+                self._rejected_timeout.inc()
+                return False
+        except BaseException:
+            # Cliente desconectou enquanto esperava
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            raise
+        self._queued.inc()
+        return True
+
+    def release(self) -> None:
+        """Libera a vaga, passando-a direto ao primeiro da fila"""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+
+class AdmissionMiddleware:
+    """Middleware ASGI que limita a concorrência por grupo de rotas e descarta o excesso com 503"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        route_limits: Optional[Dict[str, int]] = None,
+        default_limit: Optional[int] = None,
+        queue_size: Optional[int] = None,
+        queue_timeout: Optional[float] = None,
+        retry_after: Optional[int] = None,
+        exempt_paths: Optional[Sequence[str]] = None,
+    ):
+        self.app = app
+        route_limits = settings.ADMISSION_ROUTE_LIMITS if route_limits is None else route_limits
+        queue_size = settings.ADMISSION_QUEUE_SIZE if queue_size is None else queue_size
+        self.queue_timeout = settings.ADMISSION_QUEUE_TIMEOUT if queue_timeout is None else queue_timeout
+        self.retry_after = str(settings.ADMISSION_RETRY_AFTER if retry_after is None else retry_after)
+        exempt_paths = settings.ADMISSION_EXEMPT_PATHS if exempt_paths is None else exempt_paths
+        self.exempt = frozenset(path for path in exempt_paths if not path.endswith("/"))
+        self.exempt_prefixes = tuple(path for path in exempt_paths if path.endswith("/"))
+
+        # Prefixos mais longos primeiro: /analyze/batch antes de /analyze
+        self.routes: List[Tuple[str, AdmissionGroup]] = [
+            (prefix, AdmissionGroup(prefix, limit, queue_size))
+            for prefix, limit in sorted(route_limits.items(), key=lambda item: len(item[0]), reverse=True)
+        ]
+        self.default = AdmissionGroup(
+            DEFAULT_GROUP, settings.ADMISSION_DEFAULT_LIMIT if default_limit is None else default_limit, queue_size
+        )
+        for group in [group for _, group in self.routes] + [self.default]:
+            admission_groups[group.name] = group
+
+    def group(self, path: str) -> AdmissionGroup:
+        for prefix, group in self.routes:
+            if path.startswith(prefix):
+                return group
+        return self.default
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        path = scope["path"]
+        if scope["method"] in ("GET", "HEAD") and (path in self.exempt or path.startswith(self.exempt_prefixes)):
+            await self.app(scope, receive, send)
+            return
+
+        group = self.group(path)
+        if not await group.acquire(self.queue_timeout):
+            response = JSONResponse(
+                {"detail": "Servidor sobrecarregado, tente novamente em instantes"},
+                status_code=503,
+                headers={"Retry-After": self.retry_after},
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            group.release()
+
+
+# Grupos do middleware em uso, para as métricas
+admission_groups: Dict[str, AdmissionGroup] = {}
+
+CallbackMetric(
+    "http_admission_active",
+    "Requests em andamento por grupo de rotas",
+    ("group",),
+    lambda: {(group.name,): group.active for group in admission_groups.values()},
+)
+CallbackMetric(
+    "http_admission_queue_depth",
+    "Requests aguardando vaga por grupo de rotas",
+    ("group",),
+    lambda: {(group.name,): group.waiting for group in admission_groups.values()},
+)
@@ -0,0 +1,230 @@
+"""
+Tabela compilada de benchmarks de referência
+
+Os benchmarks são carregados de um arquivo de dados versionado e compilados em
+um array denso (tamanho, material, 3), indexado pela posição dos enums. O
+registro de fatores de emissão (`app.utils.emission_factors`) faz parte da
+mesma tabela, então benchmarks e fatores sempre trocam juntos. A tabela ativa
+pode ser trocada em tempo de execução com `reload_benchmarks`, sem reiniciar a
+aplicação.
+
+Com `SHARED_TABLES_PATH`, a tabela ativa vem de um segmento em arquivo
+compartilhado por todos os workers do host (`app.utils.shared_tables`): uma
+recarga em qualquer worker publica a nova versão, e os demais passam a usá-la
+no request seguinte.
+"""
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+from app.config import settings
+from app.schemas.sustainability import Benchmark, CompanySize, MaterialType
+from app.utils.emission_factors import EmissionFactorRegistry, load_emission_factors
+from app.utils.shared_tables import SharedTables, publish_tables
+
+
+DEFAULT_BENCHMARKS_FILE = Path(__file__).resolve().parent.parent / "data" / "benchmarks.json"
+
+SIZE_INDEX = {size: i for i, size in enumerate(CompanySize)}
+MATERIAL_INDEX = {material: i for i, material in enumerate(MaterialType)}
+
+# Colunas da tabela
+EXCELLENT = 0
+RECOMMENDED = 1
+AVERAGE = 2
+
+_FIELDS = ("excellent_threshold", "recommended_max", "average_usage")
+
+
+def _readonly(values) -> np.ndarray:
+    # Arrays já somente leitura (ex.: mapeados do segmento compartilhado) são usados sem cópia
+    if isinstance(values, np.ndarray) and values.dtype == np.float64 and not values.flags.writeable:
+        return values
+    values = np.array(values, dtype=np.float64)
+    values.flags.writeable = False
+    return values
+
+
+class BenchmarkTable:
+    """
+    Benchmarks compilados em um array (tamanho, material, [excelente, recomendado, médio])
+    e o registro de fatores de emissão
+    """
+
+    __slots__ = ("version", "fingerprint", "values", "emission_factors", "carbon_factors", "_models", "_dicts", "_ids")
+
+    def __init__(self, values: np.ndarray, version: str, emission_factors: Optional[EmissionFactorRegistry] = None):
+        values = _readonly(values)
+        expected = (len(SIZE_INDEX), len(MATERIAL_INDEX), len(_FIELDS))
+        if values.shape != expected:
+            raise ValueError(f"Tabela de benchmarks com formato {values.shape}, esperado {expected}")
+        emission_factors = emission_factors or _emission_factors
+
+        excellent = values[..., EXCELLENT]
+        recommended = values[..., RECOMMENDED]
+        average = values[..., AVERAGE]
+        if not (np.all(excellent >= 0) and np.all(excellent <= recommended) and np.all(recommended <= average)):
+            raise ValueError(
+                "Benchmarks inválidos: é necessário 0 <= excellent_threshold <= recommended_max <= average_usage"
+            )
+
+        self.values = values
+        self.emission_factors = emission_factors
+        # Fatores do conjunto padrão (kg CO2e por tonelada; energia: por MWh)
+        self.carbon_factors = emission_factors.default
+        self.version = version
+        self.fingerprint = hashlib.sha256(
+            version.encode() + values.tobytes() + emission_factors.fingerprint.encode()
+        ).hexdigest()[:16]
+        self._models = [
+            [
+                Benchmark(
+                    company_size=size,
+                    material_type=material,
+                    excellent_threshold=values[i, j, EXCELLENT],
+                    recommended_max=values[i, j, RECOMMENDED],
+                    average_usage=values[i, j, AVERAGE],
+                )
+                for j, material in enumerate(MaterialType)
+            ]
+            for i, size in enumerate(CompanySize)
+        ]
+        # Formas já prontas para serialização, montadas uma vez por tabela
+        self._dicts = [[model.model_dump(mode="json") for model in row] for row in self._models]
+        self._ids = [
+            [f"{size.value}:{material.value}" for material in MaterialType]
+            for size in CompanySize
+        ]
+
+    def benchmark(self, company_size: CompanySize, material_type: MaterialType) -> Benchmark:
+        """Retorna o benchmark de um tamanho de empresa e tipo de material"""
+        return self._models[SIZE_INDEX[company_size]][MATERIAL_INDEX[material_type]]
+
+    def benchmark_dict(self, company_size: CompanySize, material_type: MaterialType) -> dict:
+        """Retorna o benchmark já convertido para JSON (não modificar)"""
+        return self._dicts[SIZE_INDEX[company_size]][MATERIAL_INDEX[material_type]]
+
+    def benchmark_id(self, company_size: CompanySize, material_type: MaterialType) -> str:
+        """Retorna o identificador estável do benchmark, ex.: `media:latao`"""
+        return self._ids[SIZE_INDEX[company_size]][MATERIAL_INDEX[material_type]]
+
+    def carbon_factor(
+        self,
+        material_type: MaterialType,
+        region: Optional[str] = None,
+        year: Optional[int] = None
+    ) -> float:
+        """Retorna o fator de emissão de um tipo de material (conjunto da região/ano, se houver)"""
+        return self.emission_factors.factor(material_type, region, year)
+
+    def for_size(self, company_size: CompanySize) -> Dict[MaterialType, Benchmark]:
+        """Retorna todos os benchmarks de um tamanho de empresa"""
+        return dict(zip(MaterialType, self._models[SIZE_INDEX[company_size]]))
+
+    def rows(self, size_idx: np.ndarray, material_idx: np.ndarray) -> np.ndarray:
+        """Retorna as linhas (n, 3) da tabela para os índices informados"""
+        return self.values[size_idx, material_idx]
+
+
+def load_benchmark_table(
+    path: Optional[str] = None,
+    emission_factors: Optional[EmissionFactorRegistry] = None
+) -> BenchmarkTable:
+    """
+    Carrega e compila a tabela de benchmarks a partir de um arquivo JSON
+
+    Args:
+        path: Caminho do arquivo; se omitido, usa `settings.BENCHMARKS_FILE`
+            ou o arquivo padrão do pacote
+        emission_factors: Registro de fatores de emissão (padrão: o carregado no startup)
+
+    Returns:
+        Tabela compilada
+    """
+    path = Path(path or settings.BENCHMARKS_FILE or DEFAULT_BENCHMARKS_FILE)
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+
+    values = np.empty((len(SIZE_INDEX), len(MATERIAL_INDEX), len(_FIELDS)), dtype=np.float64)
+    for size, i in SIZE_INDEX.items():
+        for material, j in MATERIAL_INDEX.items():
+            try:
+                entry = data["benchmarks"][size.value][material.value]
+                values[i, j] = [float(entry[field]) for field in _FIELDS]
+            except KeyError as e:
+                raise ValueError(
+                    f"Benchmark ausente em {path}: {size.value}/{material.value} ({e})"
+                ) from e
+
+    return BenchmarkTable(values, version=str(data.get("version", "")), emission_factors=emission_factors)
+
+
+_emission_factors = load_emission_factors()
+_table = load_benchmark_table()
+_shared: Optional[SharedTables] = None
+
+
+def get_benchmark_table() -> BenchmarkTable:
+    """
+    Retorna a tabela de benchmarks ativa
+
+    Com o segmento compartilhado, cada chamada confere (um `stat`) se há uma
+    versão publicada mais nova; sem ele, ou se o segmento ainda não existe,
+    vale a tabela local.
+    """
+    if _shared is not None:
+        snapshot = _shared.current(table_from_segment)
+        if snapshot is not None:
+            return snapshot
+    return _table
+
+
+def publish_table(path: str, table: BenchmarkTable) -> int:
+    """Publica a tabela (benchmarks e todos os conjuntos de fatores) no segmento compartilhado"""
+    metadata = {"version": table.version, "emission_factors": table.emission_factors.metadata()}
+    return publish_tables(path, metadata, table.values, table.emission_factors.values)
+
+
+def table_from_segment(metadata: dict, values: np.ndarray, carbon_factors: np.ndarray) -> BenchmarkTable:
+    """Monta a tabela sobre os arrays mapeados do segmento compartilhado"""
+    emission_factors = EmissionFactorRegistry.from_metadata(metadata["emission_factors"], carbon_factors)
+    return BenchmarkTable(values, metadata["version"], emission_factors)
+
+
+def reload_benchmarks(path: Optional[str] = None, emission_factors_path: Optional[str] = None) -> BenchmarkTable:
+    """
+    Recarrega os benchmarks e os fatores de emissão e troca a tabela ativa
+
+    A troca é uma única atribuição, então requests em andamento continuam
+    usando a tabela que já obtiveram. Com o segmento compartilhado, a nova
+    tabela é publicada para todos os workers.
+    """
+    global _table, _emission_factors
+    emission_factors = load_emission_factors(emission_factors_path)
+    table = load_benchmark_table(path, emission_factors)
+    if _shared is not None:
+        publish_table(_shared.path, table)
+    _emission_factors = emission_factors
+    _table = table
+    return table
+
+
+def use_shared_tables(path: str) -> None:
+    """
+    Passa a ler a tabela ativa do segmento compartilhado em `path`
+
+    Se o segmento ainda não existe, publica a tabela local (o primeiro worker
+    a subir publica; os demais apenas mapeiam). Caminho vazio volta a usar
+    só a tabela local deste processo.
+    """
+    global _shared
+    if not path:
+        _shared = None
+        return
+    shared = SharedTables(path)
+    if not shared.exists():
+        publish_table(path, _table)
+    _shared = shared
@@ -0,0 +1,218 @@
+"""
+Cache de resultados de análise endereçado por conteúdo
+
+A chave é um hash canônico dos dados da empresa, dos materiais propostos e do
+fingerprint da tabela compilada (benchmarks e fatores de emissão); trocar qualquer um deles gera
+chaves novas, invalidando automaticamente os resultados antigos.
+
+O primeiro nível é um LRU em memória com TTL. O segundo, opcional, é um
+arquivo SQLite compartilhado entre os workers do uvicorn. Os níveis também
+podem ser consultados separadamente (`get_local`/`get_shared`,
+`set_local`/`set_shared`), para que só o LRU rode no event loop e o SQLite
+vá para uma thread.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.schemas.sustainability import CompanyData, MaterialUsage
+from app.utils.benchmarks import BenchmarkTable, get_benchmark_table
+from app.utils.metrics import CallbackMetric
+
+
+def analysis_cache_key(
+    company: CompanyData,
+    proposed_materials: List[MaterialUsage],
+    variant: str = "",
+    table: Optional[BenchmarkTable] = None
+) -> str:
+    """
+    Calcula a chave canônica de uma análise
+
+    Campos são serializados já validados (defaults preenchidos, números
+    normalizados) e com chaves ordenadas, então payloads equivalentes geram
+    a mesma chave.
+
+    Args:
+        company: Dados da empresa
+        proposed_materials: Materiais propostos
+        variant: Formato da resposta armazenada (ex.: "compact")
+        table: Tabela de benchmarks usada na análise (padrão: tabela ativa)
+    """
+    payload = {
+        "company": company.model_dump(mode="json"),
+        "materials": [material.model_dump(mode="json") for material in proposed_materials],
+        "benchmarks": (table or get_benchmark_table()).fingerprint,
+        "variant": variant,
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class SQLiteCacheStore:
+    """Segundo nível do cache, compartilhado entre processos via arquivo SQLite"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS analysis_cache ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._local.connection = connection
+        return connection
+
+    def get(self, key: str) -> Optional[bytes]:
+        row = self._connection().execute(
+            "SELECT value FROM analysis_cache WHERE key = ? AND expires_at > ?",
+            (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        self._connection().execute(
+            "INSERT OR REPLACE INTO analysis_cache (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, value, time.time() + ttl_seconds)
+        )
+
+    def purge_expired(self) -> None:
+        self._connection().execute("DELETE FROM analysis_cache WHERE expires_at <= ?", (time.time(),))
+
+    def clear(self) -> None:
+        self._connection().execute("DELETE FROM analysis_cache")
+
+
+class AnalysisCache:
+    """Cache de dois níveis para respostas de análise já serializadas"""
+
+    def __init__(self, max_entries: int, ttl_seconds: float, sqlite_path: str = ""):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.shared = SQLiteCacheStore(sqlite_path) if sqlite_path else None
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Retorna o valor em cache ou `None`, contabilizando acertos e falhas"""
+        value = self.get_local(key)
+        if value is None:
+            value = self.get_shared(key)
+        return value
+
+    def get_local(self, key: str) -> Optional[bytes]:
+        """
+        Consulta só o nível em memória
+
+        Conta apenas os acertos: depois de um `None`, a consulta continua em
+        `get_shared`, que conta o acerto compartilhado ou a falha.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+        return None
+
+    def get_shared(self, key: str) -> Optional[bytes]:
+        """Consulta o nível compartilhado (SQLite), copiando o acerto para a memória"""
+        value = None
+        if self.shared is not None:
+            try:
+                value = self.shared.get(key)
+            except sqlite3.Error:
+                value = None
+
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.shared_hits += 1
+            self._store(key, value, time.monotonic())
+        return value
+
+    def set(self, key: str, value: bytes) -> None:
+        """Armazena um valor nos dois níveis"""
+        self.set_local(key, value)
+        self.set_shared(key, value)
+
+    def set_local(self, key: str, value: bytes) -> None:
+        """Armazena um valor só no nível em memória"""
+        with self._lock:
+            self._store(key, value, time.monotonic())
+
+    def set_shared(self, key: str, value: bytes) -> None:
+        """Armazena um valor no nível compartilhado, removendo os expirados a cada 1000 gravações"""
+        if self.shared is None:
+            return
+        with self._lock:
+            self._writes += 1
+            purge = self._writes % 1000 == 0
+        try:
+            self.shared.set(key, value, self.ttl_seconds)
+            if purge:
+                self.shared.purge_expired()
+        except sqlite3.Error:
+            pass
+
+    def _store(self, key: str, value: bytes, now: float) -> None:
+        self._entries[key] = (now + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove todas as entradas e zera os contadores"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.shared_hits = self.misses = 0
+        if self.shared is not None:
+            self.shared.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Retorna os contadores de acertos e falhas"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+            }
+
+
+analysis_cache = AnalysisCache(
+    max_entries=settings.CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.CACHE_TTL_SECONDS,
+    sqlite_path=settings.CACHE_SQLITE_PATH,
+)
+
+CallbackMetric(
+    "analysis_cache_requests_total",
+    "Consultas ao cache de análises por resultado",
+    ("result",),
+    lambda: {
+        ("hit",): analysis_cache.hits,
+        ("shared_hit",): analysis_cache.shared_hits,
+        ("miss",): analysis_cache.misses,
+    },
+    type_name="counter",
+)
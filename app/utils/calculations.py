@@ -1,32 +1,31 @@
 """
 Cálculos auxiliares para análises de sustentabilidade
 """
-from typing import Dict, List
+from typing import Dict, List, Optional
 from app.schemas.sustainability import MaterialType, CompanySize
+from app.utils.benchmarks import get_benchmark_table
 
 
-def calculate_carbon_savings(material_type: MaterialType, quantity_saved: float) -> float:
+def calculate_carbon_savings(
+    material_type: MaterialType,
+    quantity_saved: float,
+    region: Optional[str] = None,
+    year: Optional[int] = None
+) -> float:
     """
     Calcula economia de carbono em kg CO2 equivalente
     
     Args:
         material_type: Tipo do material
-        quantity_saved: Quantidade economizada
+        quantity_saved: Quantidade economizada (toneladas; energia em MWh)
+        region: Região (conjunto regional de fatores de emissão)
+        year: Ano de referência dos fatores de emissão
         
     Returns:
         Economia em kg CO2
     """
-    # Fatores de emissão por unidade de material (kg CO2 por tonelada)
-    emission_factors = {
-        MaterialType.LATAO: 2500,  # kg CO2 por tonelada
-        MaterialType.AGUA: 1.0,
-        MaterialType.PAPEL: 1800,
-        MaterialType.PLASTICO: 2500,
-        MaterialType.ENERGIA: 500,  # kg CO2 por MWh
-    }
-    
-    factor = emission_factors.get(material_type, 1000)
-    return quantity_saved * factor
+    # Fatores do registro ativo (kg CO2 por tonelada; energia: por MWh)
+    return quantity_saved * get_benchmark_table().carbon_factor(material_type, region, year)
 
 
 def calculate_water_intensity_by_size(size: CompanySize) -> float:
@@ -0,0 +1,77 @@
+"""
+Coalescência de análises idênticas em andamento (single-flight)
+
+Quando vários requests idênticos chegam ao mesmo tempo (ex.: o exemplo de
+`/example` enviado por centenas de usuários no lançamento de uma campanha),
+todos antes do primeiro resultado chegar ao cache, apenas o primeiro executa
+a análise; os demais aguardam a mesma execução e recebem os mesmos bytes
+serializados.
+
+A chave é a mesma do cache de análises (`analysis_cache_key`), então só são
+agrupados requests que produziriam a mesma resposta. A execução roda em uma
+task própria: se o cliente que a iniciou desconecta, os demais continuam
+esperando o resultado normalmente.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from app.utils.metrics import CallbackMetric, Counter
+
+
+SINGLEFLIGHT_REQUESTS = Counter(
+    "analysis_singleflight_requests_total",
+    "Análises por resultado da coalescência (executed: executou a análise; coalesced: reaproveitou uma em andamento)",
+    ("result",),
+)
+_EXECUTED = SINGLEFLIGHT_REQUESTS.labels("executed")
+_COALESCED = SINGLEFLIGHT_REQUESTS.labels("coalesced")
+
+
+class SingleFlight:
+    """Compartilha uma execução em andamento entre chamadas com a mesma chave"""
+
+    def __init__(self):
+        self._inflight: Dict[str, "asyncio.Task[Any]"] = {}
+
+    async def run(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Executa `fn()` ou aguarda a execução em andamento com a mesma chave
+
+        Args:
+            key: Chave canônica do request
+            fn: Função que cria a corrotina da execução
+
+        Returns:
+            Resultado e se ele veio de uma execução iniciada por outro request
+        """
+        loop = asyncio.get_running_loop()
+        task = self._inflight.get(key)
+        if task is not None and task.get_loop() is loop:
+            _COALESCED.inc()
+            return await asyncio.shield(task), True
+
+        task = loop.create_task(fn())
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._forget(key, done))
+        _EXECUTED.inc()
+        return await asyncio.shield(task), False
+
+    def _forget(self, key: str, task: "asyncio.Task[Any]") -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Evita o aviso de exceção não lida quando todos os requests desistiram
+            task.exception()
+
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+
+analysis_flights = SingleFlight()
+
+CallbackMetric(
+    "analysis_singleflight_inflight",
+    "Análises distintas em andamento compartilháveis",
+    (),
+    lambda: {(): analysis_flights.inflight()},
+)
@@ -0,0 +1,109 @@
+"""
+Comparação entre o consumo atual e o proposto
+
+O consumo atual (`current_materials`) e o proposto são avaliados em uma única
+passada vetorizada, com a mesma busca de benchmarks e os mesmos fatores de
+carbono. Os materiais são pareados por tipo; entradas repetidas de um mesmo
+tipo são somadas.
+"""
+from typing import List, Optional
+
+import numpy as np
+
+from app.models.analysis import ComparisonResult, MaterialComparison
+from app.schemas.sustainability import CompanyData, MaterialType, MaterialUsage
+from app.utils.benchmarks import (
+    AVERAGE,
+    EXCELLENT,
+    MATERIAL_INDEX,
+    RECOMMENDED,
+    SIZE_INDEX,
+    BenchmarkTable,
+    get_benchmark_table,
+)
+from app.utils.emission_factors import emissions_array
+from app.utils.vectorized import efficiency_percentage_array
+
+
+MATERIAL_TYPES = list(MaterialType)
+
+
+def _score(efficiencies: List[float]) -> float:
+    # Mesma soma de `calculate_sustainability_score`, para bater com /analyze
+    return float(sum(efficiencies) / len(efficiencies)) if efficiencies else 0.0
+
+
+def compare_materials(
+    company: CompanyData,
+    current_materials: List[MaterialUsage],
+    proposed_materials: List[MaterialUsage],
+    table: Optional[BenchmarkTable] = None
+) -> ComparisonResult:
+    """
+    Compara o consumo atual com o proposto
+
+    Args:
+        company: Dados da empresa
+        current_materials: Consumo atual
+        proposed_materials: Consumo proposto
+        table: Tabela de benchmarks (padrão: tabela ativa)
+
+    Returns:
+        Variações por tipo de material e do score geral. A soma de
+        `score_change` dos materiais é a variação do score geral.
+    """
+    table = table or get_benchmark_table()
+    materials = list(current_materials) + list(proposed_materials)
+    n_current = len(current_materials)
+    n_proposed = len(proposed_materials)
+    n_types = len(MATERIAL_TYPES)
+
+    material_idx = np.fromiter((MATERIAL_INDEX[m.type] for m in materials), dtype=np.intp, count=len(materials))
+    quantity = np.fromiter((m.quantity for m in materials), dtype=np.float64, count=len(materials))
+    rows = table.values[SIZE_INDEX[company.size], material_idx]
+
+    efficiency = efficiency_percentage_array(quantity, rows[:, EXCELLENT], rows[:, RECOMMENDED], rows[:, AVERAGE])
+    factors = table.emission_factors.factors(company.region, company.reference_year)
+    carbon = emissions_array(quantity, factors[material_idx])
+
+    # Posição (lado, material): 0..n_types-1 para o atual, n_types.. para o proposto
+    slot = material_idx.copy()
+    slot[n_current:] += n_types
+
+    def totals(weights: Optional[np.ndarray] = None) -> list:
+        return np.bincount(slot, weights=weights, minlength=2 * n_types).reshape(2, n_types).tolist()
+
+    counts = totals()
+    quantities = totals(quantity)
+    efficiency_sums = totals(efficiency)
+    carbon_sums = totals(carbon)
+
+    efficiency_list = efficiency.tolist()
+    current_score = _score(efficiency_list[:n_current])
+    proposed_score = _score(efficiency_list[n_current:])
+
+    comparisons = []
+    for j, material_type in enumerate(MATERIAL_TYPES):
+        current_count, proposed_count = counts[0][j], counts[1][j]
+        if not current_count and not proposed_count:
+            continue
+        current_contribution = efficiency_sums[0][j] / n_current if n_current else 0.0
+        proposed_contribution = efficiency_sums[1][j] / n_proposed if n_proposed else 0.0
+        comparisons.append(MaterialComparison(
+            material_type=material_type,
+            current_quantity=quantities[0][j],
+            proposed_quantity=quantities[1][j],
+            current_efficiency=efficiency_sums[0][j] / current_count if current_count else None,
+            proposed_efficiency=efficiency_sums[1][j] / proposed_count if proposed_count else None,
+            carbon_change=carbon_sums[1][j] - carbon_sums[0][j],
+            score_change=proposed_contribution - current_contribution,
+        ))
+
+    return ComparisonResult(
+        company=company,
+        materials=comparisons,
+        current_score=current_score,
+        proposed_score=proposed_score,
+        carbon_change=sum(comparison.carbon_change for comparison in comparisons),
+        benchmarks_version=table.version,
+    )
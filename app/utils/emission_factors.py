@@ -0,0 +1,193 @@
+"""
+Registro de fatores de emissão e motor de cálculo de carbono
+
+Os fatores vêm de um arquivo de dados versionado (kg CO2e por tonelada; para
+energia, por MWh), com um conjunto padrão e conjuntos opcionais por região
+e/ou ano:
+
+    {
+      "version": "2024.1",
+      "factors": {"latao": 2500.0, "agua": 1.0, ...},
+      "sets": [
+        {"region": "BR", "year": 2023, "factors": {"energia": 90.0}}
+      ]
+    }
+
+Cada conjunto pode informar só os materiais que mudam; os demais herdam do
+padrão. O arquivo é compilado uma única vez em uma matriz (conjunto, material),
+e a escolha do conjunto de uma empresa é uma consulta em dicionário:
+(região, ano), depois (região, qualquer ano), depois (qualquer região, ano) e,
+por fim, o conjunto padrão. Regiões não diferenciam maiúsculas.
+
+As funções de carbono deste módulo são as únicas usadas pelos caminhos escalar,
+vetorizado (lote, upload, jobs) e de relatórios (comparação, curvas), então os
+valores de carbono de um mesmo material são idênticos em todas as rotas.
+"""
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.schemas.sustainability import MaterialType
+
+
+DEFAULT_EMISSION_FACTORS_FILE = Path(__file__).resolve().parent.parent / "data" / "emission_factors.json"
+
+# Mesma ordem de `MATERIAL_INDEX` das tabelas de benchmarks
+_MATERIAL_POSITION = {material: i for i, material in enumerate(MaterialType)}
+
+# (região, ano); o conjunto padrão é sempre o primeiro, (None, None)
+FactorSetKey = Tuple[Optional[str], Optional[int]]
+DEFAULT_SET: FactorSetKey = (None, None)
+
+
+def _set_key(region: Optional[str], year: Optional[int]) -> FactorSetKey:
+    return (region.upper() if region else None, int(year) if year is not None else None)
+
+
+class EmissionFactorRegistry:
+    """Fatores de emissão compilados em uma matriz (conjunto, material)"""
+
+    __slots__ = ("version", "keys", "values", "fingerprint", "_rows", "_lists")
+
+    def __init__(self, values: np.ndarray, version: str, keys: Optional[Sequence[FactorSetKey]] = None):
+        # Matrizes já somente leitura (ex.: mapeadas do segmento compartilhado) são usadas sem cópia
+        if not (
+            isinstance(values, np.ndarray) and values.dtype == np.float64 and values.ndim == 2
+            and not values.flags.writeable
+        ):
+            values = np.array(values, dtype=np.float64, ndmin=2)
+        keys = [DEFAULT_SET] if keys is None else [_set_key(*key) for key in keys]
+        if values.shape != (len(keys), len(_MATERIAL_POSITION)):
+            raise ValueError(
+                f"Fatores de emissão com formato {values.shape}, esperado ({len(keys)}, {len(_MATERIAL_POSITION)})"
+            )
+        if keys[0] != DEFAULT_SET or len(set(keys)) != len(keys):
+            raise ValueError("Conjuntos de fatores de emissão repetidos ou sem o conjunto padrão em primeiro")
+        if not np.all(values >= 0):
+            raise ValueError("Fatores de emissão inválidos: todos os valores devem ser >= 0")
+        if values.flags.writeable:
+            values.flags.writeable = False
+
+        self.version = version
+        self.keys = keys
+        self.values = values
+        self.fingerprint = hashlib.sha256(
+            version.encode() + json.dumps(keys).encode() + values.tobytes()
+        ).hexdigest()[:16]
+        self._rows: Dict[FactorSetKey, int] = {key: i for i, key in enumerate(keys)}
+        # Linhas como listas de float para o caminho escalar
+        self._lists: List[List[float]] = values.tolist()
+
+    @property
+    def default(self) -> np.ndarray:
+        """Fatores do conjunto padrão, um por material"""
+        return self.values[0]
+
+    def set_index(self, region: Optional[str] = None, year: Optional[int] = None) -> int:
+        """Retorna a linha do conjunto de fatores que vale para a região e o ano"""
+        if region is None and year is None:
+            return 0
+        region, year = _set_key(region, year)
+        rows = self._rows
+        for key in ((region, year), (region, None), (None, year)):
+            index = rows.get(key)
+            if index is not None:
+                return index
+        return 0
+
+    def factors(self, region: Optional[str] = None, year: Optional[int] = None) -> np.ndarray:
+        """Retorna os fatores (um por material) que valem para a região e o ano"""
+        return self.values[self.set_index(region, year)]
+
+    def factor(self, material_type: MaterialType, region: Optional[str] = None, year: Optional[int] = None) -> float:
+        """Retorna o fator de emissão de um material"""
+        return self._lists[self.set_index(region, year)][_MATERIAL_POSITION[material_type]]
+
+    def metadata(self) -> dict:
+        """Versão e chaves dos conjuntos, para reconstruir o registro a partir da matriz"""
+        return {"version": self.version, "sets": [list(key) for key in self.keys]}
+
+    @classmethod
+    def from_metadata(cls, metadata: dict, values: np.ndarray) -> "EmissionFactorRegistry":
+        return cls(values, metadata["version"], [tuple(key) for key in metadata["sets"]])
+
+
+def _factor_row(entries: Dict[str, float], base: Optional[List[float]], source: str) -> List[float]:
+    row = list(base) if base is not None else [None] * len(_MATERIAL_POSITION)
+    for name, value in entries.items():
+        try:
+            row[_MATERIAL_POSITION[MaterialType(name)]] = float(value)
+        except ValueError as e:
+            raise ValueError(f"Fator de emissão inválido em {source}: {name}={value!r} ({e})") from e
+    missing = [material.value for material, i in _MATERIAL_POSITION.items() if row[i] is None]
+    if missing:
+        raise ValueError(f"Fator de emissão ausente em {source}: {', '.join(missing)}")
+    return row
+
+
+def load_emission_factors(path: Optional[str] = None) -> EmissionFactorRegistry:
+    """
+    Carrega e compila o registro de fatores de emissão a partir de um arquivo JSON
+
+    Args:
+        path: Caminho do arquivo; se omitido, usa `settings.EMISSION_FACTORS_FILE`
+            ou o arquivo padrão do pacote
+
+    Returns:
+        Registro compilado
+    """
+    path = Path(path or settings.EMISSION_FACTORS_FILE or DEFAULT_EMISSION_FACTORS_FILE)
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+
+    default = _factor_row(data.get("factors", {}), None, str(path))
+    keys = [DEFAULT_SET]
+    rows = [default]
+    for entry in data.get("sets", []):
+        key = _set_key(entry.get("region"), entry.get("year"))
+        if key == DEFAULT_SET:
+            raise ValueError(f"Conjunto de fatores sem região nem ano em {path}")
+        keys.append(key)
+        rows.append(_factor_row(entry.get("factors", {}), default, f"{path} ({key[0]}, {key[1]})"))
+
+    return EmissionFactorRegistry(np.array(rows, dtype=np.float64), str(data.get("version", "")), keys)
+
+
+def carbon_reduction(quantity: float, excellent: float, is_eco: bool, factor: float) -> Optional[float]:
+    """
+    Redução de carbono (kg CO2e) de um material abaixo do threshold excelente
+
+    Returns:
+        Redução, ou `None` se o uso não é eficiente ou não fica abaixo do threshold
+    """
+    if is_eco:
+        excess_over_excellent = quantity - excellent
+        if excess_over_excellent < 0:
+            return abs(excess_over_excellent) * factor
+    return None
+
+
+def carbon_reduction_array(
+    quantity: np.ndarray,
+    excellent: np.ndarray,
+    is_eco: np.ndarray,
+    carbon_factor: np.ndarray,
+) -> np.ndarray:
+    """
+    Versão vetorizada de `carbon_reduction`
+
+    Linhas sem redução (não eficientes ou acima do threshold excelente)
+    recebem NaN, equivalente ao `None` do caminho escalar.
+    """
+    excess_over_excellent = np.asarray(quantity, dtype=np.float64) - excellent
+    reduction = np.abs(excess_over_excellent) * carbon_factor
+    return np.where(is_eco & (excess_over_excellent < 0), reduction, np.nan)
+
+
+def emissions_array(quantity: np.ndarray, carbon_factor: np.ndarray) -> np.ndarray:
+    """Emissões (kg CO2e) de cada linha: quantidade × fator de emissão"""
+    return np.asarray(quantity, dtype=np.float64) * carbon_factor
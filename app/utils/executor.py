@@ -0,0 +1,327 @@
+"""
+Camada de execução das análises
+
+Requests pequenos rodam no threadpool do próprio worker; payloads acima de
+`PROCESS_POOL_THRESHOLD` materiais são enviados a um `ProcessPoolExecutor`,
+para que não segurem o GIL do processo que atende os demais requests.
+
+As tarefas recebem a tabela de benchmarks ativa como um pequeno array; cada
+processo do pool só recompila a tabela quando a versão muda.
+
+O pool é aquecido em segundo plano: o worker atende requests logo após o
+startup, e payloads grandes rodam no threadpool até todos os processos
+estarem prontos.
+"""
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, Callable, List, Optional, Tuple
+
+import numpy as np
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.schemas.sustainability import (
+    CompanyData,
+    CompanySize,
+    MaterialType,
+    MaterialUsage,
+    OptimizationItem,
+    SustainabilityCalculationRequest,
+)
+from app.utils.benchmarks import BenchmarkTable, get_benchmark_table
+from app.utils.comparison import compare_materials
+from app.utils.emission_factors import EmissionFactorRegistry
+from app.utils.formats import ROW_MEDIA_TYPES, batch_table, encode_columnar, encode_rows
+from app.utils.serialization import dump_json, render_analysis, render_batch, render_comparison
+from app.utils.optimizer import optimize_reductions
+from app.utils.sustainability import evaluate_sustainability
+from app.utils.sweep import sweep_curves
+from app.utils.targets import target_quantities
+from app.utils.uncertainty import Chunk, simulate_uncertainty, summarize_uncertainty
+from app.utils.vectorized import analyze_batch
+
+
+TableSpec = Tuple[str, str, np.ndarray, EmissionFactorRegistry]
+
+# Tabela compilada dentro de cada processo do pool
+_worker_table: Optional[BenchmarkTable] = None
+
+
+def _init_worker() -> None:
+    """Pré-carrega os módulos e a tabela de benchmarks no processo do pool"""
+    global _worker_table
+    _worker_table = get_benchmark_table()
+
+
+def _warmup() -> bool:
+    return _worker_table is not None
+
+
+def _table_from_spec(spec: TableSpec) -> BenchmarkTable:
+    global _worker_table
+    fingerprint, version, values, emission_factors = spec
+    if _worker_table is None or _worker_table.fingerprint != fingerprint:
+        _worker_table = BenchmarkTable(values, version, emission_factors)
+    return _worker_table
+
+
+def _call_with_table(spec: TableSpec, fn: Callable, args: tuple) -> Any:
+    return fn(*args, table=_table_from_spec(spec))
+
+
+def encode_analysis_task(
+    company: CompanyData,
+    proposed_materials: List[MaterialUsage],
+    compact: bool,
+    media_type: str,
+    locale: str,
+    table: BenchmarkTable
+) -> bytes:
+    """Analisa uma empresa e retorna a resposta em JSON ou MessagePack, com as mensagens em `locale`"""
+    result = evaluate_sustainability(company, proposed_materials, table)
+    return encode_rows(render_analysis(result, compact=compact, table=table, locale=locale), media_type)
+
+
+def encode_batch_task(
+    items: List[SustainabilityCalculationRequest],
+    compact: bool,
+    media_type: str,
+    with_json: bool,
+    locale: str,
+    table: BenchmarkTable
+) -> Tuple[bytes, Optional[bytes]]:
+    """
+    Analisa um lote de empresas e retorna a resposta no formato pedido, com as mensagens em `locale`
+
+    Returns:
+        (corpo, JSON do lote para o histórico). Nos formatos por linha o
+        próprio corpo serve ao histórico; nos colunares o JSON só é gerado
+        com `with_json`.
+    """
+    results = analyze_batch(items, table)
+    if media_type in ROW_MEDIA_TYPES:
+        body = encode_rows(render_batch(results, compact=compact, table=table, locale=locale), media_type)
+        return body, body
+    body = encode_columnar(batch_table(results, table, locale), media_type)
+    return body, dump_json(render_batch(results, table=table)) if with_json else None
+
+
+def render_comparison_task(
+    company: CompanyData,
+    current_materials: List[MaterialUsage],
+    proposed_materials: List[MaterialUsage],
+    table: BenchmarkTable
+) -> bytes:
+    """Compara o consumo atual com o proposto e retorna o JSON da resposta"""
+    return dump_json(render_comparison(compare_materials(company, current_materials, proposed_materials, table)))
+
+
+def render_targets_task(
+    company: CompanyData,
+    proposed_materials: List[MaterialUsage],
+    targets: List[float],
+    table: BenchmarkTable
+) -> bytes:
+    """Calcula as quantidades para os scores alvo e retorna o JSON da resposta"""
+    return dump_json(target_quantities(company, proposed_materials, targets, table))
+
+
+def render_sweep_task(
+    company_size: CompanySize,
+    materials: Optional[List[MaterialType]],
+    min_quantity: float,
+    max_quantity: Optional[float],
+    points: int,
+    breakpoints_only: bool,
+    table: BenchmarkTable
+) -> bytes:
+    """Avalia as curvas de eficiência e carbono e retorna o JSON da resposta"""
+    return dump_json(
+        sweep_curves(company_size, materials, min_quantity, max_quantity, points, breakpoints_only, table)
+    )
+
+
+def render_optimization_task(items: List[OptimizationItem], table: BenchmarkTable) -> bytes:
+    """Otimiza o orçamento de redução de cada empresa e retorna o JSON da resposta"""
+    return dump_json(optimize_reductions(items, table))
+
+
+def render_uncertainty_task(
+    company: CompanyData,
+    proposed_materials: List[MaterialUsage],
+    samples: int,
+    percentiles: List[float],
+    seed: Optional[int],
+    table: BenchmarkTable
+) -> bytes:
+    """Executa a simulação de incerteza e retorna o JSON da resposta"""
+    return dump_json(simulate_uncertainty(company, proposed_materials, samples, percentiles, seed, table))
+
+
+def render_uncertainty_chunks_task(
+    proposed_materials: List[MaterialUsage],
+    seed: int,
+    percentiles: List[float],
+    chunks: List[Chunk],
+    table: BenchmarkTable
+) -> bytes:
+    """Junta blocos de amostras já avaliados e retorna o JSON da resposta"""
+    return dump_json(summarize_uncertainty(proposed_materials, seed, percentiles, chunks, table))
+
+
+class AnalysisExecutor:
+    """Despacha análises para o threadpool ou para o pool de processos conforme o tamanho"""
+
+    def __init__(self, workers: int, threshold: int):
+        self.workers = workers
+        self.threshold = threshold
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._warmups: List[Future] = []
+        self._restart_lock = threading.Lock()
+
+    @property
+    def started(self) -> bool:
+        return self._pool is not None
+
+    @property
+    def ready(self) -> bool:
+        """Pool criado e com todos os processos já carregados"""
+        if self._pool is None:
+            return False
+        if self._warmups:
+            if not all(future.done() for future in self._warmups):
+                return False
+            errors = [future.exception() for future in self._warmups if future.exception() is not None]
+            self._warmups = []
+            if errors:
+                self._unavailable(errors[0], wait=False)
+                return False
+        return True
+
+    def start(self, wait: bool = False) -> None:
+        """
+        Cria o pool e dispara o carregamento dos benchmarks em cada processo
+
+        Args:
+            wait: Aguardar todos os processos ficarem prontos
+        """
+        if self.workers <= 0 or self._pool is not None:
+            return
+        try:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+            self._warmups = [self._pool.submit(_warmup) for _ in range(self.workers)]
+            if wait:
+                for future in self._warmups:
+                    future.result()
+        except (BrokenProcessPool, OSError) as e:
+            self._unavailable(e)
+
+    def _unavailable(self, error: BaseException, wait: bool = True) -> None:
+        # Sem pool, todas as análises continuam rodando no threadpool
+        print(f"⚠️ Pool de processos indisponível, executando análises localmente: {error}")
+        self.shutdown(wait=wait)
+
+    def _restart(self, broken: ProcessPoolExecutor) -> None:
+        """
+        Troca um pool quebrado (um processo morreu) por um novo
+
+        Vários requests podem ver o mesmo pool quebrar: só o primeiro o
+        encerra e recria; os demais encontram o pool já trocado.
+        """
+        with self._restart_lock:
+            if self._pool is not broken:
+                return
+            broken.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            self._warmups = []
+            self.start()
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Encerra o pool de processos"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+            self._pool = None
+            self._warmups = []
+
+    async def run(self, fn: Callable, *args: Any, size: int, table: Optional[BenchmarkTable] = None) -> Any:
+        """
+        Executa `fn(*args, table=table)` no lugar adequado
+
+        Args:
+            fn: Função de nível de módulo (precisa ser serializável por pickle)
+            size: Tamanho do payload, em materiais
+            table: Tabela de benchmarks (padrão: tabela ativa)
+        """
+        table = table or get_benchmark_table()
+        if size < self.threshold or not self.ready:
+            return await run_in_threadpool(partial(fn, *args, table=table))
+
+        pool = self._pool
+        spec = (table.fingerprint, table.version, table.values, table.emission_factors)
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(pool, _call_with_table, spec, fn, args)
+        except BrokenProcessPool:
+            # Um processo morreu: recria o pool e atende este request no próprio worker
+            await run_in_threadpool(self._restart, pool)
+            return await run_in_threadpool(partial(fn, *args, table=table))
+
+    def call(self, fn: Callable, *args: Any, size: int, table: Optional[BenchmarkTable] = None) -> Any:
+        """
+        Versão síncrona de `run`, para threads fora do event loop (ex.: jobs)
+
+        Args:
+            fn: Função de nível de módulo (precisa ser serializável por pickle)
+            size: Tamanho do payload, em materiais
+            table: Tabela de benchmarks (padrão: tabela ativa)
+        """
+        table = table or get_benchmark_table()
+        pool = self._pool
+        if size < self.threshold or pool is None or not self.ready:
+            return fn(*args, table=table)
+
+        spec = (table.fingerprint, table.version, table.values, table.emission_factors)
+        try:
+            return pool.submit(_call_with_table, spec, fn, args).result()
+        except BrokenProcessPool:
+            self._restart(pool)
+            return fn(*args, table=table)
+
+    async def map(self, fn: Callable, calls: List[tuple], table: Optional[BenchmarkTable] = None) -> List[Any]:
+        """
+        Executa `fn(*args, table=table)` para cada item de `calls`
+
+        Com o pool pronto, as chamadas são distribuídas entre os processos e
+        rodam em paralelo; sem ele, rodam em sequência no threadpool.
+
+        Returns:
+            Resultados na ordem de `calls`
+        """
+        table = table or get_benchmark_table()
+        if not self.ready:
+            return await run_in_threadpool(lambda: [fn(*args, table=table) for args in calls])
+
+        pool = self._pool
+        spec = (table.fingerprint, table.version, table.values, table.emission_factors)
+        loop = asyncio.get_running_loop()
+        try:
+            return list(await asyncio.gather(*(
+                loop.run_in_executor(pool, _call_with_table, spec, fn, args) for args in calls
+            )))
+        except BrokenProcessPool:
+            await run_in_threadpool(self._restart, pool)
+            return await run_in_threadpool(lambda: [fn(*args, table=table) for args in calls])
+
+
+analysis_executor = AnalysisExecutor(
+    workers=settings.PROCESS_POOL_WORKERS,
+    threshold=settings.PROCESS_POOL_THRESHOLD,
+)
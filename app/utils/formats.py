@@ -0,0 +1,234 @@
+"""
+Formatos de resposta negociados pelo cabeçalho `Accept`
+
+- `application/json` (padrão)
+- `application/msgpack`: mesma estrutura do JSON, em MessagePack (requer `msgpack`)
+- `application/vnd.apache.arrow.stream` e `application/vnd.apache.parquet`:
+  resultados em lote em colunas, uma linha por (empresa, material)
+  (requer `pyarrow`)
+
+As dependências são opcionais e importadas no primeiro uso; um formato
+indisponível simplesmente não é oferecido, e um `Accept` que não aceita
+nenhum dos formatos oferecidos recebe 406.
+
+O layout colunar pode ser lido sem cópia pelo cliente, por exemplo
+`pyarrow.ipc.open_stream(body).read_all().to_pandas()`. Colunas repetitivas
+(tipos, tamanhos, recomendações) usam dictionary encoding; as colunas da
+empresa (`overall_*`, `company_*`) se repetem em cada material. Empresas sem
+materiais não geram linhas, e as melhorias não são incluídas (cada material
+com `is_eco_efficient` falso corresponde a uma).
+"""
+import importlib
+from functools import lru_cache
+from typing import Any, List, Optional, Sequence, Tuple
+
+from app.models.analysis import AnalysisResult
+from app.utils.benchmarks import BenchmarkTable, get_benchmark_table
+from app.utils.messages import CODES_ONLY, DEFAULT_LOCALE, Message, render_message
+from app.utils.serialization import dump_json
+
+
+MEDIA_JSON = "application/json"
+MEDIA_MSGPACK = "application/msgpack"
+MEDIA_ARROW = "application/vnd.apache.arrow.stream"
+MEDIA_PARQUET = "application/vnd.apache.parquet"
+
+# Nomes alternativos usados por alguns clientes
+MEDIA_ALIASES = {
+    "application/x-msgpack": MEDIA_MSGPACK,
+    "application/vnd.msgpack": MEDIA_MSGPACK,
+    "application/x-parquet": MEDIA_PARQUET,
+}
+
+ROW_MEDIA_TYPES = (MEDIA_JSON, MEDIA_MSGPACK)
+BATCH_MEDIA_TYPES = (MEDIA_JSON, MEDIA_MSGPACK, MEDIA_ARROW, MEDIA_PARQUET)
+
+_REQUIREMENTS = {
+    MEDIA_MSGPACK: "msgpack",
+    MEDIA_ARROW: "pyarrow",
+    MEDIA_PARQUET: "pyarrow.parquet",
+}
+
+
+@lru_cache(maxsize=None)
+def optional_module(name: str) -> Optional[Any]:
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+
+
+def is_available(media_type: str) -> bool:
+    """Verifica se a dependência opcional do formato está instalada"""
+    requirement = _REQUIREMENTS.get(media_type)
+    return requirement is None or optional_module(requirement) is not None
+
+
+def _parse_accept(accept: str) -> List[Tuple[str, float]]:
+    ranges = []
+    for part in accept.split(","):
+        media_range, *params = [piece.strip() for piece in part.split(";")]
+        if not media_range:
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        media_range = media_range.lower()
+        ranges.append((MEDIA_ALIASES.get(media_range, media_range), quality))
+    return ranges
+
+
+def negotiate(accept: Optional[str], offered: Sequence[str]) -> Optional[str]:
+    """
+    Escolhe o formato da resposta
+
+    Args:
+        accept: Cabeçalho `Accept` do request
+        offered: Formatos oferecidos pelo endpoint, em ordem de preferência
+
+    Returns:
+        Formato escolhido, ou `None` se nenhum formato disponível é aceito
+    """
+    available = [media_type for media_type in offered if is_available(media_type)]
+    if not accept or not accept.strip():
+        return available[0]
+
+    ranges = _parse_accept(accept)
+    best, best_quality = None, 0.0
+    for media_type in available:
+        main_type = media_type.split("/")[0]
+        # O intervalo mais específico que casa com o formato define a qualidade
+        quality, specificity = 0.0, -1
+        for media_range, range_quality in ranges:
+            if media_range == media_type:
+                level = 2
+            elif media_range == f"{main_type}/*":
+                level = 1
+            elif media_range == "*/*":
+                level = 0
+            else:
+                continue
+            if level > specificity:
+                quality, specificity = range_quality, level
+        if quality > best_quality:
+            best, best_quality = media_type, quality
+    return best
+
+
+def not_acceptable_detail(offered: Sequence[str]) -> str:
+    """Mensagem do 406 com os formatos disponíveis"""
+    available = [media_type for media_type in offered if is_available(media_type)]
+    return "Formato não disponível. Aceitos: " + ", ".join(available)
+
+
+def pack_msgpack(content: Any) -> bytes:
+    """Serializa uma estrutura JSON em MessagePack"""
+    return optional_module("msgpack").packb(content, use_bin_type=True)
+
+
+def unpack_msgpack(body: bytes) -> Any:
+    """Decodifica um corpo MessagePack"""
+    return optional_module("msgpack").unpackb(body, raw=False)
+
+
+def encode_rows(content: Any, media_type: str) -> bytes:
+    """Serializa uma estrutura JSON em JSON ou MessagePack"""
+    if media_type == MEDIA_MSGPACK:
+        return pack_msgpack(content)
+    return dump_json(content)
+
+
+def batch_table(
+    results: List[AnalysisResult],
+    table: Optional[BenchmarkTable] = None,
+    locale: str = DEFAULT_LOCALE
+):
+    """
+    Monta uma tabela Arrow com uma linha por (empresa, material)
+
+    Args:
+        results: Análises do lote
+        table: Tabela de benchmarks usada (padrão: tabela ativa)
+        locale: Idioma das recomendações; com `CODES_ONLY`, as colunas de
+            recomendação trazem só os códigos
+
+    Returns:
+        `pyarrow.Table`, com a versão dos benchmarks nos metadados do schema
+    """
+    pa = optional_module("pyarrow")
+    table = table or get_benchmark_table()
+    if locale == CODES_ONLY:
+        def message_text(message: Message) -> str:
+            return message.code
+    else:
+        def message_text(message: Message) -> str:
+            return render_message(message, locale)
+
+    company_index, employees, overall_score, potential_savings = [], [], [], []
+    company_size, industry, overall_recommendation, company_is_eco = [], [], [], []
+    material_type, quantity, is_eco, efficiency, carbon, recommendation = [], [], [], [], [], []
+    recommended_max, average_usage, excellent_threshold = [], [], []
+
+    for i, result in enumerate(results):
+        company = result.company
+        for material in result.materials_analysis:
+            company_index.append(i)
+            company_size.append(company.size.value)
+            employees.append(company.employees)
+            industry.append(company.industry)
+            overall_score.append(result.overall_score)
+            overall_recommendation.append(message_text(result.overall_recommendation))
+            company_is_eco.append(result.is_eco_efficient)
+            potential_savings.append(result.potential_savings)
+
+            benchmark = material.benchmark
+            material_type.append(material.material_type.value)
+            quantity.append(material.proposed_quantity)
+            recommended_max.append(benchmark.recommended_max)
+            average_usage.append(benchmark.average_usage)
+            excellent_threshold.append(benchmark.excellent_threshold)
+            is_eco.append(material.is_eco_efficient)
+            efficiency.append(material.efficiency_percentage)
+            carbon.append(material.carbon_footprint_reduction)
+            recommendation.append(message_text(material.recommendation))
+
+    def strings(values: list):
+        return pa.array(values, pa.string()).dictionary_encode()
+
+    columns = {
+        "company_index": pa.array(company_index, pa.int32()),
+        "company_size": strings(company_size),
+        "company_employees": pa.array(employees, pa.int64()),
+        "company_industry": strings(industry),
+        "material_type": strings(material_type),
+        "proposed_quantity": pa.array(quantity, pa.float64()),
+        "recommended_max": pa.array(recommended_max, pa.float64()),
+        "average_usage": pa.array(average_usage, pa.float64()),
+        "excellent_threshold": pa.array(excellent_threshold, pa.float64()),
+        "is_eco_efficient": pa.array(is_eco, pa.bool_()),
+        "efficiency_percentage": pa.array(efficiency, pa.float64()),
+        "carbon_footprint_reduction": pa.array(carbon, pa.float64()),
+        "recommendation": strings(recommendation),
+        "overall_score": pa.array(overall_score, pa.float64()),
+        "overall_recommendation": strings(overall_recommendation),
+        "overall_is_eco_efficient": pa.array(company_is_eco, pa.bool_()),
+        "potential_savings": pa.array(potential_savings, pa.float64()),
+    }
+    return pa.table(columns, metadata={"benchmarks_version": table.version})
+
+
+def encode_columnar(arrow_table, media_type: str) -> bytes:
+    """Serializa uma tabela Arrow como stream IPC ou Parquet"""
+    pa = optional_module("pyarrow")
+    sink = pa.BufferOutputStream()
+    if media_type == MEDIA_PARQUET:
+        optional_module("pyarrow.parquet").write_table(arrow_table, sink)
+    else:
+        with optional_module("pyarrow.ipc").new_stream(sink, arrow_table.schema) as writer:
+            writer.write_table(arrow_table)
+    return sink.getvalue().to_pybytes()
@@ -0,0 +1,476 @@
+"""
+Histórico persistente das análises
+
+Cada análise atendida (request e resposta) é gravada em `DATABASE_URL`.
+O caminho do request apenas enfileira o que já tem em mãos (os requests
+validados e os bytes da resposta); uma thread em segundo plano decodifica as
+entradas e as insere em lotes, em uma única transação por lote.
+
+Na mesma transação são atualizadas as tabelas de agregados (rollups) por
+tamanho de empresa, setor, tipo de material e dia, então as consultas de
+dashboard leem poucas linhas já somadas em vez de varrer o histórico.
+
+A fila é limitada: se o banco não acompanhar, novas entradas são descartadas
+e contabilizadas em `analysis_history_records_total{result="dropped"}`, em vez
+de atrasar as respostas.
+
+URLs `sqlite:///caminho.db` usam o `sqlite3` da biblioteca padrão; outras URLs
+exigem o SQLAlchemy instalado. Os rollups são somados com o upsert do dialeto
+(PostgreSQL, SQLite e MySQL), atômico mesmo com vários workers gravando as
+mesmas chaves; nos demais bancos, o lote é repetido se outro worker inserir a
+mesma chave ao mesmo tempo.
+"""
+import importlib
+import json
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.config import settings
+from app.schemas.sustainability import HistoryDimension, SustainabilityCalculationRequest
+from app.utils.formats import MEDIA_JSON, MEDIA_MSGPACK, unpack_msgpack
+from app.utils.metrics import CallbackMetric, Counter
+from app.utils.serialization import dump_json
+
+
+# Formato do corpo da resposta enfileirada
+HISTORY_SINGLE = 0  # uma análise (`/analyze`)
+HISTORY_BATCH = 1   # {"results": [...]} (`/analyze/batch`)
+HISTORY_NDJSON = 2  # linhas {"line": n, "analysis": ...} (`/analyze/stream`)
+
+HistoryRow = Tuple[float, str, int, str, float, int, str, str]
+# (tipo de material, é eficiente) de cada material da análise
+MaterialFlags = List[Tuple[str, bool]]
+# (dimensão, chave) -> [análises, soma dos scores, materiais, materiais não eficientes]
+Rollups = Dict[Tuple[str, str], List[float]]
+
+_COLUMNS = (
+    "created_at", "company_size", "employees", "industry",
+    "overall_score", "is_eco_efficient", "request", "result",
+)
+
+HISTORY_RECORDS = Counter(
+    "analysis_history_records_total", "Análises enviadas ao histórico por resultado", ("result",)
+)
+_WRITTEN = HISTORY_RECORDS.labels("written")
+_DROPPED = HISTORY_RECORDS.labels("dropped")
+_FAILED = HISTORY_RECORDS.labels("failed")
+
+_ROLLUP_COLUMNS = ("analyses", "score_sum", "materials", "non_eco_materials")
+
+# Dialetos do SQLAlchemy com upsert (módulo de `insert`)
+_UPSERT_DIALECTS = {"postgresql": "postgresql", "sqlite": "sqlite", "mysql": "mysql", "mariadb": "mysql"}
+# Tentativas de um lote quando outro worker insere a mesma chave de rollup (bancos sem upsert)
+_WRITE_ATTEMPTS = 3
+
+
+class SQLiteHistoryBackend:
+    """Grava o histórico em um arquivo SQLite"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+    def connection(self) -> sqlite3.Connection:
+        """Conexão da thread atual (criada e reaproveitada por thread)"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def create_schema(self) -> None:
+        self.connection().execute(
+            "CREATE TABLE IF NOT EXISTS analysis_history ("
+            "id INTEGER PRIMARY KEY, created_at REAL NOT NULL, company_size TEXT NOT NULL, "
+            "employees INTEGER NOT NULL, industry TEXT NOT NULL, overall_score REAL NOT NULL, "
+            "is_eco_efficient INTEGER NOT NULL, request TEXT NOT NULL, result TEXT NOT NULL)"
+        )
+        self.connection().execute(
+            "CREATE INDEX IF NOT EXISTS ix_analysis_history_created_at ON analysis_history (created_at)"
+        )
+        # A chave primária (dimensão, chave) é o índice das consultas de agregados
+        self.connection().execute(
+            "CREATE TABLE IF NOT EXISTS analysis_rollup ("
+            "dimension TEXT NOT NULL, key TEXT NOT NULL, analyses INTEGER NOT NULL, "
+            "score_sum REAL NOT NULL, materials INTEGER NOT NULL, non_eco_materials INTEGER NOT NULL, "
+            "PRIMARY KEY (dimension, key)) WITHOUT ROWID"
+        )
+
+    def write(self, rows: Sequence[HistoryRow], rollups: Rollups) -> None:
+        connection = self.connection()
+        with connection:
+            connection.execute("BEGIN")
+            connection.executemany(
+                f"INSERT INTO analysis_history ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})",
+                rows
+            )
+            connection.executemany(
+                "INSERT INTO analysis_rollup (dimension, key, analyses, score_sum, materials, non_eco_materials) "
+                "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (dimension, key) DO UPDATE SET "
+                "analyses = analyses + excluded.analyses, score_sum = score_sum + excluded.score_sum, "
+                "materials = materials + excluded.materials, "
+                "non_eco_materials = non_eco_materials + excluded.non_eco_materials",
+                [(dimension, key, *totals) for (dimension, key), totals in rollups.items()]
+            )
+
+    def aggregates(
+        self,
+        dimension: HistoryDimension,
+        start: Optional[str] = None,
+        end: Optional[str] = None
+    ) -> List[tuple]:
+        sql = f"SELECT key, {', '.join(_ROLLUP_COLUMNS)} FROM analysis_rollup WHERE dimension = ?"
+        params: list = [dimension.value]
+        if start is not None:
+            sql += " AND key >= ?"
+            params.append(start)
+        if end is not None:
+            sql += " AND key <= ?"
+            params.append(end)
+        return self.connection().execute(sql + " ORDER BY key", params).fetchall()
+
+    def count(self) -> int:
+        return self.connection().execute("SELECT COUNT(*) FROM analysis_history").fetchone()[0]
+
+
+class SQLAlchemyHistoryBackend:
+    """Grava o histórico em qualquer banco suportado pelo SQLAlchemy"""
+
+    def __init__(self, url: str):
+        try:
+            import sqlalchemy as sa
+        except ImportError as e:
+            raise RuntimeError(f"DATABASE_URL {url!r} requer o pacote sqlalchemy") from e
+
+        self._sa = sa
+        self.engine = sa.create_engine(url, pool_pre_ping=True)
+        self.metadata = sa.MetaData()
+        self.table = sa.Table(
+            "analysis_history",
+            self.metadata,
+            sa.Column("id", sa.Integer, primary_key=True),
+            sa.Column("created_at", sa.Float, nullable=False, index=True),
+            sa.Column("company_size", sa.String(16), nullable=False),
+            sa.Column("employees", sa.Integer, nullable=False),
+            sa.Column("industry", sa.String(255), nullable=False),
+            sa.Column("overall_score", sa.Float, nullable=False),
+            sa.Column("is_eco_efficient", sa.Integer, nullable=False),
+            sa.Column("request", sa.Text, nullable=False),
+            sa.Column("result", sa.Text, nullable=False),
+        )
+        self.rollup = sa.Table(
+            "analysis_rollup",
+            self.metadata,
+            sa.Column("dimension", sa.String(16), primary_key=True),
+            sa.Column("key", sa.String(255), primary_key=True),
+            sa.Column("analyses", sa.Integer, nullable=False),
+            sa.Column("score_sum", sa.Float, nullable=False),
+            sa.Column("materials", sa.Integer, nullable=False),
+            sa.Column("non_eco_materials", sa.Integer, nullable=False),
+        )
+
+    def create_schema(self) -> None:
+        self.metadata.create_all(self.engine)
+
+    def write(self, rows: Sequence[HistoryRow], rollups: Rollups) -> None:
+        for attempt in range(_WRITE_ATTEMPTS):
+            try:
+                with self.engine.begin() as connection:
+                    connection.execute(self.table.insert(), [dict(zip(_COLUMNS, row)) for row in rows])
+                    self._add_rollups(connection, rollups)
+                return
+            except self._sa.exc.IntegrityError:
+                # Só sem upsert: outro worker inseriu a mesma chave; a transação inteira é repetida
+                if self._upsert is not None or attempt == _WRITE_ATTEMPTS - 1:
+                    raise
+
+    @property
+    def _upsert(self) -> Optional[Any]:
+        module = _UPSERT_DIALECTS.get(self.engine.dialect.name)
+        return importlib.import_module(f"sqlalchemy.dialects.{module}").insert if module else None
+
+    def _add_rollups(self, connection: Any, rollups: Rollups) -> None:
+        if not rollups:
+            return
+        sa = self._sa
+        rollup = self.rollup
+        values = [
+            {"dimension": dimension, "key": key, **dict(zip(_ROLLUP_COLUMNS, totals))}
+            for (dimension, key), totals in rollups.items()
+        ]
+        insert = self._upsert
+        if insert is None:
+            for row in values:
+                updated = connection.execute(
+                    sa.update(rollup)
+                    .where(rollup.c.dimension == row["dimension"], rollup.c.key == row["key"])
+                    .values({name: rollup.c[name] + row[name] for name in _ROLLUP_COLUMNS})
+                )
+                if updated.rowcount == 0:
+                    connection.execute(rollup.insert().values(**row))
+            return
+
+        statement = insert(rollup)
+        if self.engine.dialect.name in ("mysql", "mariadb"):
+            statement = statement.on_duplicate_key_update(
+                {name: rollup.c[name] + statement.inserted[name] for name in _ROLLUP_COLUMNS}
+            )
+        else:
+            statement = statement.on_conflict_do_update(
+                index_elements=[rollup.c.dimension, rollup.c.key],
+                set_={name: rollup.c[name] + statement.excluded[name] for name in _ROLLUP_COLUMNS},
+            )
+        connection.execute(statement, values)
+
+    def aggregates(
+        self,
+        dimension: HistoryDimension,
+        start: Optional[str] = None,
+        end: Optional[str] = None
+    ) -> List[tuple]:
+        sa = self._sa
+        rollup = self.rollup
+        query = sa.select(rollup.c.key, *(rollup.c[name] for name in _ROLLUP_COLUMNS)).where(
+            rollup.c.dimension == dimension.value
+        )
+        if start is not None:
+            query = query.where(rollup.c.key >= start)
+        if end is not None:
+            query = query.where(rollup.c.key <= end)
+        with self.engine.connect() as connection:
+            return [tuple(row) for row in connection.execute(query.order_by(rollup.c.key))]
+
+    def count(self) -> int:
+        with self.engine.connect() as connection:
+            return connection.execute(
+                self._sa.select(self._sa.func.count()).select_from(self.table)
+            ).scalar_one()
+
+
+def create_history_backend(url: str):
+    """
+    Cria o backend adequado para a URL
+
+    Args:
+        url: `sqlite:///caminho.db` ou qualquer URL do SQLAlchemy
+
+    Returns:
+        Backend com o schema já criado
+    """
+    if url.startswith("sqlite:///"):
+        backend = SQLiteHistoryBackend(url[len("sqlite:///"):])
+    else:
+        backend = SQLAlchemyHistoryBackend(url)
+    backend.create_schema()
+    return backend
+
+
+def history_rows(
+    created_at: float,
+    kind: int,
+    requests: List[SustainabilityCalculationRequest],
+    body: bytes,
+    media_type: str = MEDIA_JSON
+) -> List[Tuple[HistoryRow, MaterialFlags]]:
+    """
+    Decodifica uma entrada da fila em linhas do histórico
+
+    Args:
+        created_at: Momento em que a análise foi atendida
+        kind: Formato do corpo (`HISTORY_SINGLE`, `HISTORY_BATCH` ou `HISTORY_NDJSON`)
+        requests: Requests analisados, na ordem das análises do corpo (com
+            `HISTORY_NDJSON`, um por linha do corpo, `None` nas linhas de erro,
+            e podem vir como a linha JSON bruta, validada só aqui)
+        body: Corpo da resposta enviada ao cliente
+        media_type: Formato do corpo (JSON ou MessagePack, com a mesma estrutura)
+
+    Returns:
+        Pares (linha do histórico, materiais da análise)
+    """
+    if media_type == MEDIA_MSGPACK:
+        content = unpack_msgpack(body)
+        analyses = [content] if kind == HISTORY_SINGLE else content["results"]
+        results = [dump_json(analysis).decode() for analysis in analyses]
+    elif kind == HISTORY_SINGLE:
+        analyses = [json.loads(body)]
+        results = [body.decode()]
+    else:
+        if kind == HISTORY_BATCH:
+            analyses = json.loads(body)["results"]
+        else:
+            # Uma linha por entrada do bloco, e `None` nas entradas sem request;
+            # linhas de erro (inclusive de análises que falharam) não vão para o histórico
+            lines = (json.loads(line) for line in body.splitlines() if line)
+            pairs = [
+                (request, line["analysis"])
+                for request, line in zip(requests, lines)
+                if request is not None and "analysis" in line
+            ]
+            requests = [
+                SustainabilityCalculationRequest.model_validate_json(request) if isinstance(request, bytes) else request
+                for request, _ in pairs
+            ]
+            analyses = [analysis for _, analysis in pairs]
+        results = [dump_json(analysis).decode() for analysis in analyses]
+
+    return [
+        (
+            (
+                created_at,
+                request.company.size.value,
+                request.company.employees,
+                request.company.industry,
+                analysis["overall_score"],
+                int(analysis["is_eco_efficient"]),
+                request.model_dump_json(),
+                result,
+            ),
+            [(material["material_type"], material["is_eco_efficient"]) for material in analysis["materials_analysis"]],
+        )
+        for request, analysis, result in zip(requests, analyses, results)
+    ]
+
+
+def rollup_deltas(records: List[Tuple[HistoryRow, MaterialFlags]]) -> Rollups:
+    """
+    Soma os incrementos dos agregados de um lote de linhas
+
+    Nas dimensões de empresa e dia cada análise conta uma vez; na dimensão de
+    material, cada material conta uma vez com o score da sua análise.
+    """
+    rollups: Rollups = {}
+
+    def add(dimension: HistoryDimension, key: str, score: float, materials: int, non_eco: int) -> None:
+        totals = rollups.get((dimension.value, key))
+        if totals is None:
+            totals = rollups[(dimension.value, key)] = [0, 0.0, 0, 0]
+        totals[0] += 1
+        totals[1] += score
+        totals[2] += materials
+        totals[3] += non_eco
+
+    for row, flags in records:
+        created_at, company_size, _, industry, score = row[:5]
+        non_eco = sum(1 for _, is_eco in flags if not is_eco)
+        day = time.strftime("%Y-%m-%d", time.gmtime(created_at))
+        add(HistoryDimension.COMPANY_SIZE, company_size, score, len(flags), non_eco)
+        add(HistoryDimension.INDUSTRY, industry, score, len(flags), non_eco)
+        add(HistoryDimension.DAY, day, score, len(flags), non_eco)
+        for material_type, is_eco in flags:
+            add(HistoryDimension.MATERIAL_TYPE, material_type, score, 1, 0 if is_eco else 1)
+
+    return rollups
+
+
+_STOP = object()
+
+
+class HistoryWriter:
+    """Fila limitada com gravação em lotes por uma thread em segundo plano"""
+
+    def __init__(self, max_queue: int, batch_size: int):
+        self.batch_size = batch_size
+        self.backend = None
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def started(self) -> bool:
+        return self._thread is not None
+
+    def start(self, url: str) -> None:
+        """Conecta ao banco e inicia a thread de gravação (URL vazia desabilita)"""
+        if not url or self._thread is not None:
+            return
+        try:
+            self.backend = create_history_backend(url)
+        except (RuntimeError, sqlite3.Error, OSError) as e:
+            print(f"⚠️ Histórico de análises desabilitado: {e}")
+            return
+        self._thread = threading.Thread(target=self._run, name="analysis-history", daemon=True)
+        self._thread.start()
+
+    def record(
+        self,
+        kind: int,
+        requests: List[SustainabilityCalculationRequest],
+        body: bytes,
+        media_type: str = MEDIA_JSON
+    ) -> None:
+        """Enfileira análises atendidas sem esperar pelo banco"""
+        if self._thread is None or not any(request is not None for request in requests):
+            return
+        try:
+            self._queue.put_nowait((time.time(), kind, requests, body, media_type))
+        except queue.Full:
+            _DROPPED.inc(sum(request is not None for request in requests))
+
+    def flush(self) -> None:
+        """Aguarda até que tudo o que foi enfileirado esteja gravado"""
+        if self._thread is not None:
+            self._queue.join()
+
+    def shutdown(self) -> None:
+        """Grava o que estiver na fila e encerra a thread"""
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def _run(self) -> None:
+        while True:
+            items = [self._queue.get()]
+            while len(items) < self.batch_size:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = any(item is _STOP for item in items)
+            entries = [item for item in items if item is not _STOP]
+            try:
+                if entries:
+                    self._write(entries)
+            finally:
+                for _ in items:
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def _write(self, entries: list) -> None:
+        records: List[Tuple[HistoryRow, MaterialFlags]] = []
+        for entry in entries:
+            try:
+                records.extend(history_rows(*entry))
+            except (ValueError, KeyError, TypeError):
+                _FAILED.inc(len(entry[2]))
+        if not records:
+            return
+        rows = [row for row, _ in records]
+        try:
+            self.backend.write(rows, rollup_deltas(records))
+            _WRITTEN.inc(len(rows))
+        except Exception as e:
+            print(f"⚠️ Falha ao gravar histórico de análises: {e}")
+            _FAILED.inc(len(rows))
+
+
+history_writer = HistoryWriter(
+    max_queue=settings.HISTORY_QUEUE_SIZE,
+    batch_size=settings.HISTORY_BATCH_SIZE,
+)
+
+CallbackMetric(
+    "analysis_history_queue_depth",
+    "Entradas aguardando gravação no histórico",
+    (),
+    lambda: {(): history_writer.depth()},
+)
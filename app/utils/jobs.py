@@ -0,0 +1,422 @@
+"""
+Jobs de análise em segundo plano
+
+Planilhas grandes demais para um request síncrono (centenas de milhares de
+linhas, no mesmo formato de `/analyze/upload`) viram jobs: o envio grava a
+planilha em `JOBS_DIR` e retorna um id, e um pool limitado de `JOB_WORKERS`
+threads analisa os jobs em ordem de chegada. Cada bloco de empresas
+completas vai para o `analysis_executor` (pool de processos nos blocos
+grandes), então os jobs não disputam o GIL com os requests.
+
+Cada job fica em um diretório próprio:
+
+    <JOBS_DIR>/<job_id>/job.json          estado e progresso
+    <JOBS_DIR>/<job_id>/input.csv         planilha enviada (ou input.parquet)
+    <JOBS_DIR>/<job_id>/chunks/000000.ndjson  resultado de cada bloco
+
+Os blocos de resultado são gravados à medida que ficam prontos, então o que
+já foi analisado pode ser baixado antes do fim do job. Estado e blocos são
+gravados em um arquivo temporário e publicados com `os.replace`: uma queda
+no meio da gravação não deixa arquivos pela metade.
+
+Jobs na fila ou em andamento quando o processo para são retomados no próximo
+`start`: a planilha é relida até o último bloco gravado (sem reanalisar) e a
+análise continua dali.
+
+Jobs terminados (concluídos, com falha ou cancelados) há mais de
+`JOB_RETENTION_SECONDS` têm o diretório removido no `start` e a cada novo
+envio, então `JOBS_DIR` não cresce sem limite.
+"""
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Optional, Set, Tuple
+
+from app.config import settings
+from app.schemas.sustainability import JobStatus
+from app.utils.executor import analysis_executor
+from app.utils.history import HISTORY_NDJSON, history_writer
+from app.utils.messages import DEFAULT_LOCALE
+from app.utils.metrics import CallbackMetric
+from app.utils.uploads import UploadFormatError, UploadReader, analyze_upload_chunk, count_rows
+
+_FINISHED = (JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED)
+
+_STATE_FIELDS = (
+    "job_id", "status", "filename", "file_format", "chunk_rows", "created_at", "updated_at",
+    "rows_total", "rows_read", "chunks_done", "companies", "errors", "error", "locale",
+)
+
+
+class Job:
+    """Estado de um job, espelhado em `job.json`"""
+
+    def __init__(
+        self,
+        job_id: str,
+        file_format: str,
+        filename: Optional[str],
+        rows_total: int,
+        chunk_rows: int,
+        locale: str = DEFAULT_LOCALE
+    ):
+        now = time.time()
+        self.job_id = job_id
+        self.status = JobStatus.QUEUED
+        self.filename = filename
+        self.file_format = file_format
+        self.chunk_rows = chunk_rows
+        self.created_at = now
+        self.updated_at = now
+        self.rows_total = rows_total
+        self.rows_read = 0
+        self.chunks_done = 0
+        self.companies = 0
+        self.errors = 0
+        self.error: Optional[str] = None
+        self.locale = locale
+
+    @classmethod
+    def from_state(cls, state: dict) -> "Job":
+        job = cls.__new__(cls)
+        for field in _STATE_FIELDS:
+            setattr(job, field, state.get(field))
+        job.status = JobStatus(job.status)
+        # Jobs gravados antes da escolha de idioma
+        job.locale = job.locale or DEFAULT_LOCALE
+        return job
+
+    def state(self) -> dict:
+        state = {field: getattr(self, field) for field in _STATE_FIELDS}
+        state["status"] = self.status.value
+        return state
+
+    @property
+    def progress(self) -> float:
+        if self.status == JobStatus.COMPLETED:
+            return 1.0
+        if not self.rows_total:
+            return 0.0
+        # rows_total do CSV é estimado: o progresso nunca passa de 1
+        return min(self.rows_read / self.rows_total, 1.0)
+
+    def snapshot(self) -> dict:
+        """Campos de `JobStatusResponse`"""
+        state = self.state()
+        del state["file_format"], state["chunk_rows"], state["locale"]
+        state["progress"] = self.progress
+        return state
+
+
+def _write_atomic(path: Path, content: bytes) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+_STOP = None
+
+
+class JobManager:
+    """Fila de jobs persistida em disco e pool limitado de threads que os executa"""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.root: Optional[Path] = None
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._threads: List[threading.Thread] = []
+        self._stopping = False
+        # Jobs sendo processados por alguma thread: nunca removidos pela limpeza
+        self._active: Set[str] = set()
+
+    @property
+    def started(self) -> bool:
+        return bool(self._threads)
+
+    def start(self, path: str) -> None:
+        """
+        Carrega os jobs de `path`, recoloca na fila os não concluídos e inicia as threads
+
+        Args:
+            path: Diretório dos jobs (vazio desabilita)
+        """
+        if not path or self._threads:
+            return
+        try:
+            root = Path(path)
+            root.mkdir(parents=True, exist_ok=True)
+            jobs = self._load(root)
+        except OSError as e:
+            print(f"⚠️ Jobs de análise desabilitados: {e}")
+            return
+
+        self.root = root
+        self._stopping = False
+        with self._lock:
+            self._jobs = {job.job_id: job for job in jobs}
+        removed = self.sweep()
+        if removed:
+            print(f"🧹 {removed} job(s) de análise expirado(s) removido(s)")
+        pending = sorted(
+            (job for job in jobs if job.status not in _FINISHED), key=lambda job: job.created_at
+        )
+        for job in pending:
+            # Um job interrompido volta para a fila e continua do último bloco gravado
+            job.status = JobStatus.QUEUED
+            self._queue.put(job.job_id)
+        if pending:
+            print(f"🔁 Retomando {len(pending)} job(s) de análise")
+
+        self._threads = [
+            threading.Thread(target=self._run, name=f"analysis-job-{i}", daemon=True)
+            for i in range(max(self.workers, 1))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def shutdown(self) -> None:
+        """
+        Encerra as threads ao fim do bloco em andamento
+
+        Jobs interrompidos continuam `running`/`queued` em disco e são
+        retomados no próximo `start`.
+        """
+        if not self._threads:
+            return
+        self._stopping = True
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self._queue = queue.Queue()
+        with self._lock:
+            self._jobs = {}
+        self.root = None
+
+    def submit(
+        self,
+        file: BinaryIO,
+        file_format: str,
+        filename: Optional[str] = None,
+        locale: str = DEFAULT_LOCALE
+    ) -> dict:
+        """
+        Grava a planilha e coloca o job na fila
+
+        Args:
+            file: Planilha enviada (CSV ou Parquet)
+            file_format: `UPLOAD_CSV` ou `UPLOAD_PARQUET`
+            filename: Nome original do arquivo
+            locale: Idioma das mensagens do resultado, ou `CODES_ONLY`
+
+        Returns:
+            Situação do job (campos de `JobStatusResponse`)
+
+        Raises:
+            UploadFormatError: Planilha sem as colunas obrigatórias ou ilegível
+        """
+        self.sweep()
+        job_id = uuid.uuid4().hex
+        directory = self.root / job_id
+        (directory / "chunks").mkdir(parents=True)
+        input_path = directory / f"input.{file_format}"
+        try:
+            with open(input_path, "wb") as f:
+                shutil.copyfileobj(file, f, 1 << 20)
+            # Valida o cabeçalho agora, para que o erro volte no próprio envio
+            with open(input_path, "rb") as f:
+                UploadReader(f, file_format)
+            with open(input_path, "rb") as f:
+                rows_total = count_rows(f, file_format)
+        except UploadFormatError:
+            shutil.rmtree(directory, ignore_errors=True)
+            raise
+
+        job = Job(job_id, file_format, filename, rows_total, settings.UPLOAD_CHUNK_ROWS, locale)
+        self._save(job)
+        with self._lock:
+            self._jobs[job_id] = job
+            snapshot = job.snapshot()
+        self._queue.put(job_id)
+        return snapshot
+
+    def status(self, job_id: str) -> Optional[dict]:
+        """Situação do job, ou `None` se ele não existe"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.snapshot() if job is not None else None
+
+    def cancel(self, job_id: str) -> Optional[dict]:
+        """
+        Cancela o job
+
+        Um job na fila não chega a rodar; um job em andamento para ao fim do
+        bloco atual, e os blocos já gravados continuam disponíveis. Cancelar
+        um job concluído não tem efeito.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job.status not in _FINISHED:
+                job.status = JobStatus.CANCELLED
+                job.updated_at = time.time()
+                self._save(job)
+            return job.snapshot()
+
+    def sweep(self) -> int:
+        """
+        Remove os jobs terminados há mais de `JOB_RETENTION_SECONDS`
+
+        Returns:
+            Número de jobs removidos (0 com a retenção desabilitada)
+        """
+        retention = settings.JOB_RETENTION_SECONDS
+        if not retention or self.root is None:
+            return 0
+        cutoff = time.time() - retention
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job.status in _FINISHED and job.updated_at < cutoff and job_id not in self._active
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+        for job_id in expired:
+            shutil.rmtree(self.root / job_id, ignore_errors=True)
+        return len(expired)
+
+    def result_chunks(self, job_id: str, start: int = 0) -> Optional[Tuple[dict, List[Path]]]:
+        """
+        Blocos de resultado já gravados
+
+        Returns:
+            Situação do job e arquivos dos blocos a partir de `start`, lidos
+            juntos, ou `None` se o job não existe
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            snapshot = job.snapshot()
+        return snapshot, [self._chunk_path(job_id, index) for index in range(start, snapshot["chunks_done"])]
+
+    def counts(self) -> Dict[str, int]:
+        """Número de jobs por situação"""
+        counts = {status.value: 0 for status in JobStatus}
+        with self._lock:
+            for job in self._jobs.values():
+                counts[job.status.value] += 1
+        return counts
+
+    def _chunk_path(self, job_id: str, index: int) -> Path:
+        return self.root / job_id / "chunks" / f"{index:06d}.ndjson"
+
+    def _save(self, job: Job) -> None:
+        _write_atomic(self.root / job.job_id / "job.json", json.dumps(job.state()).encode())
+
+    @staticmethod
+    def _load(root: Path) -> List[Job]:
+        jobs = []
+        for state_path in root.glob("*/job.json"):
+            try:
+                jobs.append(Job.from_state(json.loads(state_path.read_bytes())))
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Job ignorado ({state_path.parent.name}): {e}")
+        return jobs
+
+    def _run(self) -> None:
+        while True:
+            job_id = self._queue.get()
+            if job_id is _STOP:
+                return
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is None or job.status != JobStatus.QUEUED:
+                    # Cancelado enquanto esperava na fila
+                    continue
+                job.status = JobStatus.RUNNING
+                job.updated_at = time.time()
+                self._active.add(job_id)
+                self._save(job)
+            try:
+                self._process(job)
+            except Exception as e:
+                with self._lock:
+                    if job.status == JobStatus.RUNNING:
+                        job.status = JobStatus.FAILED
+                        job.error = str(e) or type(e).__name__
+                        job.updated_at = time.time()
+                        self._save(job)
+            finally:
+                with self._lock:
+                    self._active.discard(job_id)
+
+    def _process(self, job: Job) -> None:
+        with open(self.root / job.job_id / f"input.{job.file_format}", "rb") as f:
+            reader = UploadReader(f, job.file_format, job.chunk_rows)
+            # Retomada: os blocos já gravados são relidos, mas não reanalisados
+            for _ in range(job.chunks_done):
+                reader.read_chunk()
+
+            while not reader.finished:
+                if self._stopping:
+                    return
+                entries = reader.read_chunk()
+                requests = [entry[3] for entry in entries if len(entry) == 4]
+                output = analysis_executor.call(
+                    analyze_upload_chunk, entries, job.locale,
+                    size=sum(len(request.proposed_materials) for request in requests)
+                )
+                _write_atomic(self._chunk_path(job.job_id, job.chunks_done), output)
+                history_writer.record(
+                    HISTORY_NDJSON, [entry[3] if len(entry) == 4 else None for entry in entries], output
+                )
+
+                # Uma linha por entrada; empresas cuja análise falhou também saem como erro
+                errors = sum(line.startswith(b'{"row":') for line in output.splitlines())
+                with self._lock:
+                    job.chunks_done += 1
+                    job.rows_read = reader.rows_read
+                    job.companies += len(entries) - errors
+                    job.errors += errors
+                    job.updated_at = time.time()
+                    if reader.finished and job.status == JobStatus.RUNNING:
+                        job.status = JobStatus.COMPLETED
+                    self._save(job)
+                    if job.status != JobStatus.RUNNING:
+                        return
+            # Retomada de um job com todos os blocos já gravados
+            with self._lock:
+                if job.status == JobStatus.RUNNING:
+                    job.status = JobStatus.COMPLETED
+                    job.updated_at = time.time()
+                    self._save(job)
+
+
+def iter_chunks(paths: List[Path]) -> Iterator[bytes]:
+    """Lê os blocos de resultado em sequência, para uma resposta em streaming"""
+    for path in paths:
+        with open(path, "rb") as f:
+            yield from iter(lambda: f.read(1 << 16), b"")
+
+
+job_manager = JobManager(workers=settings.JOB_WORKERS)
+
+CallbackMetric(
+    "analysis_jobs",
+    "Jobs de análise por situação",
+    ("status",),
+    lambda: {(status,): count for status, count in job_manager.counts().items()},
+)
@@ -0,0 +1,197 @@
+"""
+Catálogo de mensagens das análises (recomendações e melhorias)
+
+Os cálculos não formatam texto: cada recomendação ou melhoria é registrada
+como uma `Message`, com um código estável e os seus parâmetros, e o texto só
+é montado na borda, no idioma escolhido pelo `Accept-Language`. Os templates
+de cada idioma são internados uma única vez, e as mensagens sem parâmetros
+variáveis (recomendações gerais e por faixa de eficiência de cada material)
+já ficam renderizadas, prontas para todas as respostas.
+
+No modo `codes_only` (`CODES_ONLY`), nenhum texto é formatado: cada mensagem
+sai como `{"code": ..., "params": {...}}`.
+
+    material.excellent         material
+    material.good              material
+    material.moderate          material
+    material.high_consumption  material, reduction, company_size
+    overall.excellent / overall.good / overall.moderate / overall.attention
+    improvement.reduce         material, excess
+    improvement.maintain
+"""
+import sys
+from functools import lru_cache
+from typing import Any, Dict, NamedTuple, Optional, Tuple, Union
+
+from app.schemas.sustainability import MaterialType
+
+
+class Message(NamedTuple):
+    """Mensagem do catálogo: código estável e parâmetros (pares nome, valor)"""
+
+    code: str
+    params: Tuple[Tuple[str, Any], ...] = ()
+
+
+DEFAULT_LOCALE = "pt-BR"
+CODES_ONLY = "codes"
+
+MATERIAL_EXCELLENT = "material.excellent"
+MATERIAL_GOOD = "material.good"
+MATERIAL_MODERATE = "material.moderate"
+MATERIAL_HIGH_CONSUMPTION = "material.high_consumption"
+OVERALL_EXCELLENT = "overall.excellent"
+OVERALL_GOOD = "overall.good"
+OVERALL_MODERATE = "overall.moderate"
+OVERALL_ATTENTION = "overall.attention"
+IMPROVEMENT_REDUCE = "improvement.reduce"
+IMPROVEMENT_MAINTAIN = "improvement.maintain"
+
+TEMPLATES: Dict[str, Dict[str, str]] = {
+    "pt-BR": {
+        MATERIAL_EXCELLENT: "Excelente! Uso de {material} está dentro dos padrões de excelência.",
+        MATERIAL_GOOD: "Bom uso de {material}. Considere otimizações para alcançar excelência.",
+        MATERIAL_MODERATE: "Uso moderado de {material}. Há espaço para melhorias significativas.",
+        MATERIAL_HIGH_CONSUMPTION: (
+            "Alto consumo de {material}. Recomenda-se reduzir em pelo menos {reduction:.2f} {company_size}."
+        ),
+        OVERALL_EXCELLENT: "Excelente! Sua empresa demonstra alto comprometimento com sustentabilidade.",
+        OVERALL_GOOD: "Bom desempenho. Continue otimizando para alcançar excelência.",
+        OVERALL_MODERATE: "Performance moderada. Há oportunidades significativas de melhoria.",
+        OVERALL_ATTENTION: "Atenção necessária. Implemente práticas mais sustentáveis urgentemente.",
+        IMPROVEMENT_REDUCE: "Reduzir {material} em {excess:.2f} unidades para atingir o padrão recomendado",
+        IMPROVEMENT_MAINTAIN: "Manter os padrões atuais e continuar monitorando",
+    },
+    "en": {
+        MATERIAL_EXCELLENT: "Excellent! {material} usage is within excellence standards.",
+        MATERIAL_GOOD: "Good use of {material}. Consider optimizations to reach excellence.",
+        MATERIAL_MODERATE: "Moderate use of {material}. There is room for significant improvement.",
+        MATERIAL_HIGH_CONSUMPTION: "High {material} consumption. Reduce it by at least {reduction:.2f}.",
+        OVERALL_EXCELLENT: "Excellent! Your company shows a strong commitment to sustainability.",
+        OVERALL_GOOD: "Good performance. Keep optimizing to reach excellence.",
+        OVERALL_MODERATE: "Moderate performance. There are significant opportunities for improvement.",
+        OVERALL_ATTENTION: "Attention needed. Adopt more sustainable practices urgently.",
+        IMPROVEMENT_REDUCE: "Reduce {material} by {excess:.2f} units to meet the recommended standard",
+        IMPROVEMENT_MAINTAIN: "Keep current standards and continue monitoring",
+    },
+}
+LOCALES = tuple(TEMPLATES)
+
+# Templates internados uma única vez: as respostas referenciam as mesmas strings
+for _templates in TEMPLATES.values():
+    for _code, _template in _templates.items():
+        _templates[_code] = sys.intern(_template)
+
+
+def _message(code: str, **params: Any) -> Message:
+    return Message(sys.intern(code), tuple(params.items()))
+
+
+# Mensagens sem parâmetros variáveis, criadas uma vez e compartilhadas
+MATERIAL_MESSAGES: Dict[str, Dict[MaterialType, Message]] = {
+    code: {material: _message(code, material=material.value) for material in MaterialType}
+    for code in (MATERIAL_EXCELLENT, MATERIAL_GOOD, MATERIAL_MODERATE)
+}
+OVERALL_MESSAGES: Dict[str, Message] = {
+    code: _message(code) for code in (OVERALL_EXCELLENT, OVERALL_GOOD, OVERALL_MODERATE, OVERALL_ATTENTION)
+}
+MAINTAIN_MESSAGE = _message(IMPROVEMENT_MAINTAIN)
+
+
+def high_consumption_message(material_type: MaterialType, reduction: float, company_size: str) -> Message:
+    """Recomendação de redução de um material acima da média"""
+    return Message(
+        MATERIAL_HIGH_CONSUMPTION,
+        (("material", material_type.value), ("reduction", reduction), ("company_size", company_size)),
+    )
+
+
+def reduce_message(material_type: MaterialType, excess: float) -> Message:
+    """Melhoria: reduzir um material até o consumo recomendado"""
+    return Message(IMPROVEMENT_REDUCE, (("material", material_type.value), ("excess", excess)))
+
+
+def _code_dict(message: Message) -> dict:
+    return {"code": message.code, "params": dict(message.params)}
+
+
+def _prerender() -> Dict[str, Dict[Message, Any]]:
+    constants = [
+        *(message for messages in MATERIAL_MESSAGES.values() for message in messages.values()),
+        *OVERALL_MESSAGES.values(),
+        MAINTAIN_MESSAGE,
+    ]
+    rendered = {
+        locale: {message: sys.intern(templates[message.code].format(**dict(message.params))) for message in constants}
+        for locale, templates in TEMPLATES.items()
+    }
+    rendered[CODES_ONLY] = {message: _code_dict(message) for message in constants}
+    return rendered
+
+
+_RENDERED = _prerender()
+
+
+def render_message(message: Message, locale: str = DEFAULT_LOCALE) -> Union[str, dict]:
+    """
+    Monta uma mensagem no idioma pedido
+
+    Args:
+        message: Mensagem do catálogo
+        locale: Idioma de `LOCALES` ou `CODES_ONLY`
+
+    Returns:
+        Texto da mensagem, ou `{"code": ..., "params": {...}}` com `CODES_ONLY`
+        (estruturas compartilhadas: não modificar)
+    """
+    rendered = _RENDERED[locale].get(message)
+    if rendered is not None:
+        return rendered
+    if locale == CODES_ONLY:
+        return _code_dict(message)
+    return TEMPLATES[locale][message.code].format(**dict(message.params))
+
+
+def render_text(message: Message) -> str:
+    """Texto da mensagem no idioma padrão"""
+    return render_message(message, DEFAULT_LOCALE)
+
+
+@lru_cache(maxsize=256)
+def negotiate_locale(accept_language: Optional[str]) -> str:
+    """
+    Escolhe o idioma das mensagens a partir do header `Accept-Language`
+
+    Considera os pesos (`q`) e aceita tanto a tag completa (`pt-BR`) quanto
+    só o idioma (`pt`, `en-US` -> `en`). Sem header ou sem idioma
+    suportado, usa `DEFAULT_LOCALE`.
+    """
+    if not accept_language:
+        return DEFAULT_LOCALE
+    candidates = []
+    for position, entry in enumerate(accept_language.split(",")):
+        tag, _, params = entry.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        if tag and weight > 0:
+            candidates.append((-weight, position, tag.strip().lower()))
+
+    by_tag = {locale.lower(): locale for locale in LOCALES}
+    by_language = {locale.split("-")[0].lower(): locale for locale in reversed(LOCALES)}
+    for _, _, tag in sorted(candidates):
+        if tag == "*":
+            return DEFAULT_LOCALE
+        locale = by_tag.get(tag) or by_language.get(tag.split("-")[0])
+        if locale is not None:
+            return locale
+    return DEFAULT_LOCALE
+
+
+def message_locale(accept_language: Optional[str], codes_only: bool) -> str:
+    """Modo de renderização das mensagens de um request (`CODES_ONLY` ou um idioma)"""
+    return CODES_ONLY if codes_only else negotiate_locale(accept_language)
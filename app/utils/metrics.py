@@ -0,0 +1,322 @@
+"""
+Métricas no formato de exposição do Prometheus, sem dependências externas
+
+Contadores e histogramas são divididos em shards por thread: cada thread
+escreve apenas no próprio shard, sem locks no caminho quente, e os shards são
+somados apenas no momento da coleta (`render_metrics`). Os histogramas têm
+buckets fixos definidos na criação.
+"""
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (128, 512, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+PHASE_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05, 0.25, 1.0)
+
+
+class _ThreadShards:
+    """Vetor de valores replicado por thread e somado na leitura"""
+
+    __slots__ = ("size", "_local", "_shards", "_lock")
+
+    def __init__(self, size: int):
+        self.size = size
+        self._local = threading.local()
+        self._shards: List[List[float]] = []
+        self._lock = threading.Lock()
+
+    def shard(self) -> List[float]:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = [0.0] * self.size
+            with self._lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+            return shard
+
+    def totals(self) -> List[float]:
+        with self._lock:
+            shards = list(self._shards)
+        return [sum(column) for column in zip(*shards)] if shards else [0.0] * self.size
+
+
+class _CounterChild:
+    __slots__ = ("_shards",)
+
+    def __init__(self):
+        self._shards = _ThreadShards(1)
+
+    def inc(self, amount: float = 1) -> None:
+        self._shards.shard()[0] += amount
+
+    def dec(self, amount: float = 1) -> None:
+        self._shards.shard()[0] -= amount
+
+    def value(self) -> float:
+        return self._shards.totals()[0]
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "_shards")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        # [contagem por bucket..., contagem acima do último bucket, soma]
+        self._shards = _ThreadShards(len(bounds) + 2)
+
+    def observe(self, value: float) -> None:
+        shard = self._shards.shard()
+        shard[bisect_left(self.bounds, value)] += 1
+        shard[-1] += value
+
+    def snapshot(self) -> Tuple[List[float], float, float]:
+        """Retorna (contagens acumuladas por bucket, contagem total, soma)"""
+        totals = self._shards.totals()
+        cumulative = []
+        running = 0.0
+        for count in totals[:-2]:
+            running += count
+            cumulative.append(running)
+        return cumulative, running + totals[-2], totals[-1]
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} espera os labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _label_text(self, values: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def collect(self) -> Iterable[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Contador monotônico"""
+
+    type_name = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1) -> None:
+        self.labels().inc(amount)
+
+    def collect(self) -> Iterable[str]:
+        for values, child in list(self._children.items()):
+            yield f"{self.name}{self._label_text(values)} {_format(child.value())}"
+
+
+class Gauge(Counter):
+    """Valor que sobe e desce (ex.: requests em andamento)"""
+
+    type_name = "gauge"
+
+    def dec(self, amount: float = 1) -> None:
+        self.labels().dec(amount)
+
+
+class Histogram(_Metric):
+    """Histograma com buckets fixos"""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def collect(self) -> Iterable[str]:
+        for values, child in list(self._children.items()):
+            cumulative, count, total = child.snapshot()
+            for bound, bucket_count in zip(self.buckets, cumulative):
+                le = 'le="%s"' % _format(bound)
+                yield f"{self.name}_bucket{self._label_text(values, le)} {_format(bucket_count)}"
+            le = 'le="+Inf"'
+            yield f"{self.name}_bucket{self._label_text(values, le)} {_format(count)}"
+            yield f"{self.name}_sum{self._label_text(values)} {_format(total)}"
+            yield f"{self.name}_count{self._label_text(values)} {_format(count)}"
+
+
+class CallbackMetric(_Metric):
+    """Métrica cujo valor é lido de uma função no momento da coleta"""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str],
+        callback: Callable[[], Dict[Tuple[str, ...], float]],
+        type_name: str = "gauge"
+    ):
+        self.type_name = type_name
+        self.callback = callback
+        super().__init__(name, documentation, labelnames)
+
+    def collect(self) -> Iterable[str]:
+        for values, value in self.callback().items():
+            yield f"{self.name}{self._label_text(values)} {_format(value)}"
+
+
+REGISTRY: List[_Metric] = []
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format(value: float) -> str:
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+def render_metrics() -> bytes:
+    """Gera o texto de exposição do Prometheus (versão 0.0.4)"""
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.type_name}")
+        lines.extend(metric.collect())
+    return ("\n".join(lines) + "\n").encode()
+
+
+# Métricas HTTP
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "Total de requests HTTP", ("method", "route", "status")
+)
+HTTP_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "Requests HTTP em andamento"
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "Latência dos requests HTTP", ("method", "route")
+)
+HTTP_REQUEST_SIZE = Histogram(
+    "http_request_size_bytes", "Tamanho do corpo dos requests", ("method", "route"), buckets=SIZE_BUCKETS
+)
+HTTP_RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes", "Tamanho do corpo das respostas", ("method", "route"), buckets=SIZE_BUCKETS
+)
+
+# Fases da análise de sustentabilidade
+PHASE_MATERIALS = 0
+PHASE_SCORE = 1
+PHASE_RECOMMENDATION = 2
+PHASE_IMPROVEMENTS = 3
+PHASE_RECORDS = 4  # montagem dos objetos de resultado na análise em lote
+PHASES = ("materials", "score", "recommendation", "improvements", "records")
+
+ANALYSIS_PHASE_SECONDS = Histogram(
+    "analysis_phase_duration_seconds",
+    "Tempo gasto em cada fase de uma chamada de análise",
+    ("phase",),
+    buckets=PHASE_BUCKETS,
+)
+_PHASE_CHILDREN = [ANALYSIS_PHASE_SECONDS.labels(phase) for phase in PHASES]
+
+
+class PhaseTimer:
+    """
+    Acumula o tempo de cada fase da análise e registra tudo de uma vez
+
+    Uma única instância pode cobrir várias empresas (análise em lote); o
+    histograma recebe o total de cada fase por chamada. Fases sem nenhuma
+    marcação na chamada (ex.: `records` na análise escalar) não são registradas.
+    """
+
+    __slots__ = ("totals", "_last")
+
+    def __init__(self):
+        self.totals = [0] * len(PHASES)
+        self._last = time.perf_counter_ns()
+
+    def lap(self, phase: int) -> None:
+        """Atribui o tempo desde a última marcação à fase informada"""
+        now = time.perf_counter_ns()
+        self.totals[phase] += now - self._last
+        self._last = now
+
+    def observe(self) -> None:
+        """Registra os totais no histograma de fases"""
+        for child, total in zip(_PHASE_CHILDREN, self.totals):
+            if total:
+                child.observe(total / 1e9)
+
+
+class MetricsMiddleware:
+    """Middleware ASGI que registra contagem, latência e tamanhos por rota"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+        request_size = 0
+        response_size = 0
+
+        async def counting_receive() -> Message:
+            nonlocal request_size
+            message = await receive()
+            if message["type"] == "http.request":
+                request_size += len(message.get("body", b""))
+            return message
+
+        async def counting_send(message: Message) -> None:
+            nonlocal status, response_size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, counting_receive, counting_send)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            route = scope.get("route")
+            # Usar o template da rota mantém a cardinalidade dos labels limitada
+            route_path = getattr(route, "path", "<unmatched>")
+            method = scope["method"]
+            HTTP_REQUESTS.labels(method, route_path, str(status)).inc()
+            HTTP_LATENCY.labels(method, route_path).observe(time.perf_counter() - start)
+            HTTP_REQUEST_SIZE.labels(method, route_path).observe(request_size)
+            HTTP_RESPONSE_SIZE.labels(method, route_path).observe(response_size)
@@ -0,0 +1,375 @@
+"""
+Otimização da redução de consumo sob um orçamento
+
+Para cada material, o ganho de eficiência em função da quantidade reduzida é
+linear por partes, com vértices nos pontos de quebra dos benchmarks
+(médio + 80, médio, recomendado, excelente e zero), mas não é côncavo. O
+otimizador:
+
+1. calcula a envoltória côncava superior de cada curva de ganho;
+2. ordena os segmentos da envoltória de todos os materiais da empresa por
+   ganho por unidade de custo e os consome nessa ordem até esgotar o
+   orçamento (vetorizado sobre todas as empresas do lote);
+3. para as empresas em que o último segmento, parcial, fica abaixo da
+   envoltória, refina a alocação: de forma exata até `EXACT_MAX_MATERIALS`
+   materiais e, acima disso, com trocas de um vértice em torno da solução
+   gulosa.
+
+A etapa 3 exata usa o fato de que existe uma solução ótima em que todos os
+materiais, exceto um, estão em vértices da curva: para cada material
+"livre", combina as fronteiras de Pareto (custo, ganho) dos vértices dos
+demais e gasta o restante do orçamento no livre. O número de pontos das
+fronteiras cresce combinatorialmente com os materiais (dezenas de
+segundos com 150), por isso o limite; as trocas de um vértice avaliam
+O(materiais × vértices) candidatos e nunca pioram a solução gulosa.
+"""
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.schemas.sustainability import MaterialType, OptimizationItem
+from app.utils.benchmarks import (
+    AVERAGE,
+    EXCELLENT,
+    MATERIAL_INDEX,
+    RECOMMENDED,
+    SIZE_INDEX,
+    BenchmarkTable,
+    get_benchmark_table,
+)
+from app.utils.vectorized import efficiency_percentage_array
+
+
+# Acima deste número de materiais em uma empresa, a etapa 3 usa `_swap_allocation`,
+# repetida até não melhorar ou por no máximo `SWAP_ROUNDS` rodadas
+EXACT_MAX_MATERIALS = 24
+SWAP_ROUNDS = 8
+
+
+def _hull_segments(x: np.ndarray, gain: np.ndarray):
+    """
+    Segmentos da envoltória côncava superior de cada linha
+
+    Args:
+        x: Quantidades reduzidas nos vértices (linhas, vértices), crescentes
+        gain: Ganho de eficiência em cada vértice
+
+    Returns:
+        (linha, comprimento, ganho) de cada segmento com ganho positivo
+    """
+    n_rows, n_vertices = x.shape
+    rows = np.arange(n_rows)
+    positions = np.arange(n_vertices)
+    current = np.zeros(n_rows, dtype=np.intp)
+    segment_rows, segment_dx, segment_gain = [], [], []
+
+    for _ in range(n_vertices - 1):
+        dx = x - x[rows, current][:, None]
+        valid = (positions[None, :] > current[:, None]) & (dx > 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            slope = np.where(valid, (gain - gain[rows, current][:, None]) / dx, -np.inf)
+        best = slope.max(axis=1)
+        active = best > 0
+        if not active.any():
+            break
+
+        # Em empates, o vértice mais distante evita segmentos colineares
+        tolerance = 1e-12 * np.maximum(1.0, np.abs(best))
+        ties = valid & (slope >= (best - tolerance)[:, None])
+        following = np.where(ties, positions[None, :], -1).max(axis=1)
+
+        selected = rows[active]
+        start, end = current[active], following[active]
+        segment_rows.append(selected)
+        segment_dx.append(x[selected, end] - x[selected, start])
+        segment_gain.append(gain[selected, end] - gain[selected, start])
+        current = np.where(active, following, current)
+
+    if not segment_rows:
+        return np.empty(0, dtype=np.intp), np.empty(0), np.empty(0)
+    return np.concatenate(segment_rows), np.concatenate(segment_dx), np.concatenate(segment_gain)
+
+
+Frontier = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def _merge(a: Frontier, b: Frontier, budget: float) -> Frontier:
+    """Combina duas fronteiras (custo, ganho, reduções) mantendo só os pontos de Pareto"""
+    cost = (a[0][:, None] + b[0][None, :]).ravel()
+    gain = (a[1][:, None] + b[1][None, :]).ravel()
+    within = np.flatnonzero(cost <= budget * (1 + 1e-12))
+    order = within[np.argsort(cost[within], kind="stable")]
+    cost, gain = cost[order], gain[order]
+    # Mantém um ponto apenas se ganha mais que todos os mais baratos
+    best = np.maximum.accumulate(gain)
+    keep = np.empty(gain.size, dtype=bool)
+    keep[:1] = True
+    keep[1:] = gain[1:] > best[:-1]
+    chosen = order[keep]
+    reductions = a[2][chosen // b[0].size] + b[2][chosen % b[0].size]
+    return cost[keep], gain[keep], reductions
+
+
+def _exact_allocation(
+    budget: float,
+    quantity: np.ndarray,
+    cost: np.ndarray,
+    x: np.ndarray,
+    gain: np.ndarray,
+    current_efficiency: np.ndarray,
+    benchmarks: np.ndarray,
+) -> np.ndarray:
+    """
+    Alocação ótima de uma empresa
+
+    Args:
+        budget: Orçamento da empresa
+        quantity: Quantidades propostas (n,)
+        cost: Custo por unidade reduzida (n,)
+        x: Reduções nos vértices de cada curva (n, vértices)
+        gain: Ganho de eficiência em cada vértice
+        current_efficiency: Eficiência atual de cada material (n,)
+        benchmarks: Linhas (n, 3) da tabela de benchmarks
+
+    Returns:
+        Redução de cada material (n,)
+    """
+    n = quantity.size
+    options = []
+    for i in range(n):
+        # Vértices repetidos são descartados pela poda de Pareto
+        reductions = np.zeros((x.shape[1], n))
+        reductions[:, i] = x[i]
+        options.append((x[i] * cost[i], gain[i], reductions))
+
+    empty: Frontier = (np.zeros(1), np.zeros(1), np.zeros((1, n)))
+    prefix = [empty]
+    for option in options[:-1]:
+        prefix.append(_merge(prefix[-1], option, budget))
+    suffix = [empty]
+    for option in reversed(options[1:]):
+        suffix.append(_merge(suffix[-1], option, budget))
+    suffix.reverse()
+
+    # Para cada material livre, os demais em vértices; o livre recebe todo o restante
+    frontiers = [_merge(prefix[free], suffix[free], budget) for free in range(n)]
+    free = np.repeat(np.arange(n), [frontier[0].size for frontier in frontiers])
+    others_cost = np.concatenate([frontier[0] for frontier in frontiers])
+    others_gain = np.concatenate([frontier[1] for frontier in frontiers])
+    free_x = np.clip((budget - others_cost) / cost[free], 0.0, quantity[free])
+    rows = benchmarks[free]
+    free_gain = efficiency_percentage_array(
+        quantity[free] - free_x, rows[:, EXCELLENT], rows[:, RECOMMENDED], rows[:, AVERAGE]
+    ) - current_efficiency[free]
+
+    k = int(np.argmax(others_gain + free_gain))
+    f = int(free[k])
+    reductions = np.concatenate([frontier[2] for frontier in frontiers])[k].copy()
+    reductions[f] = free_x[k]
+    return reductions
+
+
+def _swap_allocation(
+    budget: float,
+    quantity: np.ndarray,
+    cost: np.ndarray,
+    x: np.ndarray,
+    gain: np.ndarray,
+    current_efficiency: np.ndarray,
+    benchmarks: np.ndarray,
+    reduction: np.ndarray,
+) -> np.ndarray:
+    """
+    Melhora a alocação gulosa de uma empresa com trocas de um vértice
+
+    O material fora dos vértices (o do segmento parcial) é o "livre". Os
+    candidatos são: outro material muda para um de seus vértices e o livre
+    recebe o restante do orçamento; ou o livre vai para um de seus vértices
+    e outro material recebe o restante. Os demais ficam onde a solução
+    gulosa os deixou.
+
+    Args:
+        budget: Orçamento da empresa
+        quantity: Quantidades propostas (n,)
+        cost: Custo por unidade reduzida (n,)
+        x: Reduções nos vértices de cada curva (n, vértices)
+        gain: Ganho de eficiência em cada vértice
+        current_efficiency: Eficiência atual de cada material (n,)
+        benchmarks: Linhas (n, 3) da tabela de benchmarks
+        reduction: Redução de cada material na solução gulosa (n,)
+
+    Returns:
+        Redução de cada material (n,)
+    """
+    n, n_vertices = x.shape
+    at_vertex = (np.abs(x - reduction[:, None]) <= 1e-9 * np.maximum(1.0, x)).any(axis=1)
+    off_vertex = np.flatnonzero(~at_vertex)
+    if off_vertex.size == 0:
+        return reduction
+    free = int(off_vertex[0])
+
+    def gain_at(rows: np.ndarray, reduced: np.ndarray) -> np.ndarray:
+        row = benchmarks[rows]
+        return efficiency_percentage_array(
+            quantity[rows] - reduced, row[:, EXCELLENT], row[:, RECOMMENDED], row[:, AVERAGE]
+        ) - current_efficiency[rows]
+
+    current_gain = gain_at(np.arange(n), reduction)
+    spent = reduction * cost
+    others_spent = spent.sum() - spent[free]
+    others_gain = current_gain.sum() - current_gain[free]
+    tolerance = 1e-12 * max(1.0, budget)
+    material = np.repeat(np.arange(n), n_vertices)
+    vertex = np.tile(np.arange(n_vertices), n)
+
+    # Outro material em um vértice; o livre recebe o restante
+    left = budget - (others_spent - spent[material] + x[material, vertex] * cost[material])
+    free_x = np.clip(left / cost[free], 0.0, quantity[free])
+    swapped = others_gain - current_gain[material] + gain[material, vertex] + gain_at(
+        np.full(material.size, free), free_x
+    )
+    swapped[(left < -tolerance) | (material == free)] = -np.inf
+
+    # O livre em um vértice; outro material recebe o restante
+    left = budget - others_spent - x[free, vertex] * cost[free]
+    other_x = np.clip(reduction[material] + left / cost[material], 0.0, quantity[material])
+    shifted = others_gain - current_gain[material] + gain_at(material, other_x) + gain[free, vertex]
+    shifted[(left + spent[material] < -tolerance) | (material == free)] = -np.inf
+
+    best = max(float(swapped.max()), float(shifted.max()))
+    if best <= current_gain.sum() + 1e-12:
+        return reduction
+    reduction = reduction.copy()
+    if swapped.max() >= shifted.max():
+        k = int(np.argmax(swapped))
+        reduction[material[k]] = x[material[k], vertex[k]]
+        reduction[free] = free_x[k]
+    else:
+        k = int(np.argmax(shifted))
+        reduction[free] = x[free, vertex[k]]
+        reduction[material[k]] = other_x[k]
+    return reduction
+
+
+def optimize_reductions(
+    items: List[OptimizationItem],
+    table: Optional[BenchmarkTable] = None
+) -> dict:
+    """
+    Distribui o orçamento de redução de cada empresa para maximizar o score geral
+
+    Args:
+        items: Empresas com materiais propostos, orçamento e custos por
+            unidade reduzida (padrão: 1 por unidade)
+        table: Tabela de benchmarks (padrão: tabela ativa)
+
+    Returns:
+        Estrutura no formato de `OptimizationResponse`
+    """
+    table = table or get_benchmark_table()
+    counts = [len(item.proposed_materials) for item in items]
+    n_rows = sum(counts)
+    company = np.repeat(np.arange(len(items)), counts)
+
+    size_idx = np.repeat([SIZE_INDEX[item.company.size] for item in items], counts).astype(np.intp)
+    material_idx = np.fromiter(
+        (MATERIAL_INDEX[m.type] for item in items for m in item.proposed_materials), dtype=np.intp, count=n_rows
+    )
+    quantity = np.fromiter(
+        (m.quantity for item in items for m in item.proposed_materials), dtype=np.float64, count=n_rows
+    )
+    cost = np.fromiter(
+        (_unit_cost(item.costs, m.type) for item in items for m in item.proposed_materials),
+        dtype=np.float64,
+        count=n_rows,
+    )
+    budget = np.array([item.budget for item in items], dtype=np.float64)
+
+    benchmarks = table.values[size_idx, material_idx]
+    excellent, recommended, average = benchmarks[:, EXCELLENT], benchmarks[:, RECOMMENDED], benchmarks[:, AVERAGE]
+
+    # Vértices da curva de ganho: quantidade reduzida até cada ponto de quebra
+    levels = np.minimum(
+        np.stack([quantity, average + 80, average, recommended, excellent, np.zeros(n_rows)], axis=1),
+        quantity[:, None],
+    )
+    efficiency_at = efficiency_percentage_array(
+        levels, excellent[:, None], recommended[:, None], average[:, None]
+    )
+    current_efficiency = efficiency_at[:, 0]
+    x = quantity[:, None] - levels
+    gain = efficiency_at - current_efficiency[:, None]
+
+    segment_rows, segment_dx, segment_gain = _hull_segments(x, gain)
+    segment_cost = segment_dx * cost[segment_rows]
+    segment_company = company[segment_rows]
+
+    # Por empresa, segmentos em ordem decrescente de ganho por custo
+    order = np.lexsort((-(segment_gain / segment_cost), segment_company))
+    ordered_company = segment_company[order]
+    ordered_cost = segment_cost[order]
+    spent_before = np.cumsum(ordered_cost) - ordered_cost
+    group_start = np.searchsorted(ordered_company, ordered_company)
+    spent_before = spent_before - spent_before[group_start]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        taken = np.clip((budget[ordered_company] - spent_before) / ordered_cost, 0.0, 1.0)
+
+    reduction = np.bincount(
+        segment_rows[order], weights=taken * segment_dx[order], minlength=n_rows
+    )
+    optimized_quantity = np.maximum(quantity - reduction, 0.0)
+    optimized_efficiency = efficiency_percentage_array(optimized_quantity, excellent, recommended, average)
+
+    # Empresas em que a curva real fica abaixo da envoltória no segmento parcial
+    hull_gain = np.bincount(ordered_company, weights=taken * segment_gain[order], minlength=len(items))
+    real_gain = np.bincount(company, weights=optimized_efficiency - current_efficiency, minlength=len(items))
+    bounds = np.cumsum([0] + counts)
+    below_hull = np.flatnonzero(hull_gain - real_gain > 1e-9 * np.maximum(1.0, hull_gain))
+    for c in below_hull.tolist():
+        rows = slice(bounds[c], bounds[c + 1])
+        args = (budget[c], quantity[rows], cost[rows], x[rows], gain[rows], current_efficiency[rows], benchmarks[rows])
+        if counts[c] <= EXACT_MAX_MATERIALS:
+            reduction[rows] = _exact_allocation(*args)
+        else:
+            improved = reduction[rows]
+            for _ in range(SWAP_ROUNDS):
+                previous, improved = improved, _swap_allocation(*args, improved)
+                if improved is previous:
+                    break
+            reduction[rows] = improved
+    if below_hull.size:
+        optimized_quantity = np.maximum(quantity - reduction, 0.0)
+        optimized_efficiency = efficiency_percentage_array(optimized_quantity, excellent, recommended, average)
+
+    budget_used = np.bincount(company, weights=reduction * cost, minlength=len(items))
+
+    material_counts = np.maximum(np.bincount(company, minlength=len(items)), 1)
+    score_before = np.bincount(company, weights=current_efficiency, minlength=len(items)) / material_counts
+    score_after = np.bincount(company, weights=optimized_efficiency, minlength=len(items)) / material_counts
+
+    bounds = bounds.tolist()
+    reduction_list = reduction.tolist()
+    quantity_list = optimized_quantity.tolist()
+    efficiency_list = optimized_efficiency.tolist()
+    return {
+        "results": [
+            {
+                "overall_score": before,
+                "optimized_score": after,
+                "budget_used": used,
+                "reductions": reduction_list[start:end],
+                "optimized_quantities": quantity_list[start:end],
+                "efficiency_percentage": efficiency_list[start:end],
+            }
+            for before, after, used, start, end in zip(
+                score_before.tolist(), score_after.tolist(), budget_used.tolist(), bounds[:-1], bounds[1:]
+            )
+        ]
+    }
+
+
+def _unit_cost(costs: Optional[Dict[MaterialType, float]], material_type: MaterialType) -> float:
+    if costs is None:
+        return 1.0
+    return costs.get(material_type, 1.0)
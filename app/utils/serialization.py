@@ -0,0 +1,202 @@
+"""
+Serialização das análises na borda da API
+
+Converte os registros internos (`app.models.analysis`) diretamente em
+estruturas JSON, sem passar novamente pela validação dos modelos Pydantic.
+O modo compacto referencia os benchmarks por id em vez de repeti-los em cada
+material. Recomendações e melhorias são montadas aqui, no idioma pedido ou,
+com `CODES_ONLY`, apenas como código e parâmetros (`app.utils.messages`).
+"""
+from typing import Any, Dict, Iterable, List, Optional
+
+import orjson
+
+from app.models.analysis import AnalysisResult, ComparisonResult, MaterialResult
+from app.schemas.sustainability import MaterialAnalysis, SustainabilityAnalysisResponse
+from app.utils.benchmarks import BenchmarkTable, get_benchmark_table
+from app.utils.messages import DEFAULT_LOCALE, render_message, render_text
+
+
+def _all_finite(items: Iterable[Any]) -> bool:
+    for value in items:
+        kind = type(value)
+        if kind is float:
+            # NaN e infinito: x - x é NaN, diferente de zero
+            if value - value != 0.0:
+                return False
+        elif kind is dict:
+            if not _all_finite(value.values()):
+                return False
+        elif kind is list or kind is tuple:
+            if not _all_finite(value):
+                return False
+    return True
+
+
+def dump_json(content: Any) -> bytes:
+    """
+    Serializa uma estrutura JSON em bytes compactos (UTF-8)
+
+    O orjson escreve NaN e infinito como `null`; aqui, como no `json` com
+    `allow_nan=False`, eles são recusados. Só as saídas com algum `null`
+    são conferidas, percorrendo a estrutura.
+
+    Raises:
+        ValueError: A estrutura tem algum float não finito
+    """
+    body = orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    if b"null" in body and not _all_finite((content,)):
+        raise ValueError("Valores float não finitos (NaN/inf) não são JSON válido")
+    return body
+
+
+def _material_dict(
+    material: MaterialResult,
+    table: BenchmarkTable,
+    benchmarks: Optional[Dict[str, dict]],
+    locale: str
+) -> dict:
+    data = {
+        "material_type": material.material_type.value,
+        "proposed_quantity": material.proposed_quantity,
+        "company_size": material.company_size.value,
+    }
+    if benchmarks is None:
+        data["benchmark"] = table.benchmark_dict(material.company_size, material.material_type)
+    else:
+        benchmark_id = table.benchmark_id(material.company_size, material.material_type)
+        if benchmark_id not in benchmarks:
+            benchmarks[benchmark_id] = table.benchmark_dict(material.company_size, material.material_type)
+        data["benchmark_id"] = benchmark_id
+    data["is_eco_efficient"] = material.is_eco_efficient
+    data["efficiency_percentage"] = material.efficiency_percentage
+    data["carbon_footprint_reduction"] = material.carbon_footprint_reduction
+    data["recommendation"] = render_message(material.recommendation, locale)
+    return data
+
+
+def _analysis_dict(
+    result: AnalysisResult,
+    table: BenchmarkTable,
+    benchmarks: Optional[Dict[str, dict]],
+    locale: str
+) -> dict:
+    return {
+        "company": result.company.model_dump(mode="json"),
+        "materials_analysis": [
+            _material_dict(material, table, benchmarks, locale)
+            for material in result.materials_analysis
+        ],
+        "overall_score": result.overall_score,
+        "overall_recommendation": render_message(result.overall_recommendation, locale),
+        "is_eco_efficient": result.is_eco_efficient,
+        "potential_savings": result.potential_savings,
+        "improvements": [render_message(message, locale) for message in result.improvements],
+    }
+
+
+def render_analysis(
+    result: AnalysisResult,
+    compact: bool = False,
+    table: Optional[BenchmarkTable] = None,
+    locale: str = DEFAULT_LOCALE
+) -> dict:
+    """
+    Converte uma análise para JSON
+
+    Args:
+        result: Análise interna
+        compact: Se verdadeiro, os materiais trazem `benchmark_id` e os
+            benchmarks usados aparecem uma única vez em `benchmarks`
+        table: Tabela de benchmarks (padrão: tabela ativa)
+        locale: Idioma das mensagens, ou `CODES_ONLY` para só os códigos
+
+    Returns:
+        Estrutura no formato de `SustainabilityAnalysisResponse` ou
+        `CompactSustainabilityAnalysisResponse`
+    """
+    table = table or get_benchmark_table()
+    if not compact:
+        return _analysis_dict(result, table, None, locale)
+
+    benchmarks: Dict[str, dict] = {}
+    data = _analysis_dict(result, table, benchmarks, locale)
+    data["benchmarks_version"] = table.version
+    data["benchmarks"] = benchmarks
+    return data
+
+
+def render_batch(
+    results: List[AnalysisResult],
+    compact: bool = False,
+    table: Optional[BenchmarkTable] = None,
+    locale: str = DEFAULT_LOCALE
+) -> dict:
+    """
+    Converte uma lista de análises para JSON
+
+    No modo compacto os benchmarks são compartilhados por todo o lote.
+    """
+    table = table or get_benchmark_table()
+    if not compact:
+        return {"results": [_analysis_dict(result, table, None, locale) for result in results]}
+
+    benchmarks: Dict[str, dict] = {}
+    rendered = [_analysis_dict(result, table, benchmarks, locale) for result in results]
+    return {"benchmarks_version": table.version, "benchmarks": benchmarks, "results": rendered}
+
+
+def render_comparison(result: ComparisonResult) -> dict:
+    """Converte uma comparação para JSON no formato de `ComparisonResponse`"""
+    return {
+        "company": result.company.model_dump(mode="json"),
+        "benchmarks_version": result.benchmarks_version,
+        "current_score": result.current_score,
+        "proposed_score": result.proposed_score,
+        "score_change": result.proposed_score - result.current_score,
+        "carbon_change": result.carbon_change,
+        "materials": [
+            {
+                "material_type": material.material_type.value,
+                "current_quantity": material.current_quantity,
+                "proposed_quantity": material.proposed_quantity,
+                "current_efficiency": material.current_efficiency,
+                "proposed_efficiency": material.proposed_efficiency,
+                "efficiency_change": (
+                    material.proposed_efficiency - material.current_efficiency
+                    if material.current_efficiency is not None and material.proposed_efficiency is not None
+                    else None
+                ),
+                "carbon_change": material.carbon_change,
+                "score_change": material.score_change,
+            }
+            for material in result.materials
+        ],
+    }
+
+
+def to_material_analysis(material: MaterialResult) -> MaterialAnalysis:
+    """Converte um resultado interno no modelo Pydantic `MaterialAnalysis`"""
+    return MaterialAnalysis(
+        material_type=material.material_type,
+        proposed_quantity=material.proposed_quantity,
+        company_size=material.company_size,
+        benchmark=material.benchmark,
+        is_eco_efficient=material.is_eco_efficient,
+        efficiency_percentage=material.efficiency_percentage,
+        carbon_footprint_reduction=material.carbon_footprint_reduction,
+        recommendation=render_text(material.recommendation),
+    )
+
+
+def to_response_model(result: AnalysisResult) -> SustainabilityAnalysisResponse:
+    """Converte uma análise interna no modelo Pydantic de resposta"""
+    return SustainabilityAnalysisResponse(
+        company=result.company,
+        materials_analysis=[to_material_analysis(material) for material in result.materials_analysis],
+        overall_score=result.overall_score,
+        overall_recommendation=render_text(result.overall_recommendation),
+        is_eco_efficient=result.is_eco_efficient,
+        potential_savings=result.potential_savings,
+        improvements=[render_text(message) for message in result.improvements],
+    )
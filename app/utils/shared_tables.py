@@ -0,0 +1,153 @@
+"""
+Segmento compartilhado com as tabelas compiladas (benchmarks e fatores de emissão)
+
+Com vários workers do uvicorn por host, cada um teria a sua cópia das tabelas
+e uma atualização exigiria reiniciar todos. Aqui as tabelas ficam em um único
+arquivo binário, mapeado somente leitura (`mmap`) por todos os processos:
+
+    cabeçalho   magic, layout, geração, formato dos arrays, tamanho dos metadados
+    metadados   JSON com as versões e os conjuntos de fatores (UTF-8, completado
+                até múltiplo de 8 bytes)
+    benchmarks  float64 (tamanho, material, campo)
+    fatores     float64 (conjunto, material)
+
+`publish_tables` grava um arquivo novo ao lado do atual e o troca com
+`os.replace`, que é atômico: quem lê vê a versão anterior inteira ou a nova
+inteira. Cada worker confere o arquivo com um `stat` por leitura e, quando ele
+muda, mapeia a nova versão; os arrays apontam direto para o mapeamento, sem
+cópia nem releitura do JSON. Mapeamentos antigos continuam válidos para os
+requests que ainda os usam e são liberados quando ninguém mais os referencia.
+"""
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional, Tuple
+
+import numpy as np
+
+
+MAGIC = b"CVTABLES"
+LAYOUT_VERSION = 2
+
+# magic, layout, geração, tamanhos, materiais, campos, conjuntos de fatores, bytes dos metadados
+_HEADER = struct.Struct("<8sIQIIIII")
+
+
+def _padded(length: int) -> int:
+    return (length + 7) // 8 * 8
+
+
+def publish_tables(path: str, metadata: dict, values: np.ndarray, carbon_factors: np.ndarray) -> int:
+    """
+    Publica uma nova versão das tabelas no segmento
+
+    Args:
+        path: Arquivo do segmento
+        metadata: Versões e demais dados para remontar as tabelas (JSON)
+        values: Benchmarks (tamanho, material, campo)
+        carbon_factors: Fatores de emissão (conjunto, material)
+
+    Returns:
+        Geração publicada (lida de volta pelos workers no cabeçalho)
+    """
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    carbon_factors = np.ascontiguousarray(carbon_factors, dtype=np.float64).reshape(-1, values.shape[1])
+    encoded = json.dumps(metadata, ensure_ascii=False).encode()
+    generation = time.time_ns()
+    header = _HEADER.pack(MAGIC, LAYOUT_VERSION, generation, *values.shape, carbon_factors.shape[0], len(encoded))
+
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    # Nome exclusivo: dois workers publicando ao mesmo tempo não disputam o temporário
+    tmp = target.with_name(f"{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(header)
+        f.write(encoded.ljust(_padded(len(encoded)), b"\0"))
+        f.write(values.tobytes())
+        f.write(carbon_factors.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, target)
+    return generation
+
+
+def map_tables(path: str) -> Tuple[int, dict, np.ndarray, np.ndarray]:
+    """
+    Mapeia o segmento somente leitura
+
+    Returns:
+        Geração, metadados, benchmarks e fatores (arrays somente leitura sobre o mapeamento)
+
+    Raises:
+        ValueError: Arquivo que não é um segmento válido desta versão do layout
+    """
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(mapped) < _HEADER.size:
+        raise ValueError("Segmento de tabelas truncado")
+    magic, layout, generation, sizes, materials, fields, factor_sets, metadata_length = _HEADER.unpack_from(mapped)
+    if magic != MAGIC or layout != LAYOUT_VERSION:
+        raise ValueError(f"Segmento de tabelas com layout desconhecido ({magic!r}, {layout})")
+
+    offset = _HEADER.size
+    metadata = json.loads(bytes(mapped[offset:offset + metadata_length]))
+    offset += _padded(metadata_length)
+    count = sizes * materials * fields
+    factors = factor_sets * materials
+    if len(mapped) != offset + (count + factors) * 8:
+        raise ValueError("Segmento de tabelas com tamanho inconsistente")
+    values = np.frombuffer(mapped, dtype=np.float64, count=count, offset=offset).reshape(sizes, materials, fields)
+    carbon_factors = np.frombuffer(
+        mapped, dtype=np.float64, count=factors, offset=offset + count * 8
+    ).reshape(factor_sets, materials)
+    return generation, metadata, values, carbon_factors
+
+
+class SharedTables:
+    """Leitor do segmento: remapeia quando o arquivo muda e guarda a última versão válida"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.generation: Optional[int] = None
+        self._stat: Optional[Tuple[int, int, int, int]] = None
+        self._snapshot: Any = None
+        self._lock = threading.Lock()
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def current(self, build: Callable[[dict, np.ndarray, np.ndarray], Any]) -> Any:
+        """
+        Retorna as tabelas da versão publicada
+
+        Args:
+            build: Monta o objeto das tabelas a partir de (metadados, benchmarks, fatores);
+                chamado uma vez por versão
+
+        Returns:
+            Resultado de `build` para a versão atual, ou `None` se o segmento
+            não existe e nenhuma versão foi lida
+        """
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return self._snapshot
+        key = (st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size)
+        if key == self._stat:
+            return self._snapshot
+
+        with self._lock:
+            if key != self._stat:
+                try:
+                    generation, metadata, values, carbon_factors = map_tables(self.path)
+                    self._snapshot = build(metadata, values, carbon_factors)
+                    self.generation = generation
+                except (OSError, ValueError, KeyError) as e:
+                    # Mantém a versão anterior; o arquivo só é relido quando mudar de novo
+                    print(f"⚠️ Segmento de tabelas ignorado ({self.path}): {e}")
+                self._stat = key
+        return self._snapshot
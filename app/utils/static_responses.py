@@ -0,0 +1,76 @@
+"""
+Respostas estáticas pré-serializadas
+
+Os endpoints de referência (`/materials`, `/company-sizes`, `/example`,
+`/benchmarks/{company_size}`) retornam sempre o mesmo conteúdo para uma mesma
+tabela de benchmarks. Eles são serializados uma única vez em bytes, com um
+ETag forte, e servidos sem passar pelo encoder; `If-None-Match` recebe 304.
+
+O conjunto é reconstruído quando a tabela de benchmarks ativa muda (a troca é
+percebida pelo fingerprint na próxima leitura).
+"""
+import hashlib
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import Request, Response
+
+from app.config import settings
+from app.utils.benchmarks import BenchmarkTable, get_benchmark_table
+from app.utils.serialization import dump_json
+
+
+class StaticResponse:
+    """Corpo JSON já serializado e seu ETag"""
+
+    __slots__ = ("body", "etag")
+
+    def __init__(self, content: Any):
+        self.body = dump_json(content)
+        self.etag = '"' + hashlib.sha256(self.body).hexdigest()[:32] + '"'
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """Verifica se o cliente já tem esta versão (cabeçalho `If-None-Match`)"""
+        if not if_none_match:
+            return False
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag == "*" or tag == self.etag or tag == "W/" + self.etag:
+                return True
+        return False
+
+
+class StaticResponseCache:
+    """Respostas estáticas por nome, reconstruídas quando a tabela de benchmarks muda"""
+
+    def __init__(self, builders: Dict[str, Callable[[BenchmarkTable], Any]]):
+        self.builders = builders
+        self._fingerprint: Optional[str] = None
+        self._responses: Dict[str, StaticResponse] = {}
+        self._lock = threading.Lock()
+
+    def refresh(self, table: Optional[BenchmarkTable] = None) -> None:
+        """Serializa todas as respostas para a tabela informada (padrão: tabela ativa)"""
+        table = table or get_benchmark_table()
+        responses = {name: StaticResponse(build(table)) for name, build in self.builders.items()}
+        with self._lock:
+            self._responses = responses
+            self._fingerprint = table.fingerprint
+
+    def get(self, name: str) -> StaticResponse:
+        """Retorna a resposta pré-serializada, reconstruindo o conjunto após uma troca de tabela"""
+        table = get_benchmark_table()
+        if table.fingerprint != self._fingerprint:
+            self.refresh(table)
+        return self._responses[name]
+
+    def respond(self, request: Request, name: str) -> Response:
+        """Responde com o corpo pré-serializado ou 304 se o ETag do cliente ainda vale"""
+        static = self.get(name)
+        headers = {
+            "ETag": static.etag,
+            "Cache-Control": f"public, max-age={settings.STATIC_CACHE_MAX_AGE}",
+        }
+        if static.matches(request.headers.get("if-none-match")):
+            return Response(status_code=304, headers=headers)
+        return Response(static.body, media_type="application/json", headers=headers)
@@ -0,0 +1,202 @@
+"""
+Análise em streaming de requests NDJSON (um JSON por linha)
+
+O corpo é lido incrementalmente e processado em blocos de tamanho fixo pelo
+caminho vetorizado, então o uso de memória não depende do tamanho da entrada.
+O event loop só separa as linhas; a validação de cada uma roda junto com a
+análise do bloco, na thread ou no processo escolhido pelo executor.
+"""
+import json
+from typing import AsyncIterator, List, Optional, Tuple, Union
+
+from pydantic import ValidationError
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from app.config import settings
+from app.schemas.sustainability import SustainabilityCalculationRequest
+from app.utils.benchmarks import BenchmarkTable, get_benchmark_table
+from app.utils.executor import analysis_executor
+from app.utils.history import HISTORY_NDJSON, history_writer
+from app.utils.messages import DEFAULT_LOCALE
+from app.utils.serialization import dump_json, render_analysis
+from app.utils.vectorized import analyze_batch
+
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse que responde enquanto o corpo do request ainda é lido
+
+    O `StreamingResponse` padrão consome `receive` para detectar desconexão,
+    o que compete com a leitura do corpo. Aqui a desconexão é percebida pela
+    própria leitura (`ClientDisconnect`).
+    """
+
+    media_type = "application/x-ndjson"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+async def iter_ndjson_lines(
+    chunks: AsyncIterator[bytes],
+    max_line_bytes: int
+) -> AsyncIterator[Tuple[int, Optional[bytes]]]:
+    """
+    Divide um fluxo de bytes em linhas numeradas (a partir de 1)
+
+    Linhas em branco são ignoradas. Linhas maiores que `max_line_bytes` são
+    descartadas sem acumular o conteúdo e retornadas como `None`.
+    """
+    buffer = b""
+    line_no = 0
+    oversized = False
+
+    async for chunk in chunks:
+        parts = chunk.split(b"\n")
+        if len(parts) == 1:
+            lines = []
+            buffer += chunk
+        else:
+            lines = parts[:-1]
+            lines[0] = buffer + lines[0]
+            buffer = parts[-1]
+
+        for line in lines:
+            line_no += 1
+            if oversized:
+                oversized = False
+                yield line_no, None
+            elif len(line) > max_line_bytes:
+                yield line_no, None
+            elif line.strip():
+                yield line_no, line
+
+        if len(buffer) > max_line_bytes:
+            oversized = True
+            buffer = b""
+
+    if oversized:
+        yield line_no + 1, None
+    elif buffer.strip():
+        yield line_no + 1, buffer
+
+
+def format_validation_error(error: ValidationError) -> str:
+    """Resume os erros de validação do Pydantic em uma única mensagem"""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc']) or 'body'}: {err['msg']}"
+        for err in error.errors()
+    )
+
+
+def format_error_line(line_no: int, message: str) -> bytes:
+    """Formata uma linha de erro da resposta NDJSON"""
+    return json.dumps({"line": line_no, "error": message}, ensure_ascii=False).encode() + b"\n"
+
+
+def validate_lines(
+    entries: List[Tuple[int, Union[bytes, str]]]
+) -> List[Tuple[int, Union[SustainabilityCalculationRequest, str]]]:
+    """Valida as linhas brutas, trocando as inválidas pela mensagem de erro"""
+    validated = []
+    for line_no, entry in entries:
+        if isinstance(entry, bytes):
+            try:
+                entry = SustainabilityCalculationRequest.model_validate_json(entry)
+            except ValidationError as e:
+                entry = format_validation_error(e)
+        validated.append((line_no, entry))
+    return validated
+
+
+def analyze_chunk(
+    entries: List[Tuple[int, Union[bytes, str]]],
+    locale: str = DEFAULT_LOCALE,
+    table: Optional[BenchmarkTable] = None
+) -> bytes:
+    """
+    Valida e analisa um bloco de linhas e formata a saída NDJSON
+
+    Args:
+        entries: Pares (número da linha, linha JSON bruta ou mensagem de erro)
+        locale: Idioma das mensagens, ou `CODES_ONLY`
+        table: Tabela de benchmarks (padrão: tabela ativa)
+
+    Returns:
+        Linhas NDJSON na mesma ordem da entrada
+    """
+    entries = validate_lines(entries)
+    requests = [entry for _, entry in entries if not isinstance(entry, str)]
+    table = table or get_benchmark_table()
+    analyses = iter(analyze_batch(requests, table))
+
+    output = []
+    for line_no, entry in entries:
+        if isinstance(entry, str):
+            output.append(format_error_line(line_no, entry))
+            continue
+        analysis = next(analyses)
+        try:
+            body = dump_json(render_analysis(analysis, table=table, locale=locale))
+        except ValueError as e:
+            # Ex.: resultado não finito; vira erro da linha sem interromper o fluxo
+            output.append(format_error_line(line_no, f"Erro ao analisar: {e}"))
+            continue
+        output.append(b'{"line":%d,"analysis":%s}\n' % (line_no, body))
+    return b"".join(output)
+
+
+async def analyze_ndjson_stream(
+    chunks: AsyncIterator[bytes],
+    chunk_size: Optional[int] = None,
+    max_line_bytes: Optional[int] = None,
+    locale: str = DEFAULT_LOCALE
+) -> AsyncIterator[bytes]:
+    """
+    Analisa um fluxo NDJSON de `SustainabilityCalculationRequest`
+
+    Cada linha de entrada gera uma linha de saída `{"line": n, "analysis": ...}`
+    ou `{"line": n, "error": ...}`; erros não interrompem o fluxo.
+
+    Args:
+        chunks: Fluxo de bytes do corpo do request
+        chunk_size: Linhas analisadas por bloco (padrão: `settings.STREAM_CHUNK_SIZE`)
+        max_line_bytes: Tamanho máximo de uma linha (padrão: `settings.STREAM_MAX_LINE_BYTES`)
+        locale: Idioma das mensagens, ou `CODES_ONLY`
+    """
+    chunk_size = chunk_size or settings.STREAM_CHUNK_SIZE
+    max_line_bytes = max_line_bytes or settings.STREAM_MAX_LINE_BYTES
+
+    entries = []
+    rows = 0
+    async for line_no, line in iter_ndjson_lines(chunks, max_line_bytes):
+        if line is None:
+            entries.append((line_no, f"Linha excede o limite de {max_line_bytes} bytes"))
+        else:
+            # A linha só é validada no executor; o tamanho do bloco é estimado pelas chaves "quantity"
+            entries.append((line_no, line))
+            rows += line.count(b'"quantity"')
+
+        if len(entries) >= chunk_size:
+            yield await _analyze_and_record(entries, rows, locale)
+            entries = []
+            rows = 0
+
+    if entries:
+        yield await _analyze_and_record(entries, rows, locale)
+
+
+async def _analyze_and_record(
+    entries: List[Tuple[int, Union[bytes, str]]],
+    rows: int,
+    locale: str
+) -> bytes:
+    output = await analysis_executor.run(analyze_chunk, entries, locale, size=rows)
+    # O histórico recebe as linhas brutas e só valida as que viraram análise, na própria thread
+    history_writer.record(
+        HISTORY_NDJSON, [None if isinstance(entry, str) else entry for _, entry in entries], output
+    )
+    return output
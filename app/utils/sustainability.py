@@ -1,7 +1,7 @@
 """
 Utilitários para cálculos de sustentabilidade e pegada verde
 """
-from typing import List
+from typing import List, Optional
 from app.schemas.sustainability import (
     MaterialType,
     CompanySize,
@@ -11,201 +11,42 @@ from app.schemas.sustainability import (
     SustainabilityAnalysisResponse,
     CompanyData,
 )
+from app.models.analysis import AnalysisResult, MaterialResult
+from app.utils.benchmarks import BenchmarkTable, get_benchmark_table
+from app.utils.emission_factors import carbon_reduction
+from app.utils.messages import (
+    MAINTAIN_MESSAGE,
+    MATERIAL_EXCELLENT,
+    MATERIAL_GOOD,
+    MATERIAL_MESSAGES,
+    MATERIAL_MODERATE,
+    OVERALL_ATTENTION,
+    OVERALL_EXCELLENT,
+    OVERALL_GOOD,
+    OVERALL_MESSAGES,
+    OVERALL_MODERATE,
+    Message,
+    high_consumption_message,
+    reduce_message,
+    render_text,
+)
+from app.utils.metrics import (
+    PHASE_IMPROVEMENTS,
+    PHASE_MATERIALS,
+    PHASE_RECOMMENDATION,
+    PHASE_SCORE,
+    PhaseTimer,
+)
+from app.utils.serialization import to_material_analysis, to_response_model
 
 
-# Benchmarks de referência por tipo de material e tamanho da empresa
-BENCHMARKS = {
-    CompanySize.MICRO: {
-        MaterialType.LATAO: Benchmark(
-            company_size=CompanySize.MICRO,
-            material_type=MaterialType.LATAO,
-            recommended_max=0.5,  # 0.5 toneladas
-            average_usage=1.0,
-            excellent_threshold=0.3
-        ),
-        MaterialType.AGUA: Benchmark(
-            company_size=CompanySize.MICRO,
-            material_type=MaterialType.AGUA,
-            recommended_max=50,  # 50 toneladas
-            average_usage=100,
-            excellent_threshold=30
-        ),
-        MaterialType.PAPEL: Benchmark(
-            company_size=CompanySize.MICRO,
-            material_type=MaterialType.PAPEL,
-            recommended_max=2.0,
-            average_usage=4.0,
-            excellent_threshold=1.5
-        ),
-        MaterialType.PLASTICO: Benchmark(
-            company_size=CompanySize.MICRO,
-            material_type=MaterialType.PLASTICO,
-            recommended_max=1.0,
-            average_usage=2.5,
-            excellent_threshold=0.5
-        ),
-        MaterialType.ENERGIA: Benchmark(
-            company_size=CompanySize.MICRO,
-            material_type=MaterialType.ENERGIA,
-            recommended_max=10,  # 10 MWh
-            average_usage=20,
-            excellent_threshold=7
-        ),
-    },
-    CompanySize.PEQUENA: {
-        MaterialType.LATAO: Benchmark(
-            company_size=CompanySize.PEQUENA,
-            material_type=MaterialType.LATAO,
-            recommended_max=2.0,
-            average_usage=5.0,
-            excellent_threshold=1.5
-        ),
-        MaterialType.AGUA: Benchmark(
-            company_size=CompanySize.PEQUENA,
-            material_type=MaterialType.AGUA,
-            recommended_max=200,
-            average_usage=400,
-            excellent_threshold=150
-        ),
-        MaterialType.PAPEL: Benchmark(
-            company_size=CompanySize.PEQUENA,
-            material_type=MaterialType.PAPEL,
-            recommended_max=10.0,
-            average_usage=20.0,
-            excellent_threshold=7.0
-        ),
-        MaterialType.PLASTICO: Benchmark(
-            company_size=CompanySize.PEQUENA,
-            material_type=MaterialType.PLASTICO,
-            recommended_max=5.0,
-            average_usage=12.0,
-            excellent_threshold=3.0
-        ),
-        MaterialType.ENERGIA: Benchmark(
-            company_size=CompanySize.PEQUENA,
-            material_type=MaterialType.ENERGIA,
-            recommended_max=50,
-            average_usage=100,
-            excellent_threshold=35
-        ),
-    },
-    CompanySize.MEDIA: {
-        MaterialType.LATAO: Benchmark(
-            company_size=CompanySize.MEDIA,
-            material_type=MaterialType.LATAO,
-            recommended_max=10.0,
-            average_usage=25.0,
-            excellent_threshold=7.5
-        ),
-        MaterialType.AGUA: Benchmark(
-            company_size=CompanySize.MEDIA,
-            material_type=MaterialType.AGUA,
-            recommended_max=1000,
-            average_usage=2000,
-            excellent_threshold=750
-        ),
-        MaterialType.PAPEL: Benchmark(
-            company_size=CompanySize.MEDIA,
-            material_type=MaterialType.PAPEL,
-            recommended_max=50.0,
-            average_usage=100.0,
-            excellent_threshold=35.0
-        ),
-        MaterialType.PLASTICO: Benchmark(
-            company_size=CompanySize.MEDIA,
-            material_type=MaterialType.PLASTICO,
-            recommended_max=25.0,
-            average_usage=60.0,
-            excellent_threshold=15.0
-        ),
-        MaterialType.ENERGIA: Benchmark(
-            company_size=CompanySize.MEDIA,
-            material_type=MaterialType.ENERGIA,
-            recommended_max=250,
-            average_usage=500,
-            excellent_threshold=175
-        ),
-    },
-    CompanySize.GRANDE: {
-        MaterialType.LATAO: Benchmark(
-            company_size=CompanySize.GRANDE,
-            material_type=MaterialType.LATAO,
-            recommended_max=50.0,
-            average_usage=125.0,
-            excellent_threshold=37.5
-        ),
-        MaterialType.AGUA: Benchmark(
-            company_size=CompanySize.GRANDE,
-            material_type=MaterialType.AGUA,
-            recommended_max=5000,
-            average_usage=10000,
-            excellent_threshold=3750
-        ),
-        MaterialType.PAPEL: Benchmark(
-            company_size=CompanySize.GRANDE,
-            material_type=MaterialType.PAPEL,
-            recommended_max=250.0,
-            average_usage=500.0,
-            excellent_threshold=175.0
-        ),
-        MaterialType.PLASTICO: Benchmark(
-            company_size=CompanySize.GRANDE,
-            material_type=MaterialType.PLASTICO,
-            recommended_max=125.0,
-            average_usage=300.0,
-            excellent_threshold=75.0
-        ),
-        MaterialType.ENERGIA: Benchmark(
-            company_size=CompanySize.GRANDE,
-            material_type=MaterialType.ENERGIA,
-            recommended_max=1250,
-            average_usage=2500,
-            excellent_threshold=875
-        ),
-    },
-    CompanySize.ENORME: {
-        MaterialType.LATAO: Benchmark(
-            company_size=CompanySize.ENORME,
-            material_type=MaterialType.LATAO,
-            recommended_max=250.0,
-            average_usage=625.0,
-            excellent_threshold=187.5
-        ),
-        MaterialType.AGUA: Benchmark(
-            company_size=CompanySize.ENORME,
-            material_type=MaterialType.AGUA,
-            recommended_max=25000,
-            average_usage=50000,
-            excellent_threshold=18750
-        ),
-        MaterialType.PAPEL: Benchmark(
-            company_size=CompanySize.ENORME,
-            material_type=MaterialType.PAPEL,
-            recommended_max=1250.0,
-            average_usage=2500.0,
-            excellent_threshold=875.0
-        ),
-        MaterialType.PLASTICO: Benchmark(
-            company_size=CompanySize.ENORME,
-            material_type=MaterialType.PLASTICO,
-            recommended_max=625.0,
-            average_usage=1500.0,
-            excellent_threshold=375.0
-        ),
-        MaterialType.ENERGIA: Benchmark(
-            company_size=CompanySize.ENORME,
-            material_type=MaterialType.ENERGIA,
-            recommended_max=6250,
-            average_usage=12500,
-            excellent_threshold=4375
-        ),
-    },
-}
-
-
-def get_benchmark(company_size: CompanySize, material_type: MaterialType) -> Benchmark:
+def get_benchmark(
+    company_size: CompanySize,
+    material_type: MaterialType,
+    table: Optional[BenchmarkTable] = None
+) -> Benchmark:
     """Retorna o benchmark para um tipo de material e tamanho de empresa"""
-    return BENCHMARKS[company_size][material_type]
+    return (table or get_benchmark_table()).benchmark(company_size, material_type)
 
 
 def calculate_efficiency_percentage(quantity: float, benchmark: Benchmark) -> float:
@@ -253,71 +94,109 @@ def is_eco_efficient(quantity: float, benchmark: Benchmark) -> bool:
     return quantity <= benchmark.recommended_max
 
 
+def recommendation_for(
+    material_type: MaterialType,
+    quantity: float,
+    efficiency: float,
+    benchmark: Benchmark
+) -> Message:
+    """Gera a recomendação (código do catálogo) de um material a partir dos valores já calculados"""
+    if efficiency >= 80:
+        return MATERIAL_MESSAGES[MATERIAL_EXCELLENT][material_type]
+    elif efficiency >= 60:
+        return MATERIAL_MESSAGES[MATERIAL_GOOD][material_type]
+    elif efficiency >= 40:
+        return MATERIAL_MESSAGES[MATERIAL_MODERATE][material_type]
+    else:
+        reduction = quantity - benchmark.recommended_max
+        return high_consumption_message(material_type, reduction, benchmark.company_size.value)
+
+
 def generate_recommendation(analysis: MaterialAnalysis) -> str:
     """Gera uma recomendação baseada na análise do material"""
-    if analysis.efficiency_percentage >= 80:
-        return f"Excelente! Uso de {analysis.material_type.value} está dentro dos padrões de excelência."
-    elif analysis.efficiency_percentage >= 60:
-        return f"Bom uso de {analysis.material_type.value}. Considere otimizações para alcançar excelência."
-    elif analysis.efficiency_percentage >= 40:
-        return f"Uso moderado de {analysis.material_type.value}. Há espaço para melhorias significativas."
-    else:
-        reduction = analysis.proposed_quantity - analysis.benchmark.recommended_max
-        return f"Alto consumo de {analysis.material_type.value}. Recomenda-se reduzir em pelo menos {reduction:.2f} {analysis.benchmark.company_size.value}."
+    return render_text(recommendation_for(
+        analysis.material_type,
+        analysis.proposed_quantity,
+        analysis.efficiency_percentage,
+        analysis.benchmark
+    ))
 
 
-def analyze_material(
+def calculate_carbon_reduction(
+    material_type: MaterialType,
+    quantity: float,
+    benchmark: Benchmark,
+    is_eco: bool,
+    table: Optional[BenchmarkTable] = None,
+    region: Optional[str] = None,
+    year: Optional[int] = None
+) -> Optional[float]:
+    """Calcula a redução de carbono aproximada em kg CO2e (apenas se eficiente)"""
+    if not is_eco:
+        return None
+    factor = (table or get_benchmark_table()).carbon_factor(material_type, region, year)
+    return carbon_reduction(quantity, benchmark.excellent_threshold, is_eco, factor)
+
+
+def evaluate_material(
     material: MaterialUsage,
-    company_size: CompanySize
-) -> MaterialAnalysis:
+    company_size: CompanySize,
+    table: Optional[BenchmarkTable] = None,
+    region: Optional[str] = None,
+    year: Optional[int] = None
+) -> MaterialResult:
     """
-    Analisa um material específico
+    Analisa um material específico, sem montar modelos Pydantic
     
     Args:
         material: Informações do material
         company_size: Tamanho da empresa
+        table: Tabela de benchmarks (padrão: tabela ativa)
+        region: Região da empresa (conjunto de fatores de emissão)
+        year: Ano de referência dos fatores de emissão
         
     Returns:
-        Análise do material
+        Resultado interno da análise do material
     """
-    benchmark = get_benchmark(company_size, material.type)
-    efficiency = calculate_efficiency_percentage(material.quantity, benchmark)
+    table = table or get_benchmark_table()
+    benchmark = get_benchmark(company_size, material.type, table)
+    efficiency = float(calculate_efficiency_percentage(material.quantity, benchmark))
     is_eco = is_eco_efficient(material.quantity, benchmark)
     
-    # Calcular redução de carbono aproximada (se eficiente)
-    carbon_reduction = None
-    if is_eco:
-        excess_over_excellent = material.quantity - benchmark.excellent_threshold
-        if excess_over_excellent < 0:
-            # Está abaixo do threshold excelente
-            material_types = {
-                MaterialType.LATAO: 2.5,  # kg CO2 por kg de latão
-                MaterialType.AGUA: 0.001,
-                MaterialType.PAPEL: 1.8,
-                MaterialType.PLASTICO: 2.5,
-                MaterialType.ENERGIA: 0.5
-            }
-            carbon_per_unit = material_types.get(material.type, 1.0)
-            carbon_reduction = abs(excess_over_excellent) * carbon_per_unit * 1000  # Converter para kg
-    
-    analysis = MaterialAnalysis(
+    return MaterialResult(
         material_type=material.type,
         proposed_quantity=material.quantity,
         company_size=company_size,
         benchmark=benchmark,
         is_eco_efficient=is_eco,
         efficiency_percentage=efficiency,
-        carbon_footprint_reduction=carbon_reduction,
-        recommendation=""
+        carbon_footprint_reduction=calculate_carbon_reduction(
+            material.type, material.quantity, benchmark, is_eco, table, region, year
+        ),
+        recommendation=recommendation_for(material.type, material.quantity, efficiency, benchmark)
     )
+
+
+def analyze_material(
+    material: MaterialUsage,
+    company_size: CompanySize,
+    table: Optional[BenchmarkTable] = None
+) -> MaterialAnalysis:
+    """
+    Analisa um material específico
     
-    # Gerar recomendação
-    analysis.recommendation = generate_recommendation(analysis)
-    
-    return analysis
+    Args:
+        material: Informações do material
+        company_size: Tamanho da empresa
+        table: Tabela de benchmarks (padrão: tabela ativa)
+        
+    Returns:
+        Análise do material
+    """
+    return to_material_analysis(evaluate_material(material, company_size, table))
 
 
-def calculate_sustainability_score(analyses: List[MaterialAnalysis]) -> float:
+def calculate_sustainability_score(analyses: List[MaterialResult]) -> float:
     """Calcula o score geral de sustentabilidade"""
     if not analyses:
         return 0
@@ -326,36 +205,44 @@ def calculate_sustainability_score(analyses: List[MaterialAnalysis]) -> float:
     return total_score / len(analyses)
 
 
-def generate_overall_recommendation(score: float) -> str:
-    """Gera uma recomendação geral baseada no score"""
+def overall_recommendation_for(score: float) -> Message:
+    """Gera a recomendação geral (código do catálogo) baseada no score"""
     if score >= 80:
-        return "Excelente! Sua empresa demonstra alto comprometimento com sustentabilidade."
+        return OVERALL_MESSAGES[OVERALL_EXCELLENT]
     elif score >= 60:
-        return "Bom desempenho. Continue otimizando para alcançar excelência."
+        return OVERALL_MESSAGES[OVERALL_GOOD]
     elif score >= 40:
-        return "Performance moderada. Há oportunidades significativas de melhoria."
+        return OVERALL_MESSAGES[OVERALL_MODERATE]
     else:
-        return "Atenção necessária. Implemente práticas mais sustentáveis urgentemente."
+        return OVERALL_MESSAGES[OVERALL_ATTENTION]
 
 
-def generate_improvements(analyses: List[MaterialAnalysis]) -> List[str]:
-    """Gera lista de melhorias sugeridas"""
+def generate_overall_recommendation(score: float) -> str:
+    """Gera uma recomendação geral baseada no score"""
+    return render_text(overall_recommendation_for(score))
+
+
+def improvements_for(analyses: List[MaterialResult]) -> List[Message]:
+    """Gera a lista de melhorias sugeridas (códigos do catálogo)"""
     improvements = []
     
     for analysis in analyses:
         if not analysis.is_eco_efficient:
             excess = analysis.proposed_quantity - analysis.benchmark.recommended_max
-            improvements.append(
-                f"Reduzir {analysis.material_type.value} em {excess:.2f} unidades para atingir o padrão recomendado"
-            )
+            improvements.append(reduce_message(analysis.material_type, excess))
     
     if not improvements:
-        improvements.append("Manter os padrões atuais e continuar monitorando")
+        improvements.append(MAINTAIN_MESSAGE)
     
     return improvements
 
 
-def calculate_potential_savings(analyses: List[MaterialAnalysis]) -> float:
+def generate_improvements(analyses: List[MaterialResult]) -> List[str]:
+    """Gera lista de melhorias sugeridas"""
+    return [render_text(message) for message in improvements_for(analyses)]
+
+
+def calculate_potential_savings(analyses: List[MaterialResult]) -> float:
     """Calcula economia potencial em toneladas equivalentes"""
     if not analyses:
         return 0
@@ -370,49 +257,99 @@ def calculate_potential_savings(analyses: List[MaterialAnalysis]) -> float:
     return total_savings
 
 
-def analyze_sustainability(
+def summarize_analysis(
     company: CompanyData,
-    proposed_materials: List[MaterialUsage]
-) -> SustainabilityAnalysisResponse:
+    materials_analysis: List[MaterialResult],
+    table: BenchmarkTable,
+    timer: PhaseTimer
+) -> AnalysisResult:
     """
-    Função principal para análise de sustentabilidade
+    Calcula os indicadores gerais a partir das análises dos materiais
     
     Args:
         company: Dados da empresa
-        proposed_materials: Lista de materiais propostos
+        materials_analysis: Resultados por material
+        table: Tabela de benchmarks usada nos resultados
+        timer: Acumulador do tempo de cada fase
         
     Returns:
-        Análise completa de sustentabilidade
+        Resultado interno completo
     """
-    # Analisar cada material
-    materials_analysis = [
-        analyze_material(material, company.size)
-        for material in proposed_materials
-    ]
-    
     # Calcular score geral
-    overall_score = calculate_sustainability_score(materials_analysis)
+    overall_score = float(calculate_sustainability_score(materials_analysis))
     
     # Determinar se é geralmente eficiente
     is_eco = all(analysis.is_eco_efficient for analysis in materials_analysis)
+    timer.lap(PHASE_SCORE)
     
     # Gerar recomendação geral
-    overall_recommendation = generate_overall_recommendation(overall_score)
+    overall_recommendation = overall_recommendation_for(overall_score)
+    timer.lap(PHASE_RECOMMENDATION)
     
     # Calcular economias potenciais
     potential_savings = calculate_potential_savings(materials_analysis)
     
     # Gerar melhorias sugeridas
-    improvements = generate_improvements(materials_analysis)
+    improvements = improvements_for(materials_analysis)
+    timer.lap(PHASE_IMPROVEMENTS)
     
-    return SustainabilityAnalysisResponse(
+    return AnalysisResult(
         company=company,
         materials_analysis=materials_analysis,
         overall_score=overall_score,
         overall_recommendation=overall_recommendation,
         is_eco_efficient=is_eco,
-        potential_savings=potential_savings if potential_savings > 0 else None,
-        improvements=improvements
+        potential_savings=float(potential_savings) if potential_savings > 0 else None,
+        improvements=improvements,
+        benchmarks_version=table.version
     )
 
 
+def evaluate_sustainability(
+    company: CompanyData,
+    proposed_materials: List[MaterialUsage],
+    table: Optional[BenchmarkTable] = None
+) -> AnalysisResult:
+    """
+    Análise de sustentabilidade sobre a representação interna
+    
+    Args:
+        company: Dados da empresa
+        proposed_materials: Lista de materiais propostos
+        table: Tabela de benchmarks (padrão: tabela ativa)
+        
+    Returns:
+        Resultado interno; use `app.utils.serialization` para convertê-lo
+    """
+    timer = PhaseTimer()
+    
+    # Usar a mesma tabela para todos os materiais, mesmo durante uma troca
+    table = table or get_benchmark_table()
+    
+    # Analisar cada material
+    materials_analysis = [
+        evaluate_material(material, company.size, table, company.region, company.reference_year)
+        for material in proposed_materials
+    ]
+    timer.lap(PHASE_MATERIALS)
+    
+    result = summarize_analysis(company, materials_analysis, table, timer)
+    timer.observe()
+    return result
+
+
+def analyze_sustainability(
+    company: CompanyData,
+    proposed_materials: List[MaterialUsage]
+) -> SustainabilityAnalysisResponse:
+    """
+    Função principal para análise de sustentabilidade
+    
+    Args:
+        company: Dados da empresa
+        proposed_materials: Lista de materiais propostos
+        
+    Returns:
+        Análise completa de sustentabilidade
+    """
+    return to_response_model(evaluate_sustainability(company, proposed_materials))
@@ -0,0 +1,112 @@
+"""
+Curvas de eficiência e carbono sobre grades de quantidades
+
+Todas as curvas de um tamanho de empresa são avaliadas em uma única chamada
+vetorizada e retornadas como arrays compactos. Como as funções são lineares
+por partes, a curva pode ser reduzida aos pontos de quebra (excelente,
+recomendado, médio e médio + 80, onde a eficiência chega a 0) sem perder
+informação: basta interpolar linearmente entre eles.
+"""
+import math
+from typing import List, Optional
+
+import numpy as np
+
+from app.schemas.sustainability import CompanySize, MaterialType
+from app.utils.benchmarks import (
+    AVERAGE,
+    EXCELLENT,
+    MATERIAL_INDEX,
+    RECOMMENDED,
+    SIZE_INDEX,
+    BenchmarkTable,
+    get_benchmark_table,
+)
+from app.utils.emission_factors import carbon_reduction_array
+from app.utils.vectorized import efficiency_percentage_array, is_eco_efficient_array
+
+
+def _optional(values: np.ndarray) -> List[Optional[float]]:
+    return [value if not math.isnan(value) else None for value in values.tolist()]
+
+
+def sweep_curves(
+    company_size: CompanySize,
+    materials: Optional[List[MaterialType]] = None,
+    min_quantity: float = 0.0,
+    max_quantity: Optional[float] = None,
+    points: int = 500,
+    breakpoints_only: bool = False,
+    table: Optional[BenchmarkTable] = None
+) -> dict:
+    """
+    Avalia eficiência e redução de carbono sobre uma grade de quantidades
+
+    Args:
+        company_size: Tamanho da empresa
+        materials: Materiais (padrão: todos)
+        min_quantity: Início da grade
+        max_quantity: Fim da grade (padrão, por material: o maior entre o
+            dobro do uso médio e o ponto onde a eficiência chega a 0)
+        points: Pontos da grade por material
+        breakpoints_only: Retornar apenas os extremos e os pontos de quebra
+            dentro do intervalo
+        table: Tabela de benchmarks (padrão: tabela ativa)
+
+    Returns:
+        Estrutura no formato de `SweepResponse`
+    """
+    table = table or get_benchmark_table()
+    materials = list(materials or MaterialType)
+    benchmarks = table.values[SIZE_INDEX[company_size], [MATERIAL_INDEX[m] for m in materials]]
+    average = benchmarks[:, AVERAGE]
+
+    if max_quantity is None:
+        stops = np.maximum(2 * average, average + 80)
+    else:
+        stops = np.full(len(materials), float(max_quantity))
+    stops = np.maximum(stops, min_quantity)
+
+    if breakpoints_only:
+        grids = []
+        for benchmark, stop in zip(benchmarks, stops):
+            breaks = np.array([min_quantity, *benchmark, benchmark[AVERAGE] + 80, stop])
+            grids.append(np.unique(breaks[(breaks >= min_quantity) & (breaks <= stop)]))
+    else:
+        grids = list(np.linspace(min_quantity, stops, points, axis=1))
+
+    # Todas as curvas em uma única avaliação vetorizada
+    counts = [grid.size for grid in grids]
+    rows = np.repeat(np.arange(len(materials)), counts)
+    quantity = np.concatenate(grids)
+    row_benchmarks = benchmarks[rows]
+    efficiency = efficiency_percentage_array(
+        quantity, row_benchmarks[:, EXCELLENT], row_benchmarks[:, RECOMMENDED], row_benchmarks[:, AVERAGE]
+    )
+    is_eco = is_eco_efficient_array(quantity, row_benchmarks[:, RECOMMENDED])
+    carbon = carbon_reduction_array(
+        quantity,
+        row_benchmarks[:, EXCELLENT],
+        is_eco,
+        table.carbon_factors[[MATERIAL_INDEX[m] for m in materials]][rows],
+    )
+
+    splits = np.cumsum(counts)[:-1]
+    curves = [
+        {
+            "material_type": material_type.value,
+            "recommended_max": float(benchmarks[i, RECOMMENDED]),
+            "quantity": material_quantity.tolist(),
+            "efficiency_percentage": material_efficiency.tolist(),
+            "carbon_footprint_reduction": _optional(material_carbon),
+        }
+        for i, (material_type, material_quantity, material_efficiency, material_carbon) in enumerate(zip(
+            materials, np.split(quantity, splits), np.split(efficiency, splits), np.split(carbon, splits)
+        ))
+    ]
+
+    return {
+        "company_size": company_size.value,
+        "benchmarks_version": table.version,
+        "curves": curves,
+    }
@@ -0,0 +1,254 @@
+"""
+Solução analítica do problema inverso: quantidade para atingir um score
+
+`calculate_efficiency_percentage` é linear por partes e não crescente na
+quantidade, então a maior quantidade com eficiência >= alvo tem forma fechada
+em cada faixa:
+
+- alvo em (80, 100]: (100 - alvo) * excelente / 20
+- alvo em (60, 80]: excelente + (80 - alvo) * (recomendado - excelente) / 20
+- alvo em (40, 60]: recomendado + (60 - alvo) * (médio - recomendado) / 20
+- alvo em (0, 40]: médio + (40 - alvo) * 2
+- alvo 0: qualquer quantidade (ilimitado)
+
+Para a empresa, todas as quantidades são multiplicadas por um mesmo fator s.
+O score médio em função de s é linear entre os pontos de quebra de cada
+material (excelente/q, recomendado/q, médio/q, (médio + 80)/q), então basta
+calcular a reta de cada trecho e interpolar no trecho onde o alvo é cruzado.
+"""
+import math
+from typing import List, Optional
+
+import numpy as np
+
+from app.schemas.sustainability import CompanyData, MaterialUsage
+from app.utils.benchmarks import (
+    AVERAGE,
+    EXCELLENT,
+    MATERIAL_INDEX,
+    RECOMMENDED,
+    SIZE_INDEX,
+    BenchmarkTable,
+    get_benchmark_table,
+)
+from app.utils.vectorized import efficiency_percentage_array
+
+
+def max_quantity_for_targets(
+    targets: np.ndarray,
+    excellent: np.ndarray,
+    recommended: np.ndarray,
+    average: np.ndarray,
+) -> np.ndarray:
+    """
+    Maior quantidade de cada material com eficiência >= cada alvo
+
+    Args:
+        targets: Alvos de eficiência (k,), entre 0 e 100
+        excellent: Threshold de excelência de cada material (n,)
+        recommended: Consumo máximo recomendado de cada material (n,)
+        average: Uso médio do setor de cada material (n,)
+
+    Returns:
+        Matriz (n, k); `inf` quando qualquer quantidade atinge o alvo
+    """
+    t = np.asarray(targets, dtype=np.float64)[None, :]
+    e = np.asarray(excellent, dtype=np.float64)[:, None]
+    r = np.asarray(recommended, dtype=np.float64)[:, None]
+    a = np.asarray(average, dtype=np.float64)[:, None]
+
+    return np.select(
+        [t > 80, t > 60, t > 40, t > 0],
+        [
+            (100 - t) * e / 20,
+            e + (80 - t) * (r - e) / 20,
+            r + (60 - t) * (a - r) / 20,
+            a + (40 - t) * 2,
+        ],
+        np.inf,
+    )
+
+
+def _mean_efficiency(
+    scales: np.ndarray,
+    quantity: np.ndarray,
+    excellent: np.ndarray,
+    recommended: np.ndarray,
+    average: np.ndarray,
+) -> np.ndarray:
+    """Score médio da empresa para cada fator de escala, somado na ordem de `calculate_sustainability_score`"""
+    efficiency = efficiency_percentage_array(
+        scales[:, None] * quantity[None, :], excellent[None, :], recommended[None, :], average[None, :]
+    )
+    return np.cumsum(efficiency, axis=1)[:, -1] / quantity.size
+
+
+def _scale_breaks(limit: np.ndarray, quantity: np.ndarray) -> np.ndarray:
+    """
+    Maior fator s com s * quantidade <= limite em ponto flutuante
+
+    `limite / quantidade` pode ficar um ulp acima do ponto exato, o que
+    jogaria o material na faixa seguinte, 20 pontos abaixo.
+    """
+    scales = limit / quantity
+    for _ in range(2):
+        scales = np.where(scales * quantity > limit, np.nextafter(scales, 0), scales)
+    return scales
+
+
+def _band_efficiency(
+    x: np.ndarray,
+    band: np.ndarray,
+    excellent: np.ndarray,
+    recommended: np.ndarray,
+    average: np.ndarray,
+) -> np.ndarray:
+    """Eficiência pela fórmula linear de uma faixa fixa, mesmo fora dela"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.choose(band, [
+            np.where(excellent > 0, 100 - x / excellent * 20, 100.0),
+            80 - (x - excellent) / (recommended - excellent) * 20,
+            60 - (x - recommended) / (average - recommended) * 20,
+            40 - (x - average) / 10 * 5,
+            np.zeros_like(x),
+        ])
+
+
+def company_scale_for_targets(
+    targets: np.ndarray,
+    quantity: np.ndarray,
+    excellent: np.ndarray,
+    recommended: np.ndarray,
+    average: np.ndarray,
+) -> np.ndarray:
+    """
+    Maior fator s aplicado a todas as quantidades com score médio >= cada alvo
+
+    A faixa de cada material em cada trecho é decidida no meio do trecho, e o
+    score nas pontas sai da reta dessa faixa; o score nunca é avaliado sobre um
+    ponto de quebra, onde faixas degeneradas (largura zero) criam saltos. O
+    custo é proporcional a (4n)² para n materiais.
+
+    Args:
+        targets: Alvos de score (k,), entre 0 e 100
+        quantity: Quantidades propostas (n,)
+        excellent, recommended, average: Benchmarks de cada material (n,)
+
+    Returns:
+        Fatores (k,); `inf` quando o alvo vale para qualquer escala
+    """
+    targets = np.asarray(targets, dtype=np.float64)
+    quantity = np.asarray(quantity, dtype=np.float64)
+    if quantity.size == 0:
+        # Sem materiais o score é 0 para qualquer escala
+        return np.where(targets <= 0, np.inf, np.nan)
+
+    positive = quantity > 0
+    q = quantity[positive]
+    breaks = np.unique(np.concatenate([
+        [0.0],
+        _scale_breaks(excellent[positive], q),
+        _scale_breaks(recommended[positive], q),
+        _scale_breaks(average[positive], q),
+        _scale_breaks(average[positive] + 80, q),
+    ]))
+
+    # Score em s = 0 e limites de cada trecho (entre pontos de quebra é linear)
+    at_breaks = _mean_efficiency(breaks[:1], quantity, excellent, recommended, average)
+    start, end = breaks[:-1, None], breaks[1:, None]
+    x_mid = (start + end) / 2 * quantity
+    band = np.select(
+        [x_mid <= excellent, x_mid <= recommended, x_mid <= average, x_mid <= average + 80], [0, 1, 2, 3], 4
+    )
+    right_limit = _band_efficiency(start * quantity, band, excellent, recommended, average).mean(axis=1)
+    # O score é contínuo à esquerda (faixas usam <=): no ponto de quebra vale o limite do trecho anterior
+    left_limit = _band_efficiency(end * quantity, band, excellent, recommended, average).mean(axis=1)
+    at_breaks = np.concatenate([at_breaks, left_limit])
+
+    # Último ponto de quebra com score >= alvo (o score é não crescente)
+    k = np.searchsorted(-at_breaks, -targets, side="right") - 1
+    scales = np.full(targets.shape, np.nan)
+
+    unbounded = k == breaks.size - 1
+    scales[unbounded] = np.inf
+
+    inner = (k >= 0) & ~unbounded
+    ki = k[inner]
+    start, end = breaks[ki], breaks[ki + 1]
+    high, low = right_limit[ki], left_limit[ki]
+    t = targets[inner]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        crossing = start + (high - t) / (high - low) * (end - start)
+    crossing = np.where(high < t, start, np.clip(crossing, start, end))
+
+    # A interpolação pode ficar alguns ulps acima do ponto exato; recua, com
+    # passos que dobram a cada tentativa, até o alvo valer
+    step = np.spacing(crossing)
+    for _ in range(64):
+        short = _mean_efficiency(crossing, quantity, excellent, recommended, average) < t
+        if not short.any():
+            break
+        crossing = np.where(short, np.maximum(crossing - step, start), crossing)
+        step *= 2
+    scales[inner] = crossing
+    return scales
+
+
+def _optional(values: np.ndarray) -> List[Optional[float]]:
+    return [value if math.isfinite(value) else None for value in values.tolist()]
+
+
+def target_quantities(
+    company: CompanyData,
+    proposed_materials: List[MaterialUsage],
+    targets: List[float],
+    table: Optional[BenchmarkTable] = None
+) -> dict:
+    """
+    Calcula, para cada alvo, as quantidades máximas por material e para a empresa
+
+    Args:
+        company: Dados da empresa
+        proposed_materials: Materiais propostos
+        targets: Alvos de score (0-100)
+        table: Tabela de benchmarks (padrão: tabela ativa)
+
+    Returns:
+        Estrutura no formato de `TargetQuantitiesResponse`; `null` indica
+        que qualquer quantidade atinge o alvo
+    """
+    table = table or get_benchmark_table()
+    n = len(proposed_materials)
+    material_idx = np.fromiter((MATERIAL_INDEX[m.type] for m in proposed_materials), dtype=np.intp, count=n)
+    quantity = np.fromiter((m.quantity for m in proposed_materials), dtype=np.float64, count=n)
+    rows = table.values[SIZE_INDEX[company.size], material_idx]
+    excellent, recommended, average = rows[:, EXCELLENT], rows[:, RECOMMENDED], rows[:, AVERAGE]
+    target_array = np.asarray(targets, dtype=np.float64)
+
+    max_quantity = max_quantity_for_targets(target_array, excellent, recommended, average)
+    reduction = np.maximum(quantity[:, None] - max_quantity, 0.0)
+    efficiency = efficiency_percentage_array(quantity, excellent, recommended, average)
+
+    scales = company_scale_for_targets(target_array, quantity, excellent, recommended, average)
+    # Unidades diferem entre materiais, então a redução da empresa é percentual
+    company_reduction = np.where(np.isfinite(scales), np.maximum(1 - scales, 0.0) * 100, 0.0)
+    current_score = float(sum(efficiency.tolist()) / n) if n else 0.0
+
+    return {
+        "targets": target_array.tolist(),
+        "materials": [
+            {
+                "material_type": material.type.value,
+                "proposed_quantity": material.quantity,
+                "efficiency_percentage": efficiency_value,
+                "max_quantity": _optional(max_quantity[i]),
+                "required_reduction": reduction[i].tolist(),
+            }
+            for i, (material, efficiency_value) in enumerate(zip(proposed_materials, efficiency.tolist()))
+        ],
+        "company": {
+            "overall_score": current_score,
+            "scale": _optional(scales),
+            "required_reduction_percentage": company_reduction.tolist(),
+        },
+    }
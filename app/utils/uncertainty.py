@@ -0,0 +1,194 @@
+"""
+Análise de incerteza (Monte Carlo) das quantidades informadas
+
+Quantidades estimadas podem trazer um desvio padrão (`std_dev`, distribuição
+normal truncada em 0) ou uma faixa (`quantity_min`/`quantity_max`,
+distribuição uniforme). Cada material recebe N amostras, e todas são
+avaliadas de uma vez com as versões vetorizadas de
+`calculate_efficiency_percentage` e `is_eco_efficient`.
+
+As amostras são geradas em blocos de `MONTE_CARLO_CHUNK`, cada um com uma
+semente derivada da semente do request (`SeedSequence.spawn`). O resultado
+para uma mesma semente é o mesmo com os blocos avaliados em sequência ou
+distribuídos entre os processos do pool.
+
+Cada bloco já sai reduzido ao que o resumo precisa: somas e desvios
+quadráticos para média e desvio, contagens de amostras eficientes e só a
+matriz de eficiências (com o score geral) para os percentis. O tamanho total
+(materiais x amostras) é limitado por `MONTE_CARLO_MAX_SAMPLES`.
+"""
+import secrets
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.schemas.sustainability import CompanyData, CompanySize, MaterialUsage
+from app.utils.benchmarks import (
+    AVERAGE,
+    EXCELLENT,
+    MATERIAL_INDEX,
+    RECOMMENDED,
+    SIZE_INDEX,
+    BenchmarkTable,
+    get_benchmark_table,
+)
+from app.utils.vectorized import efficiency_percentage_array, is_eco_efficient_array
+
+
+MONTE_CARLO_CHUNK = 25_000
+
+# (eficiências com o score geral na última linha, somas, desvios quadráticos, amostras eficientes)
+Chunk = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+
+def monte_carlo_chunks(samples: int, seed: Optional[int] = None) -> Tuple[int, List[Tuple[int, np.random.SeedSequence]]]:
+    """
+    Divide as amostras em blocos com sementes independentes
+
+    Args:
+        samples: Total de amostras por material
+        seed: Semente do request (padrão: aleatória)
+
+    Returns:
+        (semente usada, [(amostras do bloco, semente do bloco), ...])
+    """
+    if seed is None:
+        seed = secrets.randbits(63)
+    sequence = np.random.SeedSequence(seed)
+    sizes = [MONTE_CARLO_CHUNK] * (samples // MONTE_CARLO_CHUNK)
+    if samples % MONTE_CARLO_CHUNK:
+        sizes.append(samples % MONTE_CARLO_CHUNK)
+    return seed, list(zip(sizes, sequence.spawn(len(sizes))))
+
+
+def sample_quantities(
+    materials: List[MaterialUsage],
+    samples: int,
+    rng: np.random.Generator
+) -> np.ndarray:
+    """
+    Sorteia as quantidades de cada material
+
+    Returns:
+        Matriz (materiais, amostras); materiais sem incerteza repetem a quantidade
+    """
+    quantity = np.empty((len(materials), samples))
+    for i, material in enumerate(materials):
+        if material.std_dev:
+            quantity[i] = np.maximum(rng.normal(material.quantity, material.std_dev, samples), 0.0)
+        elif material.quantity_min is not None:
+            quantity[i] = rng.uniform(material.quantity_min, material.quantity_max, samples)
+        else:
+            quantity[i] = material.quantity
+    return quantity
+
+
+def simulate_chunk(
+    company_size: CompanySize,
+    materials: List[MaterialUsage],
+    samples: int,
+    seed_sequence: np.random.SeedSequence,
+    table: Optional[BenchmarkTable] = None
+) -> Chunk:
+    """
+    Avalia um bloco de amostras
+
+    Returns:
+        (eficiências (materiais + 1, amostras), somas, desvios quadráticos e
+        contagens de amostras eficientes (materiais + 1,)); a última linha é o
+        score geral, eficiente quando todos os materiais da amostra são
+    """
+    table = table or get_benchmark_table()
+    material_idx = np.fromiter((MATERIAL_INDEX[m.type] for m in materials), dtype=np.intp, count=len(materials))
+    benchmarks = table.values[SIZE_INDEX[company_size], material_idx]
+
+    quantity = sample_quantities(materials, samples, np.random.default_rng(seed_sequence))
+    efficiency = efficiency_percentage_array(
+        quantity,
+        benchmarks[:, EXCELLENT, None],
+        benchmarks[:, RECOMMENDED, None],
+        benchmarks[:, AVERAGE, None],
+    )
+    is_eco = is_eco_efficient_array(quantity, benchmarks[:, RECOMMENDED, None])
+
+    values = np.vstack([efficiency, efficiency.mean(axis=0)])
+    sums = values.sum(axis=1)
+    squares = ((values - (sums / samples)[:, None]) ** 2).sum(axis=1)
+    eco = np.append(is_eco.sum(axis=1), is_eco.all(axis=0).sum())
+    return values, sums, squares, eco
+
+
+def summarize_uncertainty(
+    materials: List[MaterialUsage],
+    seed: int,
+    percentiles: List[float],
+    chunks: List[Chunk],
+    table: Optional[BenchmarkTable] = None
+) -> dict:
+    """
+    Junta os blocos e calcula média, desvio, percentis e probabilidade de eficiência
+
+    Média e desvio combinam as somas de cada bloco; só os percentis precisam
+    das amostras, copiadas uma vez para uma matriz ordenada no lugar.
+
+    Returns:
+        Estrutura no formato de `UncertaintyAnalysisResponse`
+    """
+    table = table or get_benchmark_table()
+    # Linhas: materiais e, por último, o score geral de cada amostra
+    sizes = np.array([chunk[0].shape[1] for chunk in chunks], dtype=np.float64)
+    total = int(sizes.sum())
+    sums = np.array([chunk[1] for chunk in chunks])
+    chunk_means = sums / sizes[:, None]
+    mean = sums.sum(axis=0) / total
+    squares = sum(chunk[2] for chunk in chunks) + (sizes[:, None] * (chunk_means - mean) ** 2).sum(axis=0)
+    std = np.sqrt(squares / total)
+    probability = sum(chunk[3] for chunk in chunks) / total
+
+    values = np.concatenate([chunk[0] for chunk in chunks], axis=1)
+    quantiles = np.percentile(values, percentiles, axis=1, overwrite_input=True).T.tolist()
+    mean, std, probability = mean.tolist(), std.tolist(), probability.tolist()
+
+    summaries = [
+        {"mean": mean[i], "std": std[i], "percentiles": quantiles[i], "probability_eco_efficient": probability[i]}
+        for i in range(len(mean))
+    ]
+    return {
+        "samples": total,
+        "seed": seed,
+        "benchmarks_version": table.version,
+        "percentiles": list(percentiles),
+        "overall_score": summaries[-1],
+        "materials": [
+            {"material_type": material.type.value, "proposed_quantity": material.quantity, **summary}
+            for material, summary in zip(materials, summaries)
+        ],
+    }
+
+
+def simulate_uncertainty(
+    company: CompanyData,
+    materials: List[MaterialUsage],
+    samples: int,
+    percentiles: List[float],
+    seed: Optional[int] = None,
+    table: Optional[BenchmarkTable] = None
+) -> dict:
+    """
+    Executa a simulação completa no processo atual
+
+    Args:
+        company: Dados da empresa
+        materials: Materiais propostos, com incerteza opcional
+        samples: Amostras por material
+        percentiles: Percentis retornados (0-100)
+        seed: Semente (padrão: aleatória)
+        table: Tabela de benchmarks (padrão: tabela ativa)
+
+    Returns:
+        Estrutura no formato de `UncertaintyAnalysisResponse`
+    """
+    table = table or get_benchmark_table()
+    seed, plan = monte_carlo_chunks(samples, seed)
+    chunks = [simulate_chunk(company.size, materials, size, sequence, table) for size, sequence in plan]
+    return summarize_uncertainty(materials, seed, percentiles, chunks, table)
@@ -0,0 +1,290 @@
+"""
+Análise de planilhas enviadas por upload (CSV ou Parquet)
+
+Cada linha da planilha é um material de uma empresa. Linhas consecutivas com o
+mesmo `company_id` formam uma empresa, e os dados da empresa (`size`,
+`employees`, `industry`) vêm da primeira linha do grupo:
+
+    company_id,size,employees,industry,material_type,quantity
+    1,media,100,Manufatura,latao,8.5
+    1,media,100,Manufatura,agua,850
+
+Colunas opcionais: `unit`, `std_dev`, `quantity_min`, `quantity_max` (do
+material) e `region`, `reference_year` (da empresa, para os fatores de emissão).
+
+O arquivo é lido em blocos de `UPLOAD_CHUNK_ROWS` linhas (o upload fica em
+um arquivo temporário, não na memória), e cada bloco de empresas completas
+vai direto para o caminho vetorizado. Linhas inválidas geram um erro com o
+número da linha (o cabeçalho é a linha 1) e são ignoradas, sem interromper o
+restante do arquivo.
+"""
+import csv
+import io
+import json
+from typing import Any, AsyncIterator, BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.schemas.sustainability import CompanyData, MaterialUsage, SustainabilityCalculationRequest
+from app.utils.benchmarks import BenchmarkTable, get_benchmark_table
+from app.utils.executor import analysis_executor
+from app.utils.formats import optional_module
+from app.utils.history import HISTORY_NDJSON, history_writer
+from app.utils.messages import DEFAULT_LOCALE
+from app.utils.serialization import dump_json, render_analysis
+from app.utils.streaming import format_validation_error
+from app.utils.vectorized import analyze_batch
+
+
+REQUIRED_COLUMNS = ("company_id", "size", "employees", "industry", "material_type", "quantity")
+MATERIAL_COLUMNS = {
+    "material_type": "type",
+    "quantity": "quantity",
+    "unit": "unit",
+    "std_dev": "std_dev",
+    "quantity_min": "quantity_min",
+    "quantity_max": "quantity_max",
+}
+COMPANY_COLUMNS = {
+    "size": "size",
+    "employees": "employees",
+    "industry": "industry",
+    "region": "region",
+    "reference_year": "reference_year",
+}
+
+UPLOAD_CSV = "csv"
+UPLOAD_PARQUET = "parquet"
+
+# (primeira linha, última linha, company_id, request) ou (linha, mensagem de erro)
+UploadEntry = Union[Tuple[int, int, str, SustainabilityCalculationRequest], Tuple[int, str]]
+
+
+class UploadFormatError(ValueError):
+    """Arquivo que não pode ser lido como planilha de análise"""
+
+
+def upload_format(filename: Optional[str], content_type: Optional[str]) -> Optional[str]:
+    """Identifica o formato do upload pela extensão ou pelo content type"""
+    name = (filename or "").lower()
+    content_type = (content_type or "").lower()
+    if name.endswith(".parquet") or "parquet" in content_type:
+        return UPLOAD_PARQUET
+    if name.endswith(".csv") or content_type in ("text/csv", "application/csv"):
+        return UPLOAD_CSV
+    return None
+
+
+def _check_columns(columns: List[str]) -> None:
+    missing = [column for column in REQUIRED_COLUMNS if column not in columns]
+    if missing:
+        raise UploadFormatError(f"Colunas obrigatórias ausentes: {', '.join(missing)}")
+
+
+def _csv_rows(file: BinaryIO) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    reader = csv.reader(text)
+    try:
+        header = [column.strip() for column in next(reader)]
+    except StopIteration:
+        raise UploadFormatError("Arquivo vazio")
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise UploadFormatError(f"CSV inválido: {e}")
+    _check_columns(header)
+    return _csv_records(reader, header)
+
+
+def _csv_records(reader, header: List[str]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    row_no = 1
+    while True:
+        try:
+            values = next(reader)
+        except StopIteration:
+            return
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise UploadFormatError(f"CSV inválido após a linha {row_no}: {e}")
+        row_no += 1
+        if not any(value.strip() for value in values):
+            continue
+        # Células vazias equivalem a colunas ausentes
+        yield row_no, {column: value for column, value in zip(header, values) if value != ""}
+
+
+def _parquet_rows(file: BinaryIO, batch_size: int) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    parquet = optional_module("pyarrow.parquet")
+    if parquet is None:
+        raise UploadFormatError("Upload Parquet requer o pacote pyarrow")
+    try:
+        parquet_file = parquet.ParquetFile(file)
+    except Exception as e:
+        raise UploadFormatError(f"Parquet inválido: {e}")
+    names = parquet_file.schema_arrow.names
+    _check_columns(names)
+    columns = [name for name in names if name in MATERIAL_COLUMNS or name in COMPANY_COLUMNS or name == "company_id"]
+    return _parquet_records(parquet_file, columns, batch_size)
+
+
+def _parquet_records(parquet_file, columns: List[str], batch_size: int) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    row_no = 1
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+        for row in batch.to_pylist():
+            row_no += 1
+            yield row_no, {column: value for column, value in row.items() if value is not None}
+
+
+def count_rows(file: BinaryIO, file_format: str) -> int:
+    """
+    Conta as linhas de dados da planilha (sem o cabeçalho)
+
+    No CSV a contagem é pelas quebras de linha (linhas em branco e campos com
+    quebra de linha entram na conta), então serve como estimativa de progresso.
+    """
+    if file_format == UPLOAD_PARQUET:
+        return optional_module("pyarrow.parquet").ParquetFile(file).metadata.num_rows
+    lines, last = 0, b"\n"
+    for block in iter(lambda: file.read(1 << 20), b""):
+        lines += block.count(b"\n")
+        last = block[-1:]
+    if last != b"\n":
+        lines += 1
+    return max(lines - 1, 0)
+
+
+class UploadReader:
+    """
+    Lê uma planilha em blocos de empresas completas
+
+    A abertura valida o cabeçalho (`UploadFormatError`); depois, cada
+    `read_chunk` consome até ~`chunk_rows` linhas e devolve as empresas
+    completas e os erros de linha, guardando a última empresa até que o
+    próximo bloco mostre que ela terminou.
+    """
+
+    def __init__(self, file: BinaryIO, file_format: str, chunk_rows: Optional[int] = None):
+        self.chunk_rows = chunk_rows or settings.UPLOAD_CHUNK_ROWS
+        if file_format == UPLOAD_PARQUET:
+            self._rows = _parquet_rows(file, self.chunk_rows)
+        else:
+            self._rows = _csv_rows(file)
+        self._group: Optional[list] = None
+        self.rows_read = 0
+        self.finished = False
+
+    def read_chunk(self) -> List[UploadEntry]:
+        """
+        Lê o próximo bloco
+
+        Returns:
+            Empresas completas e erros, na ordem do arquivo (pode ser vazia
+            enquanto uma empresa ocupa o bloco inteiro); `finished` indica o fim
+        """
+        entries: List[UploadEntry] = []
+        for _ in range(self.chunk_rows):
+            item = next(self._rows, None)
+            if item is None:
+                self._close_group(entries)
+                self.finished = True
+                return entries
+            row_no, row = item
+            self.rows_read += 1
+            company_id = str(row.get("company_id", "")).strip()
+            if not company_id:
+                entries.append((row_no, "company_id: campo obrigatório"))
+                continue
+
+            if self._group is not None and self._group[2] != company_id:
+                self._close_group(entries)
+            if self._group is None:
+                try:
+                    company = CompanyData.model_validate(
+                        {field: row[column] for column, field in COMPANY_COLUMNS.items() if column in row}
+                    )
+                except ValidationError as e:
+                    entries.append((row_no, format_validation_error(e)))
+                    continue
+                # [primeira linha, última linha, company_id, empresa, materiais, erros]
+                self._group = [row_no, row_no, company_id, company, [], []]
+
+            try:
+                material = MaterialUsage.model_validate(
+                    {field: row[column] for column, field in MATERIAL_COLUMNS.items() if column in row}
+                )
+            except ValidationError as e:
+                # Sai logo depois da empresa, mantendo a ordem do arquivo
+                self._group[5].append((row_no, format_validation_error(e)))
+                continue
+            self._group[1] = row_no
+            self._group[4].append(material)
+        return entries
+
+    def _close_group(self, entries: List[UploadEntry]) -> None:
+        if self._group is None:
+            return
+        first, last, company_id, company, materials, errors = self._group
+        self._group = None
+        if materials:
+            request = SustainabilityCalculationRequest.model_construct(
+                company=company, proposed_materials=materials, current_materials=None
+            )
+            entries.append((first, last, company_id, request))
+        entries.extend(errors)
+
+
+def analyze_upload_chunk(
+    entries: List[UploadEntry],
+    locale: str = DEFAULT_LOCALE,
+    table: Optional[BenchmarkTable] = None
+) -> bytes:
+    """
+    Analisa as empresas de um bloco e formata a saída NDJSON
+
+    Cada empresa gera `{"company_id": ..., "rows": [primeira, última], "analysis": ...}`
+    e cada linha inválida gera `{"row": n, "error": ...}`, na ordem do arquivo.
+    Uma empresa cuja análise não pode ser serializada (ex.: valores não finitos)
+    gera o erro na sua primeira linha.
+    As mensagens das análises saem em `locale` (ou só os códigos, com `CODES_ONLY`).
+    """
+    table = table or get_benchmark_table()
+    analyses = iter(analyze_batch([entry[3] for entry in entries if len(entry) == 4], table))
+
+    output = []
+    for entry in entries:
+        if len(entry) == 2:
+            output.append(json.dumps({"row": entry[0], "error": entry[1]}, ensure_ascii=False).encode() + b"\n")
+        else:
+            first, last, company_id, _ = entry
+            analysis = next(analyses)
+            try:
+                body = dump_json(render_analysis(analysis, table=table, locale=locale))
+            except ValueError as e:
+                # Ex.: resultado não finito; vira erro da primeira linha da empresa, sem interromper o arquivo
+                output.append(
+                    json.dumps({"row": first, "error": f"Erro ao analisar: {e}"}, ensure_ascii=False).encode() + b"\n"
+                )
+                continue
+            output.append(
+                b'{"company_id":%s,"rows":[%d,%d],"analysis":%s}\n' % (dump_json(company_id), first, last, body)
+            )
+    return b"".join(output)
+
+
+async def analyze_upload(reader: UploadReader, locale: str = DEFAULT_LOCALE) -> AsyncIterator[bytes]:
+    """Analisa o arquivo bloco a bloco, produzindo linhas NDJSON"""
+    while not reader.finished:
+        try:
+            entries = await run_in_threadpool(reader.read_chunk)
+        except UploadFormatError as e:
+            # O cabeçalho já foi aceito: o erro vai no próprio fluxo
+            yield json.dumps({"error": str(e)}, ensure_ascii=False).encode() + b"\n"
+            return
+        if not entries:
+            continue
+
+        requests = [entry[3] for entry in entries if len(entry) == 4]
+        output = await analysis_executor.run(
+            analyze_upload_chunk, entries, locale, size=sum(len(request.proposed_materials) for request in requests)
+        )
+        history_writer.record(HISTORY_NDJSON, [entry[3] if len(entry) == 4 else None for entry in entries], output)
+        yield output
@@ -0,0 +1,243 @@
+"""
+Versões vetorizadas (NumPy) dos cálculos de sustentabilidade
+
+As funções deste módulo reproduzem exatamente a aritmética do caminho escalar
+em `app.utils.sustainability`, mas operam sobre todas as linhas
+(empresa, material) de uma vez.
+"""
+from typing import List, Optional
+
+import numpy as np
+
+from app.models.analysis import AnalysisResult, MaterialResult
+from app.schemas.sustainability import SustainabilityCalculationRequest
+from app.utils.benchmarks import (
+    SIZE_INDEX,
+    MATERIAL_INDEX,
+    EXCELLENT,
+    RECOMMENDED,
+    AVERAGE,
+    BenchmarkTable,
+    get_benchmark_table,
+)
+from app.utils.emission_factors import carbon_reduction_array
+from app.utils.messages import (
+    MAINTAIN_MESSAGE,
+    MATERIAL_EXCELLENT,
+    MATERIAL_GOOD,
+    MATERIAL_MESSAGES,
+    MATERIAL_MODERATE,
+    OVERALL_ATTENTION,
+    OVERALL_EXCELLENT,
+    OVERALL_GOOD,
+    OVERALL_MESSAGES,
+    OVERALL_MODERATE,
+    high_consumption_message,
+    reduce_message,
+)
+from app.utils.metrics import (
+    PHASE_IMPROVEMENTS,
+    PHASE_MATERIALS,
+    PHASE_RECOMMENDATION,
+    PHASE_RECORDS,
+    PHASE_SCORE,
+    PhaseTimer,
+)
+
+# Mensagens por faixa de eficiência (`efficiency_band_array`), como em
+# `recommendation_for` e `overall_recommendation_for`; a faixa 0 dos materiais
+# (alto consumo) depende da quantidade e é montada linha a linha
+MATERIAL_BAND_MESSAGES = (
+    None,
+    MATERIAL_MESSAGES[MATERIAL_MODERATE],
+    MATERIAL_MESSAGES[MATERIAL_GOOD],
+    MATERIAL_MESSAGES[MATERIAL_EXCELLENT],
+)
+OVERALL_BAND_MESSAGES = tuple(
+    OVERALL_MESSAGES[code] for code in (OVERALL_ATTENTION, OVERALL_MODERATE, OVERALL_GOOD, OVERALL_EXCELLENT)
+)
+
+
+def efficiency_percentage_array(
+    quantity: np.ndarray,
+    excellent: np.ndarray,
+    recommended: np.ndarray,
+    average: np.ndarray,
+) -> np.ndarray:
+    """
+    Versão vetorizada de `calculate_efficiency_percentage`
+
+    Args:
+        quantity: Quantidades propostas
+        excellent: Threshold de excelência de cada linha
+        recommended: Consumo máximo recomendado de cada linha
+        average: Uso médio do setor de cada linha
+
+    Returns:
+        Porcentagens de eficiência (0-100)
+    """
+    quantity = np.asarray(quantity, dtype=np.float64)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Excelente performance: 80-100%
+        ratio = np.where(excellent > 0, quantity / excellent, 0.0)
+        excellent_score = np.maximum(80.0, 100 - (ratio * 20))
+
+        # Boa performance: 60-80%
+        range_size = recommended - excellent
+        ratio = (quantity - excellent) / range_size
+        good_score = np.where(range_size <= 0, 70.0, 80 - (ratio * 20))
+
+        # Performance média: 40-60%
+        range_size = average - recommended
+        ratio = (quantity - recommended) / range_size
+        average_score = np.where(range_size <= 0, 50.0, 60 - (ratio * 20))
+
+    # Performance abaixo da média: 0-40%
+    excess = quantity - average
+    reduction = np.minimum(40.0, excess / 10 * 5)
+    below_score = np.maximum(0.0, 40 - reduction)
+
+    return np.select(
+        [quantity <= excellent, quantity <= recommended, quantity <= average],
+        [excellent_score, good_score, average_score],
+        below_score,
+    )
+
+
+def is_eco_efficient_array(quantity: np.ndarray, recommended: np.ndarray) -> np.ndarray:
+    """Versão vetorizada de `is_eco_efficient`"""
+    return np.asarray(quantity, dtype=np.float64) <= recommended
+
+
+def efficiency_band_array(efficiency: np.ndarray) -> np.ndarray:
+    """Faixa de cada eficiência: 0 (< 40), 1 (< 60), 2 (< 80) ou 3"""
+    return np.searchsorted(np.array([40.0, 60.0, 80.0]), efficiency, side="right")
+
+
+def analyze_batch(
+    requests: List[SustainabilityCalculationRequest],
+    table: Optional[BenchmarkTable] = None
+) -> List[AnalysisResult]:
+    """
+    Analisa várias empresas de uma vez
+
+    Os cálculos por material e os indicadores de cada empresa (score,
+    eficiência geral, economia potencial e faixas das recomendações) são
+    feitos como operações de array sobre todas as linhas; apenas a montagem
+    dos registros é feita em Python.
+
+    Args:
+        requests: Lista de requests de análise
+        table: Tabela de benchmarks (padrão: tabela ativa)
+
+    Returns:
+        Resultados internos na mesma ordem dos requests, idênticos aos do
+        caminho escalar (`evaluate_sustainability`)
+    """
+    timer = PhaseTimer()
+    table = table or get_benchmark_table()
+    n_companies = len(requests)
+    counts = np.array([len(request.proposed_materials) for request in requests], dtype=np.intp)
+    company_idx = np.repeat(np.arange(n_companies), counts)
+    sizes = np.repeat(
+        np.array([SIZE_INDEX[request.company.size] for request in requests], dtype=np.intp),
+        counts,
+    )
+    # Conjunto de fatores de emissão de cada empresa (região/ano)
+    emission_factors = table.emission_factors
+    factor_sets = np.repeat(
+        np.array([
+            emission_factors.set_index(request.company.region, request.company.reference_year)
+            for request in requests
+        ], dtype=np.intp),
+        counts,
+    )
+    materials = [
+        material
+        for request in requests
+        for material in request.proposed_materials
+    ]
+    material_idx = np.array([MATERIAL_INDEX[m.type] for m in materials], dtype=np.intp)
+    quantity = np.array([m.quantity for m in materials], dtype=np.float64)
+
+    benchmarks = table.rows(sizes, material_idx)
+    excellent = benchmarks[:, EXCELLENT]
+    recommended = benchmarks[:, RECOMMENDED]
+    average = benchmarks[:, AVERAGE]
+
+    efficiency = efficiency_percentage_array(quantity, excellent, recommended, average)
+    is_eco = is_eco_efficient_array(quantity, recommended)
+    carbon = carbon_reduction_array(quantity, excellent, is_eco, emission_factors.values[factor_sets, material_idx])
+    # Excesso sobre o recomendado: redução sugerida e economia potencial
+    excess = quantity - recommended
+    band = efficiency_band_array(efficiency)
+
+    efficiency_list = efficiency.tolist()
+    is_eco_list = is_eco.tolist()
+    carbon_list = [None if np.isnan(value) else value for value in carbon.tolist()]
+    excess_list = excess.tolist()
+    band_list = band.tolist()
+    timer.lap(PHASE_MATERIALS)
+
+    # Indicadores por empresa: somas em ordem, como no caminho escalar
+    score = np.bincount(company_idx, weights=efficiency, minlength=n_companies) / np.maximum(counts, 1)
+    company_eco = np.bincount(company_idx, weights=~is_eco, minlength=n_companies) == 0
+    savings = np.bincount(
+        company_idx, weights=np.where(~is_eco & (excess > 0), excess, 0.0), minlength=n_companies
+    )
+    score_list = score.tolist()
+    company_eco_list = company_eco.tolist()
+    savings_list = [value if value > 0 else None for value in savings.tolist()]
+    timer.lap(PHASE_SCORE)
+    overall_recommendations = [OVERALL_BAND_MESSAGES[b] for b in efficiency_band_array(score).tolist()]
+    timer.lap(PHASE_RECOMMENDATION)
+
+    # Melhorias: uma por material não eficiente, agrupadas por empresa
+    improvements: List[list] = [[] for _ in range(n_companies)]
+    company_list = company_idx.tolist()
+    for row in np.flatnonzero(~is_eco).tolist():
+        improvements[company_list[row]].append(reduce_message(materials[row].type, excess_list[row]))
+    timer.lap(PHASE_IMPROVEMENTS)
+
+    results = []
+    row = 0
+    for c, request in enumerate(requests):
+        company = request.company
+        size_value = company.size.value
+        materials_analysis = []
+        for material in request.proposed_materials:
+            benchmark = table.benchmark(company.size, material.type)
+            material_band = band_list[row]
+            materials_analysis.append(
+                MaterialResult(
+                    material_type=material.type,
+                    proposed_quantity=material.quantity,
+                    company_size=company.size,
+                    benchmark=benchmark,
+                    is_eco_efficient=is_eco_list[row],
+                    efficiency_percentage=efficiency_list[row],
+                    carbon_footprint_reduction=carbon_list[row],
+                    recommendation=(
+                        MATERIAL_BAND_MESSAGES[material_band][material.type]
+                        if material_band
+                        else high_consumption_message(material.type, excess_list[row], size_value)
+                    ),
+                )
+            )
+            row += 1
+
+        results.append(AnalysisResult(
+            company=company,
+            materials_analysis=materials_analysis,
+            overall_score=score_list[c],
+            overall_recommendation=overall_recommendations[c],
+            is_eco_efficient=company_eco_list[c],
+            potential_savings=savings_list[c],
+            improvements=improvements[c] or [MAINTAIN_MESSAGE],
+            benchmarks_version=table.version,
+        ))
+    timer.lap(PHASE_RECORDS)
+
+    timer.observe()
+    return results
@@ -0,0 +1,121 @@
+"""
+Utilitários de medição e comparação com baselines
+"""
+import json
+import platform
+import statistics
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+BASELINES_DIR = Path(__file__).resolve().parent / "baselines"
+
+# Métrica usada na comparação com a baseline (menor é melhor)
+COMPARED_METRIC = "median_us"
+
+
+def summarize(samples_us: List[float], **extra: float) -> Dict[str, float]:
+    """Resume uma lista de tempos (em microssegundos)"""
+    ordered = sorted(samples_us)
+    summary = {
+        "runs": len(ordered),
+        "min_us": ordered[0],
+        "median_us": statistics.median(ordered),
+        "p95_us": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "mean_us": statistics.fmean(ordered),
+    }
+    summary.update(extra)
+    return summary
+
+
+def measure(fn: Callable[[], object], repeat: int = 7, number: Optional[int] = None) -> Dict[str, float]:
+    """
+    Mede o tempo de `fn`, por chamada
+
+    Args:
+        fn: Função sem argumentos
+        repeat: Número de amostras
+        number: Chamadas por amostra; se omitido, é calibrado para ~20 ms por amostra
+
+    Returns:
+        Resumo com min/mediana/p95/média em microssegundos
+    """
+    fn()  # aquecimento
+    if number is None:
+        number = 1
+        while True:
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            if time.perf_counter() - start >= 0.02 or number >= 100_000:
+                break
+            number *= 2
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number * 1e6)
+    return summarize(samples, calls_per_run=number)
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    threshold_pct: float
+) -> List[str]:
+    """
+    Compara resultados com a baseline
+
+    Returns:
+        Descrição de cada cenário que piorou mais que `threshold_pct` por cento
+    """
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if not reference or not reference.get(COMPARED_METRIC):
+            continue
+        change = (result[COMPARED_METRIC] / reference[COMPARED_METRIC] - 1) * 100
+        if change > threshold_pct:
+            regressions.append(
+                f"{name}: {reference[COMPARED_METRIC]:.1f} -> {result[COMPARED_METRIC]:.1f} us (+{change:.1f}%)"
+            )
+    return regressions
+
+
+def over_budget(results: Dict[str, Dict[str, float]]) -> List[str]:
+    """
+    Verifica os cenários com orçamento (`budget_us`)
+
+    Returns:
+        Descrição de cada cenário cuja métrica comparada passou do orçamento
+    """
+    return [
+        f"{name}: {result[COMPARED_METRIC]:.1f} us > orçamento de {result['budget_us']:.1f} us"
+        for name, result in results.items()
+        if "budget_us" in result and result[COMPARED_METRIC] > result["budget_us"]
+    ]
+
+
+def load_baseline(path: Path) -> Dict[str, Dict[str, float]]:
+    """Carrega os resultados de uma baseline salva"""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["results"]
+
+
+def save_baseline(path: Path, results: Dict[str, Dict[str, float]]) -> None:
+    """Salva resultados como baseline, junto com dados do ambiente"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = {
+        "created_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
@@ -0,0 +1,70 @@
+"""
+Executa a suíte de benchmarks e compara com uma baseline
+
+Uso:
+    python -m benchmarks.run                       # roda e compara com a baseline padrão
+    python -m benchmarks.run --save                # roda e grava a baseline
+    python -m benchmarks.run --suite micro --threshold 10
+
+Sai com código 1 se algum cenário piorar mais que `--threshold` por cento ou
+passar do seu orçamento de tempo (suíte startup). Sem `--save`, também sai com
+código 1 se a baseline não existir, antes de rodar qualquer cenário.
+"""
+import argparse
+import sys
+
+from benchmarks.harness import BASELINES_DIR, COMPARED_METRIC, compare, load_baseline, over_budget, save_baseline
+from benchmarks.scenarios import SUITES
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks de performance da API")
+    parser.add_argument("--suite", action="append", choices=sorted(SUITES), help="Suítes a executar (padrão: todas)")
+    parser.add_argument("--baseline", default=str(BASELINES_DIR / "default.json"), help="Arquivo JSON da baseline")
+    parser.add_argument("--save", action="store_true", help="Grava os resultados como nova baseline")
+    parser.add_argument("--threshold", type=float, default=20.0, help="Piora máxima aceita, em porcentagem")
+    parser.add_argument("--quick", action="store_true", help="Menos repetições e payloads de até 10k materiais")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if not args.save:
+        try:
+            baseline = load_baseline(args.baseline)
+        except FileNotFoundError:
+            print(f"❌ Baseline {args.baseline} não encontrada; rode com --save para criá-la")
+            return 1
+
+    results = {}
+    for name in args.suite or sorted(SUITES):
+        print(f"== {name}")
+        suite_results = SUITES[name](quick=args.quick)
+        for scenario, result in suite_results.items():
+            extra = f"  {result['throughput_rps']:.0f} req/s" if "throughput_rps" in result else ""
+            print(f"{scenario:70s} {result[COMPARED_METRIC]:12.1f} us{extra}")
+        results.update(suite_results)
+
+    exceeded = over_budget(results)
+    if exceeded:
+        print(f"\n❌ {len(exceeded)} cenário(s) passaram do orçamento:")
+        for line in exceeded:
+            print(f"  {line}")
+        return 1
+
+    if args.save:
+        save_baseline(args.baseline, results)
+        print(f"Baseline gravada em {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n❌ {len(regressions)} cenário(s) pioraram mais de {args.threshold:.0f}%:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+
+    print(f"\n✅ Nenhuma regressão acima de {args.threshold:.0f}%")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,303 @@
+"""
+Cenários de benchmark
+
+- micro: funções de cálculo isoladas
+- asgi: vazão e latência de cada rota dos routers, em processo (sem rede)
+- scaling: tempo em função do número de materiais (1 a 100k)
+- startup: partida a frio em processos novos (import, create_app, startup),
+  com um orçamento de tempo por etapa
+"""
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+import httpx
+from fastapi.routing import APIRoute
+
+from app.config import settings
+from app.main import app
+from app.schemas.sustainability import (
+    CompanyData,
+    CompanySize,
+    MaterialType,
+    MaterialUsage,
+    SustainabilityCalculationRequest,
+)
+from app.utils.benchmarks import get_benchmark_table
+from app.utils.history import history_writer
+from app.utils.jobs import job_manager
+from app.utils.serialization import dump_json, render_analysis
+from app.utils.sustainability import (
+    analyze_material,
+    analyze_sustainability,
+    calculate_efficiency_percentage,
+    evaluate_sustainability,
+)
+from app.utils.vectorized import analyze_batch
+from benchmarks.harness import measure, summarize
+
+EXAMPLE_REQUEST = {
+    "company": {"size": "media", "employees": 100, "industry": "Manufatura"},
+    "proposed_materials": [
+        {"type": "latao", "quantity": 8.5, "unit": "toneladas"},
+        {"type": "agua", "quantity": 850, "unit": "toneladas"},
+    ],
+}
+
+# Planilha de 100 empresas do exemplo, uma linha por material
+UPLOAD_CSV = "company_id,size,employees,industry,material_type,quantity\n" + "".join(
+    f"{i},media,100,Manufatura,{material['type']},{material['quantity']}\n"
+    for i in range(100)
+    for material in EXAMPLE_REQUEST["proposed_materials"]
+)
+
+# Request de exemplo para cada rota (método, template do caminho)
+ROUTE_REQUESTS: Dict[Tuple[str, str], Dict] = {
+    ("GET", "/health"): {},
+    ("GET", "/"): {},
+    ("GET", "/metrics"): {},
+    ("POST", "/api/v1/sustainability/analyze"): {"json": EXAMPLE_REQUEST},
+    ("POST", "/api/v1/sustainability/analyze/compare"): {
+        "json": {
+            **EXAMPLE_REQUEST,
+            "current_materials": [{"type": "latao", "quantity": 12}, {"type": "agua", "quantity": 900}],
+        },
+    },
+    ("POST", "/api/v1/sustainability/targets"): {
+        "json": {**EXAMPLE_REQUEST, "targets": [40, 60, 80, 90]},
+    },
+    ("GET", "/api/v1/sustainability/sweep/{company_size}"): {"path_params": {"company_size": "media"}},
+    ("POST", "/api/v1/sustainability/optimize"): {
+        "json": {"items": [{**EXAMPLE_REQUEST, "budget": 5, "costs": {"agua": 0.01}}] * 100},
+    },
+    ("POST", "/api/v1/sustainability/analyze/uncertainty"): {
+        "json": {
+            **EXAMPLE_REQUEST,
+            "proposed_materials": [{**m, "std_dev": 5} for m in EXAMPLE_REQUEST["proposed_materials"]],
+            "samples": 100_000,
+            "seed": 1,
+        },
+    },
+    ("POST", "/api/v1/sustainability/analyze/batch"): {"json": {"items": [EXAMPLE_REQUEST] * 100}},
+    ("POST", "/api/v1/sustainability/analyze/stream"): {
+        "content": "\n".join(json.dumps(EXAMPLE_REQUEST) for _ in range(100)),
+        "headers": {"Content-Type": "application/x-ndjson"},
+    },
+    ("POST", "/api/v1/sustainability/analyze/upload"): {
+        "files": {"file": ("planilha.csv", UPLOAD_CSV, "text/csv")},
+    },
+    ("POST", "/api/v1/sustainability/jobs"): {
+        "files": {"file": ("planilha.csv", UPLOAD_CSV, "text/csv")},
+    },
+    # O id do job é preenchido com um job criado no início da medição
+    ("GET", "/api/v1/sustainability/jobs/{job_id}"): {},
+    ("GET", "/api/v1/sustainability/jobs/{job_id}/result"): {},
+    ("POST", "/api/v1/sustainability/jobs/{job_id}/cancel"): {},
+    ("GET", "/api/v1/sustainability/cache/stats"): {},
+    ("GET", "/api/v1/sustainability/history/aggregates/{dimension}"): {"path_params": {"dimension": "company_size"}},
+    ("GET", "/api/v1/sustainability/benchmarks/{company_size}"): {"path_params": {"company_size": "media"}},
+    ("POST", "/api/v1/sustainability/benchmarks/reload"): {},
+    ("GET", "/api/v1/sustainability/materials"): {},
+    ("GET", "/api/v1/sustainability/company-sizes"): {},
+    ("GET", "/api/v1/sustainability/example"): {},
+}
+
+SCALING_SIZES = [1, 10, 100, 1_000, 10_000, 100_000]
+
+# Orçamento de partida a frio, em microssegundos (mediana)
+STARTUP_BUDGETS_US = {
+    "startup/import app.main": 50_000,
+    "startup/ready": 2_500_000,
+}
+
+# Executado em um interpretador novo; imprime os tempos de cada etapa em JSON
+STARTUP_SCRIPT = """
+import asyncio, json, time
+start = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+application = app.main.create_app()
+created = time.perf_counter()
+asyncio.run(application.router.startup())
+ready = time.perf_counter()
+print(json.dumps({
+    "startup/import app.main": (imported - start) * 1e6,
+    "startup/create_app": (created - imported) * 1e6,
+    "startup/startup events": (ready - created) * 1e6,
+    "startup/ready": (ready - start) * 1e6,
+}))
+asyncio.run(application.router.shutdown())
+"""
+
+
+def api_routes() -> List[Tuple[str, str]]:
+    """Lista (método, caminho) de todas as rotas dos routers"""
+    return sorted(
+        (method, route.path)
+        for route in app.routes
+        if isinstance(route, APIRoute)
+        for method in route.methods
+    )
+
+
+def random_request(n_materials: int, seed: int = 0) -> SustainabilityCalculationRequest:
+    """Gera um request com `n_materials` materiais aleatórios"""
+    rng = random.Random(seed)
+    materials = list(MaterialType)
+    return SustainabilityCalculationRequest(
+        company=CompanyData(size=CompanySize.MEDIA, employees=100, industry="Benchmark"),
+        proposed_materials=[
+            MaterialUsage(type=rng.choice(materials), quantity=rng.uniform(0, 3000))
+            for _ in range(n_materials)
+        ],
+    )
+
+
+def run_micro(quick: bool = False) -> Dict[str, Dict[str, float]]:
+    repeat = 3 if quick else 7
+    request = SustainabilityCalculationRequest.model_validate(EXAMPLE_REQUEST)
+    benchmark = get_benchmark_table().benchmark(CompanySize.MEDIA, MaterialType.LATAO)
+    material = request.proposed_materials[0]
+
+    results = {}
+    for label, quantity in [("excellent", 5.0), ("good", 9.0), ("average", 20.0), ("below", 80.0)]:
+        results[f"micro/calculate_efficiency_percentage/{label}"] = measure(
+            lambda: calculate_efficiency_percentage(quantity, benchmark), repeat
+        )
+    results["micro/analyze_material"] = measure(
+        lambda: analyze_material(material, CompanySize.MEDIA), repeat
+    )
+    results["micro/analyze_sustainability"] = measure(
+        lambda: analyze_sustainability(request.company, request.proposed_materials), repeat
+    )
+    results["micro/evaluate_sustainability+render"] = measure(
+        lambda: dump_json(render_analysis(evaluate_sustainability(request.company, request.proposed_materials))),
+        repeat,
+    )
+    return results
+
+
+async def _measure_route(
+    client: httpx.AsyncClient,
+    method: str,
+    path: str,
+    spec: Dict,
+    total: int,
+    concurrency: int
+) -> Dict[str, float]:
+    url = path.format(**spec.get("path_params", {}))
+    kwargs = {key: value for key, value in spec.items() if key != "path_params"}
+    latencies: List[float] = []
+
+    async def call() -> None:
+        start = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        latencies.append((time.perf_counter() - start) * 1e6)
+        if response.status_code >= 400:
+            raise RuntimeError(f"{method} {url} retornou {response.status_code}")
+
+    async def worker(count: int) -> None:
+        for _ in range(count):
+            await call()
+
+    for _ in range(3):
+        await call()
+    latencies.clear()
+
+    start = time.perf_counter()
+    per_worker = [total // concurrency + (1 if i < total % concurrency else 0) for i in range(concurrency)]
+    await asyncio.gather(*(worker(count) for count in per_worker))
+    elapsed = time.perf_counter() - start
+    return summarize(latencies, throughput_rps=total / elapsed, concurrency=concurrency)
+
+
+async def _run_asgi(total: int, concurrency: int) -> Dict[str, Dict[str, float]]:
+    missing = [route for route in api_routes() if route not in ROUTE_REQUESTS]
+    if missing:
+        raise RuntimeError(f"Rotas sem cenário de benchmark: {missing}")
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        job = await client.post(
+            "/api/v1/sustainability/jobs", **ROUTE_REQUESTS[("POST", "/api/v1/sustainability/jobs")]
+        )
+        job_id = job.json()["job_id"]
+        for method, path in api_routes():
+            spec = ROUTE_REQUESTS[(method, path)]
+            if "{job_id}" in path:
+                spec = {**spec, "path_params": {"job_id": job_id}}
+            results[f"asgi/{method} {path}"] = await _measure_route(client, method, path, spec, total, concurrency)
+    return results
+
+
+def run_asgi(quick: bool = False, concurrency: int = 8) -> Dict[str, Dict[str, float]]:
+    # O cache de análises mascararia o custo de /analyze; ele é medido à parte
+    cache_enabled = settings.CACHE_ENABLED
+    settings.CACHE_ENABLED = False
+    # Histórico habilitado, para que o custo de enfileirar as análises entre na medição
+    with tempfile.TemporaryDirectory() as tmp:
+        history_writer.start(f"sqlite:///{Path(tmp) / 'history.db'}")
+        job_manager.start(str(Path(tmp) / "jobs"))
+        try:
+            return asyncio.run(_run_asgi(total=50 if quick else 300, concurrency=concurrency))
+        finally:
+            settings.CACHE_ENABLED = cache_enabled
+            job_manager.shutdown()
+            history_writer.shutdown()
+
+
+def run_scaling(quick: bool = False) -> Dict[str, Dict[str, float]]:
+    sizes = [size for size in SCALING_SIZES if not quick or size <= 10_000]
+    functions: Dict[str, Callable[[SustainabilityCalculationRequest], object]] = {
+        "evaluate_sustainability": lambda r: evaluate_sustainability(r.company, r.proposed_materials),
+        "analyze_batch": lambda r: analyze_batch([r]),
+        "analyze+render": lambda r: dump_json(render_analysis(analyze_batch([r])[0])),
+    }
+
+    results = {}
+    for size in sizes:
+        request = random_request(size)
+        repeat = 3 if size >= 10_000 or quick else 5
+        number = 1 if size >= 10_000 else None
+        for name, fn in functions.items():
+            result = measure(lambda: fn(request), repeat, number)
+            result["materials"] = size
+            result["us_per_material"] = result["median_us"] / size
+            results[f"scaling/{name}/{size}"] = result
+    return results
+
+
+def run_startup(quick: bool = False) -> Dict[str, Dict[str, float]]:
+    root = Path(__file__).resolve().parent.parent
+    samples: Dict[str, List[float]] = {}
+    for _ in range(3 if quick else 7):
+        start = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, "-c", STARTUP_SCRIPT], cwd=root, capture_output=True, text=True, check=True
+        ).stdout
+        samples.setdefault("startup/process", []).append((time.perf_counter() - start) * 1e6)
+        # Os tempos vêm na única linha JSON, entre as mensagens de startup e shutdown
+        line = next(line for line in output.splitlines() if line.startswith("{"))
+        for name, elapsed in json.loads(line).items():
+            samples.setdefault(name, []).append(elapsed)
+
+    results = {}
+    for name, values in samples.items():
+        extra = {"budget_us": STARTUP_BUDGETS_US[name]} if name in STARTUP_BUDGETS_US else {}
+        results[name] = summarize(values, **extra)
+    return results
+
+
+SUITES: Dict[str, Callable[..., Dict[str, Dict[str, float]]]] = {
+    "micro": run_micro,
+    "asgi": run_asgi,
+    "scaling": run_scaling,
+    "startup": run_startup,
+}
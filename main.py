@@ -1,7 +1,7 @@
-from fastapi import FastAPI
+"""
+Ponto de entrada legado
 
-app = FastAPI()
-
-@app.get("/")
-def read_root():
-    return {"mensagem": "Bem-vindo à sua API FastAPI!"}
+A aplicação fica em `app.main`; este módulo apenas a reexporta, para que
+`uvicorn main:app` sirva a mesma API em vez de uma segunda aplicação.
+"""
+from app.main import app, create_app  # noqa: F401
@@ -0,0 +1,89 @@
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.utils.admission import AdmissionMiddleware
+
+client = TestClient(app)
+
+
+def limited_app(**limits) -> FastAPI:
+    slow_app = FastAPI()
+
+    @slow_app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    @slow_app.post("/health")
+    async def post_health():
+        return {"status": "healthy"}
+
+    @slow_app.post("/slow")
+    async def slow(seconds: float = 0.1):
+        await asyncio.sleep(seconds)
+        return {"ok": True}
+
+    slow_app.add_middleware(AdmissionMiddleware, exempt_paths=["/health"], retry_after=2, **limits)
+    return slow_app
+
+
+async def concurrent(application: FastAPI, *calls):
+    transport = httpx.ASGITransport(app=application)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+
+        async def call(method, url, delay=0.0):
+            await asyncio.sleep(delay)
+            start = time.perf_counter()
+            response = await async_client.request(method, url)
+            return response, time.perf_counter() - start
+
+        return await asyncio.gather(*(call(*args) for args in calls))
+
+
+def test_full_queue_is_rejected_immediately():
+    """Testa que com o limite e a fila ocupados o excedente recebe 503 com Retry-After na hora"""
+    application = limited_app(route_limits={"/slow": 1}, queue_size=1, queue_timeout=5)
+
+    results = asyncio.run(concurrent(
+        application, ("POST", "/slow"), ("POST", "/slow", 0.01), ("POST", "/slow", 0.02)
+    ))
+
+    assert [response.status_code for response, _ in results] == [200, 200, 503]
+    rejected, elapsed = results[2]
+    assert rejected.headers["retry-after"] == "2"
+    assert elapsed < 0.05
+
+
+def test_queue_deadline_rejects_waiting_request():
+    """Testa que o request que espera além do prazo recebe 503 sem aguardar a vaga"""
+    application = limited_app(route_limits={"/slow": 1}, queue_size=10, queue_timeout=0.05)
+
+    results = asyncio.run(concurrent(application, ("POST", "/slow?seconds=0.5"), ("POST", "/slow", 0.01)))
+
+    assert [response.status_code for response, _ in results] == [200, 503]
+    assert results[1][1] < 0.3
+
+
+def test_exempt_paths_are_never_shed():
+    """Testa que GET em caminhos isentos passa mesmo com o grupo saturado"""
+    application = limited_app(route_limits={}, default_limit=1, queue_size=0, queue_timeout=1)
+
+    results = asyncio.run(concurrent(
+        application, ("POST", "/slow"), ("GET", "/health", 0.01), ("POST", "/health", 0.01)
+    ))
+
+    assert [response.status_code for response, _ in results] == [200, 200, 503]
+
+
+def test_app_exposes_admission_metrics():
+    """Testa que a aplicação aplica o controle de admissão e publica as métricas"""
+    client.get("/api/v1/sustainability/cache/stats")
+
+    metrics = client.get("/metrics").text
+
+    assert 'http_admission_requests_total{group="default",result="admitted"}' in metrics
+    assert 'http_admission_active{group="/api/v1/sustainability/analyze"} 0' in metrics
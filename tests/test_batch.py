@@ -0,0 +1,96 @@
+import random
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.schemas.sustainability import CompanySize, MaterialType, SustainabilityCalculationRequest
+from app.utils.benchmarks import get_benchmark_table
+from app.utils.sustainability import calculate_efficiency_percentage, evaluate_sustainability, is_eco_efficient
+from app.utils.vectorized import analyze_batch, efficiency_percentage_array, is_eco_efficient_array
+
+client = TestClient(app)
+
+
+def _quantities_around(benchmark):
+    """Quantidades nas bordas e no meio de cada faixa do benchmark"""
+    points = [0, benchmark.excellent_threshold, benchmark.recommended_max, benchmark.average_usage]
+    quantities = []
+    for point in points:
+        quantities.extend([point, point * 0.5, point * 1.01, point + 0.001, point + 100])
+    return quantities
+
+
+def test_efficiency_array_matches_scalar():
+    """Testa que a versão vetorizada é idêntica à escalar"""
+    for size in CompanySize:
+        for material in MaterialType:
+            benchmark = get_benchmark_table().benchmark(size, material)
+            quantities = np.array(_quantities_around(benchmark))
+            efficiency = efficiency_percentage_array(
+                quantities,
+                np.full(len(quantities), benchmark.excellent_threshold),
+                np.full(len(quantities), benchmark.recommended_max),
+                np.full(len(quantities), benchmark.average_usage),
+            )
+            eco = is_eco_efficient_array(quantities, np.full(len(quantities), benchmark.recommended_max))
+
+            for i, quantity in enumerate(quantities.tolist()):
+                assert efficiency[i] == calculate_efficiency_percentage(quantity, benchmark)
+                assert eco[i] == is_eco_efficient(quantity, benchmark)
+
+
+def test_analyze_batch_matches_single_requests():
+    """Testa que o lote retorna exatamente o mesmo que chamadas individuais"""
+    rng = random.Random(42)
+    items = []
+    for i in range(30):
+        size = rng.choice(list(CompanySize))
+        items.append({
+            "company": {"size": size.value, "employees": 10 + i, "industry": "Manufatura"},
+            "proposed_materials": [
+                {"type": rng.choice(list(MaterialType)).value, "quantity": rng.uniform(0, 3000)}
+                for _ in range(rng.randint(0, 6))
+            ],
+        })
+
+    response = client.post("/api/v1/sustainability/analyze/batch", json={"items": items})
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert len(results) == len(items)
+
+    for item, result in zip(items, results):
+        single = client.post("/api/v1/sustainability/analyze", json=item)
+        assert single.json() == result
+
+
+def test_analyze_batch_aggregates_match_scalar_path():
+    """Testa que score, eficiência geral, economia e recomendações do lote são idênticos aos do caminho escalar"""
+    rng = random.Random(7)
+    requests = [
+        SustainabilityCalculationRequest.model_validate({
+            "company": {"size": rng.choice(list(CompanySize)).value, "employees": 10, "industry": "Agregados"},
+            "proposed_materials": [
+                {"type": rng.choice(list(MaterialType)).value, "quantity": rng.uniform(0, 3000)}
+                for _ in range(rng.randint(0, 20))
+            ],
+        })
+        for _ in range(200)
+    ]
+
+    for request, result in zip(requests, analyze_batch(requests)):
+        assert result == evaluate_sustainability(request.company, request.proposed_materials)
+
+
+def test_analyze_batch_invalid_item():
+    """Testa lote com material inválido"""
+    response = client.post(
+        "/api/v1/sustainability/analyze/batch",
+        json={"items": [{
+            "company": {"size": "media", "employees": 100, "industry": "Manufatura"},
+            "proposed_materials": [{"type": "invalid_material", "quantity": 1}],
+        }]},
+    )
+
+    assert response.status_code == 422
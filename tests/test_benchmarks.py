@@ -0,0 +1,83 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.schemas.sustainability import CompanySize, MaterialType
+from app.utils.benchmarks import (
+    DEFAULT_BENCHMARKS_FILE,
+    SIZE_INDEX,
+    MATERIAL_INDEX,
+    RECOMMENDED,
+    get_benchmark_table,
+    load_benchmark_table,
+    reload_benchmarks,
+)
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def benchmarks_file(tmp_path):
+    """Cópia editável do arquivo de benchmarks; restaura a tabela padrão ao final"""
+    data = json.loads(DEFAULT_BENCHMARKS_FILE.read_text(encoding="utf-8"))
+    path = tmp_path / "benchmarks.json"
+    yield path, data
+    reload_benchmarks(str(DEFAULT_BENCHMARKS_FILE))
+
+
+def test_table_matches_models():
+    """Testa que o array compilado e os modelos Benchmark são consistentes"""
+    table = get_benchmark_table()
+
+    assert table.values.shape == (len(CompanySize), len(MaterialType), 3)
+    for size in CompanySize:
+        for material in MaterialType:
+            benchmark = table.benchmark(size, material)
+            assert benchmark.company_size == size
+            assert benchmark.material_type == material
+            assert table.values[SIZE_INDEX[size], MATERIAL_INDEX[material], RECOMMENDED] == benchmark.recommended_max
+
+
+def test_reload_swaps_table(benchmarks_file):
+    """Testa a troca dos benchmarks sem reiniciar"""
+    path, data = benchmarks_file
+    data["version"] = "test"
+    data["benchmarks"]["media"]["latao"]["recommended_max"] = 20.0
+    path.write_text(json.dumps(data), encoding="utf-8")
+    previous = get_benchmark_table()
+
+    table = reload_benchmarks(str(path))
+
+    assert get_benchmark_table() is table
+    assert table.version == "test"
+    assert table.fingerprint != previous.fingerprint
+    assert table.benchmark(CompanySize.MEDIA, MaterialType.LATAO).recommended_max == 20.0
+
+    response = client.get("/api/v1/sustainability/benchmarks/media")
+    assert response.json()["latao"]["recommended_max"] == 20.0
+
+
+def test_invalid_benchmarks_rejected(benchmarks_file):
+    """Testa que arquivos incompletos ou incoerentes são rejeitados"""
+    path, data = benchmarks_file
+    data["benchmarks"]["micro"]["agua"]["excellent_threshold"] = 1000
+    path.write_text(json.dumps(data), encoding="utf-8")
+
+    with pytest.raises(ValueError):
+        load_benchmark_table(str(path))
+
+    del data["benchmarks"]["micro"]
+    path.write_text(json.dumps(data), encoding="utf-8")
+
+    with pytest.raises(ValueError):
+        load_benchmark_table(str(path))
+
+
+def test_reload_endpoint():
+    """Testa o endpoint de recarga de benchmarks"""
+    response = client.post("/api/v1/sustainability/benchmarks/reload")
+
+    assert response.status_code == 200
+    assert response.json()["version"] == get_benchmark_table().version
@@ -0,0 +1,128 @@
+import asyncio
+import time
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.schemas.sustainability import SustainabilityCalculationRequest
+from app.utils.benchmarks import DEFAULT_BENCHMARKS_FILE, reload_benchmarks
+from app.routers import sustainability as sustainability_router
+from app.utils.cache import AnalysisCache, SQLiteCacheStore, analysis_cache, analysis_cache_key
+
+client = TestClient(app)
+
+REQUEST_DATA = {
+    "company": {"size": "grande", "employees": 300, "industry": "Cache"},
+    "proposed_materials": [
+        {"type": "papel", "quantity": 120, "unit": "toneladas"},
+        {"type": "energia", "quantity": 3000},
+    ],
+}
+
+
+def test_cache_key_is_canonical():
+    """Testa que payloads equivalentes geram a mesma chave"""
+    a = SustainabilityCalculationRequest.model_validate(REQUEST_DATA)
+    b = SustainabilityCalculationRequest.model_validate({
+        "proposed_materials": [
+            {"unit": "toneladas", "quantity": 120.0, "type": "papel"},
+            {"type": "energia", "quantity": 3000.0, "unit": "toneladas"},
+        ],
+        "company": {"industry": "Cache", "employees": 300, "size": "grande"},
+    })
+    c = SustainabilityCalculationRequest.model_validate({
+        **REQUEST_DATA, "proposed_materials": REQUEST_DATA["proposed_materials"][:1]
+    })
+
+    assert analysis_cache_key(a.company, a.proposed_materials) == analysis_cache_key(b.company, b.proposed_materials)
+    assert analysis_cache_key(a.company, a.proposed_materials) != analysis_cache_key(c.company, c.proposed_materials)
+
+
+def test_lru_and_ttl():
+    """Testa a expulsão por tamanho e por tempo de vida"""
+    cache = AnalysisCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", b"1")
+    cache.set("b", b"2")
+    cache.get("a")
+    cache.set("c", b"3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1"
+
+    expiring = AnalysisCache(max_entries=2, ttl_seconds=0.01)
+    expiring.set("a", b"1")
+    time.sleep(0.02)
+    assert expiring.get("a") is None
+
+
+def test_shared_sqlite_tier(tmp_path):
+    """Testa que o nível SQLite é visto por outra instância (outro worker)"""
+    path = str(tmp_path / "cache.sqlite")
+    AnalysisCache(max_entries=10, ttl_seconds=60, sqlite_path=path).set("key", b"value")
+    other = AnalysisCache(max_entries=10, ttl_seconds=60, sqlite_path=path)
+
+    assert other.get("key") == b"value"
+    assert other.get("key") == b"value"
+    assert other.stats()["shared_hits"] == 1
+    assert other.stats()["hits"] == 1
+
+
+def test_analyze_uses_cache():
+    """Testa acerto de cache no endpoint de análise"""
+    analysis_cache.clear()
+
+    first = client.post("/api/v1/sustainability/analyze", json=REQUEST_DATA)
+    second = client.post("/api/v1/sustainability/analyze", json=REQUEST_DATA)
+
+    assert first.headers["X-Cache"] == "MISS"
+    assert second.headers["X-Cache"] == "HIT"
+    assert first.json() == second.json()
+
+    stats = client.get("/api/v1/sustainability/cache/stats").json()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_cache_key_and_shared_tier_run_off_the_event_loop(tmp_path, monkeypatch):
+    """Testa que a chave e o nível SQLite de /analyze rodam fora do event loop"""
+    on_loop = []
+
+    def check(fn):
+        def wrapper(*args, **kwargs):
+            try:
+                asyncio.get_running_loop()
+                on_loop.append(fn.__name__)
+            except RuntimeError:
+                pass
+            return fn(*args, **kwargs)
+        return wrapper
+
+    shared = SQLiteCacheStore(str(tmp_path / "cache.sqlite"))
+    monkeypatch.setattr(shared, "get", check(shared.get))
+    monkeypatch.setattr(shared, "set", check(shared.set))
+    monkeypatch.setattr(analysis_cache, "shared", shared)
+    monkeypatch.setattr(sustainability_router, "analysis_cache_key", check(analysis_cache_key))
+    analysis_cache.clear()
+
+    first = client.post("/api/v1/sustainability/analyze", json=REQUEST_DATA)
+    analysis_cache._entries.clear()
+    second = client.post("/api/v1/sustainability/analyze", json=REQUEST_DATA)
+    third = client.post("/api/v1/sustainability/analyze", json=REQUEST_DATA)
+
+    assert [r.headers["X-Cache"] for r in (first, second, third)] == ["MISS", "HIT", "HIT"]
+    assert analysis_cache.stats()["shared_hits"] == 1 and analysis_cache.stats()["hits"] == 1
+    assert on_loop == []
+
+
+def test_cache_key_changes_with_benchmarks(tmp_path):
+    """Testa a invalidação automática quando os benchmarks mudam"""
+    request = SustainabilityCalculationRequest.model_validate(REQUEST_DATA)
+    before = analysis_cache_key(request.company, request.proposed_materials)
+
+    path = tmp_path / "benchmarks.json"
+    path.write_text(DEFAULT_BENCHMARKS_FILE.read_text(encoding="utf-8").replace("2023-Q4", "test"))
+    try:
+        reload_benchmarks(str(path))
+        assert analysis_cache_key(request.company, request.proposed_materials) != before
+    finally:
+        reload_benchmarks(str(DEFAULT_BENCHMARKS_FILE))
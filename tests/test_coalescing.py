@@ -0,0 +1,99 @@
+import asyncio
+
+import httpx
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app
+from app.routers import sustainability
+from app.utils.coalescing import SingleFlight
+
+client = TestClient(app)
+
+REQUEST_DATA = {
+    "company": {"size": "media", "employees": 100, "industry": "Coalescência"},
+    "proposed_materials": [{"type": "latao", "quantity": 8.5}, {"type": "agua", "quantity": 850}],
+}
+
+
+def test_single_flight_shares_one_execution():
+    """Testa que chamadas simultâneas com a mesma chave executam uma única vez"""
+    calls = []
+
+    async def compute(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return key.encode()
+
+    async def scenario():
+        flights = SingleFlight()
+        results = await asyncio.gather(
+            *(flights.run(key, lambda key=key: compute(key)) for key in ["a"] * 10 + ["b"] * 5)
+        )
+        return flights, results
+
+    flights, results = asyncio.run(scenario())
+
+    assert sorted(calls) == ["a", "b"]
+    assert [coalesced for _, coalesced in results].count(False) == 2
+    assert {body for body, _ in results} == {b"a", b"b"}
+    assert flights.inflight() == 0
+
+
+def test_single_flight_survives_cancel_and_shares_errors():
+    """Testa que cancelar quem iniciou não cancela os demais e que erros chegam a todos"""
+    async def slow():
+        await asyncio.sleep(0.02)
+        return b"ok"
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("falhou")
+
+    async def scenario():
+        flights = SingleFlight()
+        leader = asyncio.ensure_future(flights.run("k", slow))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flights.run("k", slow))
+        await asyncio.sleep(0)
+        leader.cancel()
+        shared = await follower
+
+        errors = await asyncio.gather(*(flights.run("e", fail) for _ in range(3)), return_exceptions=True)
+        return shared, errors
+
+    shared, errors = asyncio.run(scenario())
+
+    assert shared == (b"ok", True)
+    assert all(isinstance(error, ValueError) for error in errors)
+
+
+def test_concurrent_identical_analyze_requests_are_coalesced(monkeypatch):
+    """Testa que /analyze agrupa requests idênticos simultâneos e expõe a taxa nas métricas"""
+    monkeypatch.setattr(settings, "CACHE_ENABLED", False)
+    run = sustainability.analysis_executor.run
+    calls = []
+
+    async def slow_run(*args, **kwargs):
+        calls.append(args[0])
+        await asyncio.sleep(0.05)
+        return await run(*args, **kwargs)
+
+    monkeypatch.setattr(sustainability.analysis_executor, "run", slow_run)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+            return await asyncio.gather(*(
+                async_client.post("/api/v1/sustainability/analyze", json=REQUEST_DATA) for _ in range(20)
+            ))
+
+    responses = asyncio.run(scenario())
+
+    assert len(calls) == 1
+    assert len({response.content for response in responses}) == 1
+    assert sorted(response.headers["x-cache"] for response in responses) == ["COALESCED"] * 19 + ["MISS"]
+
+    metrics = client.get("/metrics").text
+    assert 'analysis_singleflight_requests_total{result="coalesced"}' in metrics
+    assert "analysis_singleflight_inflight 0" in metrics
@@ -0,0 +1,59 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+client = TestClient(app)
+
+COMPANY = {"size": "media", "employees": 100, "industry": "Comparação"}
+CURRENT = [
+    {"type": "latao", "quantity": 12},
+    {"type": "agua", "quantity": 900},
+    {"type": "plastico", "quantity": 40},
+]
+PROPOSED = [
+    {"type": "latao", "quantity": 8.5},
+    {"type": "agua", "quantity": 850},
+    {"type": "papel", "quantity": 20},
+]
+
+
+def analyze(materials):
+    response = client.post(
+        "/api/v1/sustainability/analyze",
+        json={"company": COMPANY, "proposed_materials": materials},
+    )
+    return response.json()
+
+
+def test_compare_matches_two_separate_analyses():
+    """Testa que a comparação bate com duas análises independentes"""
+    response = client.post(
+        "/api/v1/sustainability/analyze/compare",
+        json={"company": COMPANY, "current_materials": CURRENT, "proposed_materials": PROPOSED},
+    )
+    assert response.status_code == 200
+    data = response.json()
+
+    current, proposed = analyze(CURRENT), analyze(PROPOSED)
+    assert data["current_score"] == current["overall_score"]
+    assert data["proposed_score"] == proposed["overall_score"]
+    assert data["score_change"] == pytest.approx(proposed["overall_score"] - current["overall_score"])
+    assert sum(m["score_change"] for m in data["materials"]) == pytest.approx(data["score_change"])
+
+    materials = {m["material_type"]: m for m in data["materials"]}
+    assert list(materials) == ["latao", "agua", "papel", "plastico"]
+    assert materials["latao"]["current_efficiency"] == current["materials_analysis"][0]["efficiency_percentage"]
+    assert materials["latao"]["carbon_change"] == pytest.approx((8.5 - 12) * 2.5 * 1000)
+    assert materials["papel"]["current_efficiency"] is None
+    assert materials["papel"]["efficiency_change"] is None
+    assert materials["plastico"]["proposed_quantity"] == 0
+
+
+def test_compare_requires_current_materials():
+    """Testa que a comparação exige current_materials"""
+    response = client.post(
+        "/api/v1/sustainability/analyze/compare",
+        json={"company": COMPANY, "proposed_materials": PROPOSED},
+    )
+    assert response.status_code == 400
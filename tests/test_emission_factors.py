@@ -0,0 +1,104 @@
+import json
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.schemas.sustainability import CompanySize, MaterialType
+from app.utils.benchmarks import DEFAULT_BENCHMARKS_FILE, get_benchmark_table, reload_benchmarks
+from app.utils.calculations import calculate_carbon_savings
+from app.utils.emission_factors import (
+    DEFAULT_EMISSION_FACTORS_FILE,
+    carbon_reduction,
+    carbon_reduction_array,
+    load_emission_factors,
+)
+
+client = TestClient(app)
+
+FACTORS = {
+    "version": "teste",
+    "factors": {"latao": 2500.0, "agua": 1.0, "papel": 1800.0, "plastico": 2500.0, "energia": 500.0},
+    "sets": [
+        {"region": "BR", "factors": {"energia": 100.0}},
+        {"region": "BR", "year": 2023, "factors": {"energia": 90.0}},
+        {"year": 2030, "factors": {"papel": 900.0}},
+    ],
+}
+
+
+@pytest.fixture
+def regional_factors(tmp_path):
+    path = tmp_path / "emission_factors.json"
+    path.write_text(json.dumps(FACTORS))
+    yield str(path)
+    reload_benchmarks(str(DEFAULT_BENCHMARKS_FILE), str(DEFAULT_EMISSION_FACTORS_FILE))
+
+
+def test_registry_resolves_sets(regional_factors):
+    """Testa a escolha do conjunto por região/ano, com herança do conjunto padrão"""
+    registry = load_emission_factors(regional_factors)
+
+    assert registry.factor(MaterialType.ENERGIA) == 500.0
+    assert registry.factor(MaterialType.ENERGIA, "br", 2023) == 90.0
+    assert registry.factor(MaterialType.ENERGIA, "BR", 2019) == 100.0
+    assert registry.factor(MaterialType.PAPEL, "BR", 2023) == 1800.0
+    assert registry.factor(MaterialType.PAPEL, "AR", 2030) == 900.0
+    assert registry.factor(MaterialType.PAPEL, "AR") == 1800.0
+    assert not registry.values.flags.writeable
+
+
+def test_invalid_registry_is_rejected(tmp_path):
+    """Testa que fatores ausentes, negativos ou de materiais desconhecidos são recusados"""
+    path = tmp_path / "emission_factors.json"
+    for factors in (
+        {"latao": 2500.0},
+        {**FACTORS["factors"], "papel": -1.0},
+        {**FACTORS["factors"], "madeira": 1.0},
+    ):
+        path.write_text(json.dumps({"version": "x", "factors": factors}))
+        with pytest.raises(ValueError):
+            load_emission_factors(str(path))
+
+
+def test_scalar_vectorized_and_savings_agree():
+    """Testa que os caminhos escalar, vetorizado e de economia usam os mesmos fatores"""
+    table = get_benchmark_table()
+    benchmark = table.benchmark(CompanySize.MEDIA, MaterialType.PLASTICO)
+    quantity = np.linspace(0, benchmark.recommended_max, 7)
+    factor = table.carbon_factor(MaterialType.PLASTICO)
+
+    vectorized = carbon_reduction_array(
+        quantity, benchmark.excellent_threshold, quantity <= benchmark.recommended_max, factor
+    )
+    for value, expected in zip(quantity.tolist(), vectorized.tolist()):
+        scalar = carbon_reduction(value, benchmark.excellent_threshold, True, factor)
+        assert (scalar is None and np.isnan(expected)) or scalar == expected
+
+    saved = benchmark.excellent_threshold - quantity[1]
+    assert calculate_carbon_savings(MaterialType.PLASTICO, saved) == pytest.approx(vectorized[1])
+
+
+def test_regional_factors_in_analysis(regional_factors):
+    """Testa que /analyze, o lote e a comparação aplicam o conjunto da região da empresa"""
+    request = {
+        "company": {"size": "media", "employees": 100, "industry": "Fatores"},
+        "proposed_materials": [{"type": "energia", "quantity": 100}],
+        "current_materials": [{"type": "energia", "quantity": 120}],
+    }
+    regional = {**request, "company": {**request["company"], "region": "BR", "reference_year": 2023}}
+    before = client.post("/api/v1/sustainability/analyze", json=regional).json()
+
+    reload_benchmarks(emission_factors_path=regional_factors)
+    default = client.post("/api/v1/sustainability/analyze", json=request).json()
+    single = client.post("/api/v1/sustainability/analyze", json=regional).json()
+    batch = client.post("/api/v1/sustainability/analyze/batch", json={"items": [regional, request]}).json()
+    compare = client.post("/api/v1/sustainability/analyze/compare", json=regional).json()
+
+    carbon = default["materials_analysis"][0]["carbon_footprint_reduction"]
+    assert carbon == before["materials_analysis"][0]["carbon_footprint_reduction"]
+    assert single["materials_analysis"][0]["carbon_footprint_reduction"] == pytest.approx(carbon * 90 / 500)
+    assert batch["results"][0]["materials_analysis"] == single["materials_analysis"]
+    assert batch["results"][1]["materials_analysis"] == default["materials_analysis"]
+    assert compare["carbon_change"] == pytest.approx(-20 * 90.0)
@@ -0,0 +1,106 @@
+import asyncio
+import multiprocessing
+import os
+
+import numpy as np
+import pytest
+
+from app.schemas.sustainability import BatchAnalysisRequest
+from app.utils.benchmarks import BenchmarkTable, get_benchmark_table
+from app.utils.executor import AnalysisExecutor, encode_batch_task
+from app.utils.formats import MEDIA_JSON
+from app.utils.messages import DEFAULT_LOCALE
+
+BATCH = BatchAnalysisRequest.model_validate({"items": [
+    {
+        "company": {"size": "media", "employees": 100, "industry": "Manufatura"},
+        "proposed_materials": [
+            {"type": "latao", "quantity": 8.5},
+            {"type": "agua", "quantity": 2500},
+        ],
+    },
+]})
+# Argumentos de `encode_batch_task` para a resposta JSON do lote
+ARGS = (BATCH.items, False, MEDIA_JSON, False, DEFAULT_LOCALE)
+
+
+@pytest.fixture(scope="module")
+def executor():
+    executor = AnalysisExecutor(workers=1, threshold=2)
+    executor.start(wait=True)
+    yield executor
+    executor.shutdown()
+
+
+def test_large_payload_runs_in_process_pool(executor):
+    """Testa que o pool de processos retorna o mesmo resultado que a execução local"""
+    inline = encode_batch_task(*ARGS, table=get_benchmark_table())
+
+    result = asyncio.run(executor.run(encode_batch_task, *ARGS, size=2))
+
+    assert executor.ready
+    assert result == inline
+
+
+def test_pool_follows_benchmark_swap(executor):
+    """Testa que os processos do pool usam a tabela enviada com a tarefa"""
+    values = np.array(get_benchmark_table().values)
+    values[2, 0] = [1.0, 2.0, 3.0]
+    table = BenchmarkTable(values, "test")
+
+    inline = encode_batch_task(*ARGS, table=table)
+    result = asyncio.run(executor.run(encode_batch_task, *ARGS, size=2, table=table))
+
+    assert result == inline
+    assert result != encode_batch_task(*ARGS, table=get_benchmark_table())
+
+
+def test_disabled_pool_runs_inline():
+    """Testa que sem workers tudo roda no threadpool"""
+    executor = AnalysisExecutor(workers=0, threshold=1)
+    executor.start()
+
+    result = asyncio.run(executor.run(encode_batch_task, *ARGS, size=100))
+
+    assert not executor.started
+    assert result == encode_batch_task(*ARGS, table=get_benchmark_table())
+
+
+def test_sync_call_uses_process_pool(executor):
+    """Testa que `call` (usado fora do event loop) dá o mesmo resultado que `run`"""
+    result = executor.call(encode_batch_task, *ARGS, size=2)
+
+    assert result == asyncio.run(executor.run(encode_batch_task, *ARGS, size=2))
+    assert executor.call(encode_batch_task, *ARGS, size=1) == result
+
+
+def crash_in_worker(value, table):
+    """Derruba o processo do pool; fora dele, só devolve o valor"""
+    if multiprocessing.parent_process() is not None:
+        os._exit(1)
+    return value
+
+
+def test_broken_pool_is_replaced_once(monkeypatch):
+    """Testa que um pool quebrado é encerrado e recriado uma única vez, mesmo com requests simultâneos"""
+    executor = AnalysisExecutor(workers=1, threshold=1)
+    executor.start(wait=True)
+    broken = executor._pool
+    starts = []
+    start = executor.start
+    monkeypatch.setattr(executor, "start", lambda *args, **kwargs: starts.append(1) or start(*args, **kwargs))
+
+    async def requests():
+        return await asyncio.gather(
+            *(executor.run(crash_in_worker, i, size=1) for i in range(4)),
+            executor.map(crash_in_worker, [(4,), (5,)]),
+        )
+
+    try:
+        *results, mapped = asyncio.run(requests())
+        assert results == [0, 1, 2, 3] and mapped == [4, 5]
+        assert executor._pool is not None and executor._pool is not broken
+        assert len(starts) == 1
+        assert broken._shutdown_thread
+    finally:
+        executor.shutdown()
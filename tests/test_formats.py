@@ -0,0 +1,82 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.schemas.sustainability import SustainabilityCalculationRequest
+from app.utils import formats
+from app.utils.formats import MEDIA_ARROW, MEDIA_MSGPACK, MEDIA_PARQUET, pack_msgpack
+from app.utils.history import HISTORY_BATCH, history_rows
+
+client = TestClient(app)
+
+REQUEST = {
+    "company": {"size": "media", "employees": 100, "industry": "Formatos"},
+    "proposed_materials": [
+        {"type": "latao", "quantity": 8.5},
+        {"type": "papel", "quantity": 90},
+    ],
+}
+BATCH = {"items": [REQUEST, {**REQUEST, "company": {**REQUEST["company"], "size": "micro"}}]}
+
+
+def test_msgpack_matches_json():
+    """Testa que MessagePack traz a mesma estrutura do JSON"""
+    msgpack = pytest.importorskip("msgpack")
+    expected = client.post("/api/v1/sustainability/analyze", json=REQUEST).json()
+
+    response = client.post("/api/v1/sustainability/analyze", json=REQUEST, headers={"Accept": MEDIA_MSGPACK})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == MEDIA_MSGPACK
+    assert msgpack.unpackb(response.content) == expected
+
+
+@pytest.mark.parametrize("media_type", [MEDIA_ARROW, MEDIA_PARQUET])
+def test_columnar_batch_matches_json(media_type):
+    """Testa que o lote colunar traz uma linha por (empresa, material) com os valores do JSON"""
+    pa = pytest.importorskip("pyarrow")
+    expected = client.post("/api/v1/sustainability/analyze/batch", json=BATCH).json()["results"]
+
+    response = client.post(
+        "/api/v1/sustainability/analyze/batch", json=BATCH, headers={"Accept": f"{media_type}, application/json;q=0.5"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == media_type
+    if media_type == MEDIA_ARROW:
+        table = pa.ipc.open_stream(pa.py_buffer(response.content)).read_all()
+    else:
+        table = pytest.importorskip("pyarrow.parquet").read_table(pa.BufferReader(response.content))
+
+    rows = table.to_pylist()
+    assert len(rows) == 4
+    for row in rows:
+        analysis = expected[row["company_index"]]
+        material = next(m for m in analysis["materials_analysis"] if m["material_type"] == row["material_type"])
+        assert row["efficiency_percentage"] == material["efficiency_percentage"]
+        assert row["recommendation"] == material["recommendation"]
+        assert row["overall_score"] == analysis["overall_score"]
+
+
+def test_unacceptable_format_returns_406(monkeypatch):
+    """Testa o 406 para formatos não oferecidos ou sem a dependência instalada"""
+    response = client.post("/api/v1/sustainability/analyze", json=REQUEST, headers={"Accept": "text/csv"})
+    assert response.status_code == 406
+
+    monkeypatch.setattr(formats, "is_available", lambda media_type: media_type not in (MEDIA_ARROW, MEDIA_PARQUET))
+    response = client.post("/api/v1/sustainability/analyze/batch", json=BATCH, headers={"Accept": MEDIA_ARROW})
+    assert response.status_code == 406
+    assert MEDIA_ARROW not in response.json()["detail"]
+
+
+def test_history_decodes_msgpack_bodies():
+    """Testa que o histórico lê respostas em MessagePack"""
+    pytest.importorskip("msgpack")
+    requests = [SustainabilityCalculationRequest.model_validate(item) for item in BATCH["items"]]
+    body = client.post("/api/v1/sustainability/analyze/batch", json=BATCH).json()
+
+    rows = history_rows(time.time(), HISTORY_BATCH, requests, pack_msgpack(body), MEDIA_MSGPACK)
+
+    assert [row[4] for row, _ in rows] == [analysis["overall_score"] for analysis in body["results"]]
@@ -0,0 +1,125 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.schemas.sustainability import HistoryDimension
+from app.utils.history import HistoryWriter, SQLAlchemyHistoryBackend, create_history_backend, history_writer
+
+client = TestClient(app)
+
+REQUEST_DATA = {
+    "company": {"size": "pequena", "employees": 30, "industry": "Histórico"},
+    "proposed_materials": [
+        {"type": "papel", "quantity": 5},
+        {"type": "agua", "quantity": 900},
+    ],
+}
+
+
+@pytest.fixture
+def history(tmp_path):
+    history_writer.start(f"sqlite:///{tmp_path / 'history.db'}")
+    yield history_writer
+    history_writer.shutdown()
+    history_writer.backend = None
+
+
+def test_analyze_requests_are_persisted(history):
+    """Testa que /analyze, /analyze/batch e /analyze/stream gravam o histórico"""
+    single = client.post("/api/v1/sustainability/analyze", json=REQUEST_DATA)
+    client.post("/api/v1/sustainability/analyze/batch", json={"items": [REQUEST_DATA] * 3})
+    client.post(
+        "/api/v1/sustainability/analyze/stream",
+        content=json.dumps(REQUEST_DATA) + "\n{}\n",
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    history.flush()
+
+    rows = history.backend.connection().execute(
+        "SELECT company_size, industry, overall_score, request, result FROM analysis_history ORDER BY id"
+    ).fetchall()
+    assert len(rows) == 5
+    size, industry, score, request, result = rows[0]
+    assert (size, industry) == ("pequena", "Histórico")
+    assert score == single.json()["overall_score"]
+    assert json.loads(request)["company"]["employees"] == 30
+    assert json.loads(result) == single.json()
+
+
+def test_stream_history_skips_failed_lines(history):
+    """Testa que uma linha do streaming que falha na análise não desalinha o histórico"""
+    overflow = {
+        "company": {"size": "media", "employees": 10, "industry": "Estouro"},
+        "proposed_materials": [{"type": "agua", "quantity": 1.7e308}] * 2,
+    }
+    response = client.post(
+        "/api/v1/sustainability/analyze/stream",
+        content="\n".join(json.dumps(item) for item in (overflow, REQUEST_DATA)) + "\n",
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    history.flush()
+
+    assert "error" in json.loads(response.text.splitlines()[0])
+    rows = history.backend.connection().execute("SELECT industry, result FROM analysis_history").fetchall()
+    assert [industry for industry, _ in rows] == ["Histórico"]
+    assert json.loads(rows[0][1]) == json.loads(response.text.splitlines()[1])["analysis"]
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    """Testa que a fila cheia descarta entradas sem bloquear o request"""
+    writer = HistoryWriter(max_queue=1, batch_size=10)
+    writer._thread = object()  # finge estar iniciado, sem consumidor
+    writer.record(0, [object()], b"{}")
+    writer.record(0, [object()], b"{}")
+    assert writer.depth() == 1
+
+
+def test_aggregates_match_raw_history(history):
+    """Testa que os agregados mantidos a cada gravação batem com o histórico bruto"""
+    other = {
+        "company": {"size": "grande", "employees": 400, "industry": "Agregados"},
+        "proposed_materials": [{"type": "papel", "quantity": 10_000}],
+    }
+    client.post("/api/v1/sustainability/analyze/batch", json={"items": [REQUEST_DATA, other, other]})
+    history.flush()
+
+    connection = history.backend.connection()
+    expected = connection.execute(
+        "SELECT company_size, COUNT(*), AVG(overall_score) FROM analysis_history GROUP BY company_size"
+    ).fetchall()
+    response = client.get("/api/v1/sustainability/history/aggregates/company_size")
+    assert response.status_code == 200
+    groups = {group["key"]: group for group in response.json()["groups"]}
+    for size, count, average in expected:
+        assert groups[size]["analyses"] == count
+        assert groups[size]["average_score"] == pytest.approx(average)
+
+    papel = next(
+        group for group in client.get("/api/v1/sustainability/history/aggregates/material_type").json()["groups"]
+        if group["key"] == "papel"
+    )
+    assert papel["materials"] == 3
+    assert papel["non_eco_materials"] >= 2
+
+
+def test_aggregates_require_database():
+    """Testa que os agregados exigem o histórico habilitado"""
+    response = client.get("/api/v1/sustainability/history/aggregates/day")
+    assert response.status_code == 503
+
+
+def test_sqlalchemy_backend_upserts_rollups(tmp_path):
+    """Testa que o backend SQLAlchemy soma os rollups com o upsert do dialeto"""
+    pytest.importorskip("sqlalchemy")
+    backend = create_history_backend(f"sqlite+pysqlite:///{tmp_path / 'history.db'}")
+    assert isinstance(backend, SQLAlchemyHistoryBackend)
+
+    row = (0.0, "media", 10, "Rollup", 50.0, 0, "{}", "{}")
+    backend.write([row], {("industry", "Rollup"): [1, 50.0, 2, 1]})
+    backend.write([row, row], {("industry", "Rollup"): [2, 150.0, 4, 0], ("company_size", "media"): [2, 150.0, 4, 0]})
+
+    assert backend.count() == 3
+    assert backend.aggregates(HistoryDimension.INDUSTRY) == [("Rollup", 3, 200.0, 6, 1)]
+    assert backend.aggregates(HistoryDimension.COMPANY_SIZE) == [("media", 2, 150.0, 4, 0)]
@@ -0,0 +1,169 @@
+import json
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app
+from app.utils import jobs as jobs_module
+from app.utils.jobs import job_manager
+
+client = TestClient(app)
+
+URL = "/api/v1/sustainability/jobs"
+
+CSV = "company_id,size,employees,industry,material_type,quantity\n" + "".join(
+    f"{i},media,100,Manufatura,latao,{i + 1}\n{i},media,100,Manufatura,agua,{900 + i}\n" for i in range(6)
+) + "6,media,-1,Manufatura,papel,3\n"
+
+
+@pytest.fixture
+def jobs(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_CHUNK_ROWS", 4)
+    job_manager.start(str(tmp_path))
+    yield tmp_path
+    job_manager.shutdown()
+
+
+def submit():
+    return client.post(URL, files={"file": ("planilha.csv", CSV.encode(), "text/csv")})
+
+
+def wait(job_id: str) -> dict:
+    for _ in range(500):
+        job = client.get(f"{URL}/{job_id}").json()
+        if job["status"] not in ("queued", "running"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} não terminou")
+
+
+def test_job_runs_in_background_and_matches_upload(jobs):
+    """Testa o envio, o progresso e o download completo e incremental do resultado"""
+    response = submit()
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+    assert response.headers["location"] == f"{URL}/{job_id}"
+    assert response.json()["rows_total"] == 13
+
+    job = wait(job_id)
+    assert job["status"] == "completed"
+    assert job["progress"] == 1.0
+    assert (job["rows_read"], job["companies"], job["errors"]) == (13, 6, 1)
+    assert job["chunks_done"] == 4
+
+    result = client.get(f"{URL}/{job_id}/result")
+    assert result.headers["x-job-status"] == "completed"
+    assert result.headers["x-job-chunks"] == "4"
+    upload = client.post(
+        "/api/v1/sustainability/analyze/upload", files={"file": ("planilha.csv", CSV.encode(), "text/csv")}
+    )
+    assert result.text == upload.text
+
+    tail = client.get(f"{URL}/{job_id}/result", params={"from_chunk": 2}).text
+    assert result.text.endswith(tail) and 0 < len(tail) < len(result.text)
+
+
+def test_job_resumes_after_restart(jobs):
+    """Testa que um job interrompido continua do último bloco gravado"""
+    job_id = submit().json()["job_id"]
+    expected = wait(job_id)
+    full = client.get(f"{URL}/{job_id}/result").text
+    job_manager.shutdown()
+
+    # Estado de um processo que parou depois do primeiro bloco
+    state_path = jobs / job_id / "job.json"
+    state = json.loads(state_path.read_text())
+    state.update(status="running", chunks_done=1, rows_read=4, companies=1, errors=0)
+    state_path.write_text(json.dumps(state))
+    for chunk in sorted((jobs / job_id / "chunks").iterdir())[1:]:
+        chunk.unlink()
+
+    job_manager.start(str(jobs))
+    job = wait(job_id)
+    assert {key: job[key] for key in ("status", "rows_read", "companies", "errors", "chunks_done")} == {
+        key: expected[key] for key in ("status", "rows_read", "companies", "errors", "chunks_done")
+    }
+    assert client.get(f"{URL}/{job_id}/result").text == full
+
+
+def test_cancel_running_job_keeps_finished_chunks(jobs, monkeypatch):
+    """Testa que o cancelamento para o job ao fim do bloco atual"""
+    started, release = threading.Event(), threading.Event()
+    analyze = jobs_module.analyze_upload_chunk
+
+    def blocking_chunk(entries, locale, table):
+        started.set()
+        release.wait(5)
+        return analyze(entries, locale, table)
+
+    monkeypatch.setattr(jobs_module, "analyze_upload_chunk", blocking_chunk)
+    job_id = submit().json()["job_id"]
+    assert started.wait(5)
+
+    cancelled = client.post(f"{URL}/{job_id}/cancel").json()
+    assert cancelled["status"] == "cancelled"
+    release.set()
+
+    for _ in range(500):
+        if (jobs / job_id / "chunks" / "000000.ndjson").exists() and json.loads(
+            (jobs / job_id / "job.json").read_text()
+        )["chunks_done"] == 1:
+            break
+        time.sleep(0.01)
+    job = client.get(f"{URL}/{job_id}").json()
+    assert (job["status"], job["chunks_done"]) == ("cancelled", 1)
+    assert client.get(f"{URL}/{job_id}/result").text.startswith('{"company_id":"0"')
+
+
+def test_jobs_errors(jobs):
+    """Testa job inexistente, planilha inválida e jobs desabilitados"""
+    assert client.get(f"{URL}/desconhecido").status_code == 404
+    bad = client.post(URL, files={"file": ("planilha.csv", b"company_id\n1\n", "text/csv")})
+    assert bad.status_code == 400
+    assert list(jobs.iterdir()) == []
+
+    job_manager.shutdown()
+    assert submit().status_code == 503
+
+
+def test_job_reports_non_finite_rows(jobs):
+    """Testa que valores não finitos viram erros por linha, sem derrubar o job"""
+    content = (
+        "company_id,size,employees,industry,material_type,quantity\n"
+        "a,media,100,Varejo,papel,inf\n"
+        "b,media,100,Varejo,agua,1.7e308\n"
+        "b,media,100,Varejo,agua,1.7e308\n"
+        "c,micro,5,Varejo,papel,3\n"
+    )
+    job_id = client.post(URL, files={"file": ("planilha.csv", content.encode(), "text/csv")}).json()["job_id"]
+
+    job = wait(job_id)
+    assert job["status"] == "completed"
+    assert (job["companies"], job["errors"]) == (1, 2)
+    lines = [json.loads(line) for line in client.get(f"{URL}/{job_id}/result").text.splitlines()]
+    assert [line.get("company_id") or line["row"] for line in lines] == [2, 3, "c"]
+
+
+def test_finished_jobs_expire(jobs, monkeypatch):
+    """Testa que jobs terminados há mais de JOB_RETENTION_SECONDS são removidos do disco"""
+    old_id = submit().json()["job_id"]
+    wait(old_id)
+    state_path = jobs / old_id / "job.json"
+    state = json.loads(state_path.read_text())
+    state_path.write_text(json.dumps({**state, "updated_at": state["updated_at"] - 3600}))
+    job_manager.shutdown()
+
+    monkeypatch.setattr(settings, "JOB_RETENTION_SECONDS", 60)
+    job_manager.start(str(jobs))
+    assert client.get(f"{URL}/{old_id}").status_code == 404
+    assert not (jobs / old_id).exists()
+
+    recent_id = submit().json()["job_id"]
+    wait(recent_id)
+    monkeypatch.setattr(settings, "JOB_RETENTION_SECONDS", 1e-9)
+    new_id = submit().json()["job_id"]
+    assert not (jobs / recent_id).exists()
+    assert (jobs / new_id).exists()
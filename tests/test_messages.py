@@ -0,0 +1,83 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.schemas.sustainability import CompanySize, MaterialType, MaterialUsage
+from app.utils.benchmarks import get_benchmark_table
+from app.utils.messages import CODES_ONLY, negotiate_locale, render_message
+from app.utils.sustainability import (
+    evaluate_material,
+    generate_improvements,
+    generate_overall_recommendation,
+    improvements_for,
+    recommendation_for,
+)
+
+client = TestClient(app)
+
+REQUEST = {
+    "company": {"size": "media", "employees": 100, "industry": "Mensagens"},
+    "proposed_materials": [{"type": "latao", "quantity": 30}, {"type": "papel", "quantity": 2}],
+}
+
+
+def test_default_locale_keeps_existing_text():
+    """Testa que o catálogo pt-BR reproduz os textos de antes"""
+    table = get_benchmark_table()
+    benchmark = table.benchmark(CompanySize.MEDIA, MaterialType.LATAO)
+    message = recommendation_for(MaterialType.LATAO, 30, 10.0, benchmark)
+    reduction = 30 - benchmark.recommended_max
+
+    assert render_message(message) == (
+        f"Alto consumo de latao. Recomenda-se reduzir em pelo menos {reduction:.2f} media."
+    )
+    assert generate_overall_recommendation(65) == "Bom desempenho. Continue otimizando para alcançar excelência."
+    results = [evaluate_material(MaterialUsage(type="latao", quantity=30), CompanySize.MEDIA, table)]
+    assert generate_improvements(results) == [
+        f"Reduzir latao em {reduction:.2f} unidades para atingir o padrão recomendado"
+    ]
+    assert render_message(improvements_for([])[0], CODES_ONLY) == {"code": "improvement.maintain", "params": {}}
+
+
+def test_negotiate_locale():
+    """Testa a escolha do idioma pelo Accept-Language"""
+    assert negotiate_locale(None) == "pt-BR"
+    assert negotiate_locale("en-US,en;q=0.9") == "en"
+    assert negotiate_locale("pt") == "pt-BR"
+    assert negotiate_locale("fr-FR, en;q=0.5, pt-BR;q=0.8") == "pt-BR"
+    assert negotiate_locale("en;q=0, de") == "pt-BR"
+
+
+def test_analyze_in_english_and_codes_only():
+    """Testa /analyze em inglês e no modo codes_only, sem reaproveitar o cache de outro idioma"""
+    portuguese = client.post("/api/v1/sustainability/analyze", json=REQUEST)
+    english = client.post("/api/v1/sustainability/analyze", json=REQUEST, headers={"Accept-Language": "en"})
+    codes = client.post("/api/v1/sustainability/analyze", json=REQUEST, params={"codes_only": True})
+
+    assert portuguese.headers["content-language"] == "pt-BR"
+    assert english.headers["content-language"] == "en"
+    assert "content-language" not in codes.headers
+    assert english.json()["materials_analysis"][0]["recommendation"].startswith("High latao consumption.")
+    latao = codes.json()["materials_analysis"][0]["recommendation"]
+    assert latao["code"] == "material.high_consumption"
+    assert latao["params"]["material"] == "latao" and latao["params"]["company_size"] == "media"
+    assert codes.json()["improvements"][0]["code"] == "improvement.reduce"
+    for response in (english, codes):
+        assert response.json()["overall_score"] == portuguese.json()["overall_score"]
+
+
+def test_batch_and_stream_codes_only():
+    """Testa que o lote e o streaming usam os mesmos códigos de /analyze"""
+    single = client.post("/api/v1/sustainability/analyze", json=REQUEST, params={"codes_only": True}).json()
+    batch = client.post(
+        "/api/v1/sustainability/analyze/batch", json={"items": [REQUEST]}, params={"codes_only": True}
+    ).json()
+    stream = client.post(
+        "/api/v1/sustainability/analyze/stream",
+        content=json.dumps(REQUEST).encode() + b"\n",
+        params={"codes_only": True},
+    )
+
+    assert batch["results"][0] == single
+    assert stream.json()["analysis"] == single
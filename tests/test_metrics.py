@@ -0,0 +1,77 @@
+import threading
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.schemas.sustainability import SustainabilityCalculationRequest
+from app.utils.metrics import ANALYSIS_PHASE_SECONDS, Counter, Histogram, REGISTRY
+from app.utils.sustainability import evaluate_sustainability
+from app.utils.vectorized import analyze_batch
+
+client = TestClient(app)
+
+
+def test_counter_and_histogram_sum_thread_shards():
+    """Testa que os valores escritos por várias threads são somados na coleta"""
+    counter = Counter("test_events_total", "Eventos de teste")
+    histogram = Histogram("test_duration_seconds", "Durações de teste", buckets=(0.1, 1.0))
+    REGISTRY.remove(counter)
+    REGISTRY.remove(histogram)
+
+    def work():
+        for _ in range(1000):
+            counter.inc()
+            histogram.observe(0.5)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert counter.labels().value() == 4000
+    lines = list(histogram.collect())
+    assert 'test_duration_seconds_bucket{le="0.1"} 0' in lines
+    assert 'test_duration_seconds_bucket{le="1"} 4000' in lines
+    assert 'test_duration_seconds_bucket{le="+Inf"} 4000' in lines
+    assert "test_duration_seconds_sum 2000" in lines
+
+
+def test_metrics_endpoint_exposes_routes_and_phases():
+    """Testa que /metrics expõe as rotas pelo template e as fases da análise"""
+    client.get("/api/v1/sustainability/benchmarks/media")
+    client.post("/api/v1/sustainability/analyze", json={
+        "company": {"size": "media", "employees": 80, "industry": "Métricas"},
+        "proposed_materials": [{"type": "latao", "quantity": 50}],
+    })
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'http_requests_total{method="GET",route="/api/v1/sustainability/benchmarks/{company_size}",status="200"}' in body
+    assert 'http_request_duration_seconds_bucket{method="POST",route="/api/v1/sustainability/analyze",le="+Inf"}' in body
+    assert 'analysis_phase_duration_seconds_count{phase="materials"}' in body
+    assert "# TYPE analysis_cache_requests_total counter" in body
+    assert "http_requests_in_flight 1" in body
+
+
+def test_batch_assembly_has_its_own_phase():
+    """Testa que a montagem dos resultados do lote vai para a fase records, e não para materials"""
+    def counts():
+        lines = [line for line in ANALYSIS_PHASE_SECONDS.collect() if "_count" in line]
+        return {line.split('"')[1]: float(line.split()[-1]) for line in lines}
+
+    request = SustainabilityCalculationRequest(
+        company={"size": "media", "employees": 80, "industry": "Métricas"},
+        proposed_materials=[{"type": "latao", "quantity": 50}],
+    )
+    evaluate_sustainability(request.company, request.proposed_materials)
+    before = counts()
+    analyze_batch([request, request])
+    after = counts()
+    evaluate_sustainability(request.company, request.proposed_materials)
+
+    assert after["records"] == before.get("records", 0) + 1
+    assert after["materials"] == before["materials"] + 1
+    assert counts()["records"] == after["records"]
@@ -0,0 +1,93 @@
+import itertools
+import time
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.schemas.sustainability import MaterialUsage, OptimizationItem
+from app.utils.optimizer import optimize_reductions
+from app.utils.sustainability import calculate_efficiency_percentage, get_benchmark
+
+client = TestClient(app)
+
+COMPANY = {"size": "media", "employees": 100, "industry": "Otimização"}
+MATERIALS = [
+    {"type": "latao", "quantity": 30},
+    {"type": "papel", "quantity": 40},
+    {"type": "plastico", "quantity": 20},
+]
+
+
+def brute_force_score(item: OptimizationItem, steps: int = 41) -> float:
+    """Melhor score em uma grade de alocações que respeitam o orçamento"""
+    benchmarks = [get_benchmark(item.company.size, m.type) for m in item.proposed_materials]
+    costs = [(item.costs or {}).get(m.type, 1.0) for m in item.proposed_materials]
+    grids = [np.linspace(0, m.quantity, steps) for m in item.proposed_materials]
+    best = 0.0
+    for reductions in itertools.product(*grids):
+        if sum(r * c for r, c in zip(reductions, costs)) > item.budget + 1e-9:
+            continue
+        score = np.mean([
+            calculate_efficiency_percentage(m.quantity - r, b)
+            for m, r, b in zip(item.proposed_materials, reductions, benchmarks)
+        ])
+        best = max(best, score)
+    return best
+
+
+@pytest.mark.parametrize("budget", [0, 5, 20, 45, 200])
+def test_optimizer_matches_brute_force(budget):
+    """Testa que a alocação não perde para uma busca exaustiva em grade"""
+    item = OptimizationItem(
+        company=COMPANY,
+        proposed_materials=[MaterialUsage(**m) for m in MATERIALS],
+        budget=budget,
+        costs={"papel": 0.5},
+    )
+    result = optimize_reductions([item])["results"][0]
+
+    assert result["budget_used"] <= budget + 1e-9
+    assert result["optimized_score"] >= brute_force_score(item) - 1e-6
+    assert result["optimized_score"] >= result["overall_score"]
+
+
+def test_optimize_endpoint_handles_many_companies():
+    """Testa o endpoint com várias empresas em uma chamada"""
+    items = [
+        {"company": COMPANY, "proposed_materials": MATERIALS, "budget": budget}
+        for budget in range(0, 1000, 10)
+    ]
+    response = client.post("/api/v1/sustainability/optimize", json={"items": items})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert len(results) == 100
+    scores = [result["optimized_score"] for result in results]
+    assert scores == sorted(scores)
+    assert results[0]["reductions"] == [0, 0, 0]
+    assert results[-1]["optimized_score"] == 100
+
+
+def test_many_materials_use_bounded_refinement():
+    """Testa que empresas acima do limite da alocação exata respondem rápido e respeitam o orçamento"""
+    rng = np.random.default_rng(7)
+    types = ["latao", "agua", "papel", "plastico", "energia"]
+    materials = [
+        {"type": types[i % len(types)], "quantity": float(q)} for i, q in enumerate(rng.uniform(50, 3000, 150))
+    ]
+    total = sum(m["quantity"] for m in materials)
+    items = [
+        OptimizationItem(company=COMPANY, proposed_materials=materials, budget=fraction * total)
+        for fraction in (0.05, 0.2, 0.4)
+    ]
+    start = time.perf_counter()
+    results = optimize_reductions(items)["results"]
+    assert time.perf_counter() - start < 2
+
+    for item, result in zip(items, results):
+        assert result["budget_used"] <= item.budget * (1 + 1e-9)
+        assert result["optimized_score"] >= result["overall_score"]
+
+    too_many = {"company": COMPANY, "proposed_materials": [MATERIALS[0]] * 1001, "budget": 1}
+    assert client.post("/api/v1/sustainability/optimize", json={"items": [too_many]}).status_code == 422
@@ -0,0 +1,49 @@
+from benchmarks.harness import compare, measure, over_budget
+from benchmarks.run import main
+from benchmarks.scenarios import ROUTE_REQUESTS, api_routes
+
+
+def test_every_route_has_benchmark_scenario():
+    """Testa que toda rota dos routers tem um cenário na suíte ASGI"""
+    missing = [route for route in api_routes() if route not in ROUTE_REQUESTS]
+
+    assert missing == []
+
+
+def test_compare_flags_regressions_over_threshold():
+    """Testa a detecção de regressões em relação à baseline"""
+    baseline = {"a": {"median_us": 100.0}, "b": {"median_us": 100.0}, "c": {"median_us": 100.0}}
+    results = {"a": {"median_us": 115.0}, "b": {"median_us": 130.0}, "new": {"median_us": 1.0}}
+
+    regressions = compare(results, baseline, threshold_pct=20)
+
+    assert len(regressions) == 1
+    assert regressions[0].startswith("b:")
+
+
+def test_measure_summary():
+    """Testa o resumo das medições"""
+    result = measure(lambda: sum(range(10)), repeat=3, number=10)
+
+    assert result["runs"] == 3
+    assert result["calls_per_run"] == 10
+    assert result["min_us"] <= result["median_us"] <= result["p95_us"]
+
+
+def test_over_budget_flags_only_budgeted_scenarios():
+    """Testa a verificação do orçamento de tempo"""
+    results = {
+        "startup/ready": {"median_us": 120.0, "budget_us": 100.0},
+        "startup/import app.main": {"median_us": 50.0, "budget_us": 100.0},
+        "startup/process": {"median_us": 1e9},
+    }
+
+    exceeded = over_budget(results)
+
+    assert len(exceeded) == 1
+    assert exceeded[0].startswith("startup/ready:")
+
+
+def test_run_fails_without_baseline(tmp_path):
+    """Testa que a comparação falha quando a baseline não existe"""
+    assert main(["--baseline", str(tmp_path / "ausente.json")]) == 1
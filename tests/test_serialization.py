@@ -0,0 +1,74 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.schemas.sustainability import (
+    CompactBatchAnalysisResponse,
+    CompactSustainabilityAnalysisResponse,
+    SustainabilityCalculationRequest,
+)
+from app.utils.serialization import dump_json, render_analysis, to_response_model
+from app.utils.sustainability import analyze_sustainability, evaluate_sustainability
+
+client = TestClient(app)
+
+REQUEST_DATA = {
+    "company": {"size": "micro", "employees": 5, "industry": "Serviços"},
+    "proposed_materials": [
+        {"type": "latao", "quantity": 0.1},
+        {"type": "latao", "quantity": 2.0},
+        {"type": "energia", "quantity": 15},
+    ],
+}
+
+
+def test_render_matches_pydantic_response():
+    """Testa que a serialização direta é igual à do modelo Pydantic"""
+    request = SustainabilityCalculationRequest.model_validate(REQUEST_DATA)
+    result = evaluate_sustainability(request.company, request.proposed_materials)
+
+    assert render_analysis(result) == to_response_model(result).model_dump(mode="json")
+    assert render_analysis(result) == analyze_sustainability(
+        request.company, request.proposed_materials
+    ).model_dump(mode="json")
+
+
+def test_analyze_compact_mode():
+    """Testa o modo compacto: benchmarks referenciados por id, listados uma vez"""
+    full = client.post("/api/v1/sustainability/analyze", json=REQUEST_DATA).json()
+    response = client.post("/api/v1/sustainability/analyze?compact=true", json=REQUEST_DATA)
+
+    assert response.status_code == 200
+    data = CompactSustainabilityAnalysisResponse.model_validate(response.json())
+    assert sorted(data.benchmarks) == ["micro:energia", "micro:latao"]
+    assert data.overall_score == full["overall_score"]
+    for compact_material, full_material in zip(data.materials_analysis, full["materials_analysis"]):
+        benchmark = data.benchmarks[compact_material.benchmark_id]
+        assert benchmark.model_dump(mode="json") == full_material["benchmark"]
+
+
+def test_batch_compact_mode():
+    """Testa o lote compacto com benchmarks compartilhados"""
+    response = client.post(
+        "/api/v1/sustainability/analyze/batch?compact=true",
+        json={"items": [REQUEST_DATA, REQUEST_DATA]},
+    )
+
+    assert response.status_code == 200
+    data = CompactBatchAnalysisResponse.model_validate(response.json())
+    assert len(data.results) == 2
+    assert len(data.benchmarks) == 2
+
+
+def test_dump_json_rejects_non_finite_values():
+    """Testa que dump_json mantém os nulls e recusa NaN/inf como o json da biblioteca padrão"""
+    content = {"score": 1.5, "carbon": None, "texto": "ação", 1: [0.1, (2, None)]}
+    assert json.loads(dump_json(content)) == json.loads(json.dumps(content))
+    assert dump_json("ação") == '"ação"'.encode()
+
+    for value in (float("nan"), float("inf"), -float("inf")):
+        for bad in (value, [1.0, value], {"a": {"b": [None, value]}}, ({"c": value},)):
+            with pytest.raises(ValueError):
+                dump_json(bad)
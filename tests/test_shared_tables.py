@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.schemas.sustainability import CompanySize, MaterialType
+from app.utils.benchmarks import (
+    MATERIAL_INDEX,
+    RECOMMENDED,
+    SIZE_INDEX,
+    BenchmarkTable,
+    get_benchmark_table,
+    publish_table,
+    table_from_segment,
+    use_shared_tables,
+)
+from app.utils.emission_factors import EmissionFactorRegistry
+from app.utils.shared_tables import SharedTables, map_tables
+
+client = TestClient(app)
+build = table_from_segment
+
+
+def publish(segment, version, values, carbon_factors):
+    return publish_table(segment, BenchmarkTable(values, version, EmissionFactorRegistry(carbon_factors, "teste")))
+
+
+@pytest.fixture
+def segment(tmp_path):
+    path = str(tmp_path / "tables.bin")
+    yield path
+    use_shared_tables("")
+
+
+def test_publish_and_map_round_trip(segment):
+    """Testa que o segmento mapeado reproduz a tabela sem cópia e somente leitura"""
+    table = get_benchmark_table()
+    generation = publish_table(segment, table)
+
+    mapped_generation, metadata, values, carbon_factors = map_tables(segment)
+
+    assert (mapped_generation, metadata["version"]) == (generation, table.version)
+    np.testing.assert_array_equal(values, table.values)
+    np.testing.assert_array_equal(carbon_factors, table.emission_factors.values)
+    assert not values.flags.writeable and not values.flags.owndata
+    shared = build(metadata, values, carbon_factors)
+    assert shared.values is values
+    assert shared.emission_factors.values is carbon_factors
+    assert shared.fingerprint == table.fingerprint
+
+
+def test_readers_pick_up_new_version(segment):
+    """Testa que todos os leitores veem a nova versão e que a anterior continua válida"""
+    table = get_benchmark_table()
+    publish(segment, "v1", table.values, table.carbon_factors)
+    readers = [SharedTables(segment), SharedTables(segment)]
+    first = [reader.current(build) for reader in readers]
+    assert first[0] is readers[0].current(build)
+
+    values = np.array(table.values)
+    values[SIZE_INDEX[CompanySize.MEDIA], MATERIAL_INDEX[MaterialType.LATAO], RECOMMENDED] = 20.0
+    publish(segment, "v2", values, table.carbon_factors * 2)
+
+    for reader, previous in zip(readers, first):
+        current = reader.current(build)
+        assert current.version == "v2"
+        assert current.benchmark(CompanySize.MEDIA, MaterialType.LATAO).recommended_max == 20.0
+        assert current.carbon_factor(MaterialType.PAPEL) == 2 * table.carbon_factor(MaterialType.PAPEL)
+        assert previous.version == "v1" and previous.values.sum() == table.values.sum()
+
+
+def test_invalid_segment_keeps_previous_version(segment):
+    """Testa que um segmento inválido é ignorado e a última versão válida continua ativa"""
+    table = get_benchmark_table()
+    publish(segment, "v1", table.values, table.carbon_factors)
+    reader = SharedTables(segment)
+    assert reader.current(build).version == "v1"
+
+    with open(segment, "wb") as f:
+        f.write(b"lixo")
+
+    assert reader.current(build).version == "v1"
+
+
+def test_app_serves_version_published_by_another_worker(segment):
+    """Testa que a aplicação passa a usar, no request seguinte, a versão publicada no segmento"""
+    use_shared_tables(segment)
+    local = get_benchmark_table()
+    request = {
+        "company": {"size": "media", "employees": 100, "industry": "Manufatura"},
+        "proposed_materials": [{"type": "papel", "quantity": 0.5}],
+    }
+    before = client.post("/api/v1/sustainability/analyze", json=request).json()
+
+    values = np.array(local.values)
+    values[SIZE_INDEX[CompanySize.MEDIA], MATERIAL_INDEX[MaterialType.LATAO], RECOMMENDED] = 20.0
+    factors = np.array(local.carbon_factors)
+    factors[MATERIAL_INDEX[MaterialType.PAPEL]] *= 2
+    publish(segment, "outro-worker", values, factors)
+
+    response = client.get("/api/v1/sustainability/benchmarks/media")
+    assert response.json()["latao"]["recommended_max"] == 20.0
+    after = client.post("/api/v1/sustainability/analyze", json=request).json()
+    assert after["materials_analysis"][0]["carbon_footprint_reduction"] == pytest.approx(
+        2 * before["materials_analysis"][0]["carbon_footprint_reduction"]
+    )
@@ -0,0 +1,38 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+import main as legacy_main
+from app.main import app, create_app
+from app.routers import sustainability
+from app.utils.benchmarks import get_benchmark_table
+from app.utils.executor import analysis_executor
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_import_does_not_build_app():
+    """Testa que importar app.main não carrega FastAPI nem os routers"""
+    script = "import sys, app.main; print(sorted(m for m in ('fastapi', 'numpy', 'app.routers.sustainability') if m in sys.modules))"
+    output = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+
+    assert output.strip() == "[]"
+
+
+def test_legacy_main_reexports_app():
+    """Testa que o main.py da raiz serve a mesma aplicação"""
+    assert legacy_main.app is app
+    assert legacy_main.create_app is create_app
+    assert any(getattr(route, "path", "") == "/api/v1/sustainability/analyze" for route in legacy_main.app.routes)
+
+
+def test_startup_builds_reference_responses(monkeypatch):
+    """Testa que o startup monta as respostas pré-serializadas antes do primeiro request"""
+    monkeypatch.setattr(analysis_executor, "workers", 0)
+    monkeypatch.setattr(sustainability.reference_responses, "_fingerprint", None)
+
+    with TestClient(create_app()) as client:
+        assert sustainability.reference_responses._fingerprint == get_benchmark_table().fingerprint
+        assert client.get("/api/v1/sustainability/materials").status_code == 200
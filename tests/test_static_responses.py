@@ -0,0 +1,46 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.utils.benchmarks import DEFAULT_BENCHMARKS_FILE, reload_benchmarks
+
+client = TestClient(app)
+
+
+def test_reference_endpoints_send_etag_and_304():
+    """Testa ETag, Cache-Control e 304 nos endpoints de referência"""
+    for path in ("/materials", "/company-sizes", "/example", "/benchmarks/media"):
+        response = client.get(f"/api/v1/sustainability{path}")
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+        assert etag.startswith('"') and response.headers["cache-control"].startswith("public")
+
+        cached = client.get(f"/api/v1/sustainability{path}", headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert cached.headers["etag"] == etag
+
+
+def test_benchmark_etag_changes_after_hot_swap(tmp_path):
+    """Testa que a troca da tabela de benchmarks gera novo conteúdo e ETag"""
+    before = client.get("/api/v1/sustainability/benchmarks/micro")
+
+    with open(DEFAULT_BENCHMARKS_FILE, encoding="utf-8") as f:
+        data = json.load(f)
+    data["benchmarks"]["micro"]["latao"]["average_usage"] += 1
+    path = tmp_path / "benchmarks.json"
+    path.write_text(json.dumps(data), encoding="utf-8")
+
+    try:
+        reload_benchmarks(str(path))
+        after = client.get(
+            "/api/v1/sustainability/benchmarks/micro",
+            headers={"If-None-Match": before.headers["etag"]},
+        )
+    finally:
+        reload_benchmarks(str(DEFAULT_BENCHMARKS_FILE))
+
+    assert after.status_code == 200
+    assert after.headers["etag"] != before.headers["etag"]
+    assert after.json()["latao"]["average_usage"] == before.json()["latao"]["average_usage"] + 1
@@ -0,0 +1,106 @@
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.utils import streaming
+from app.utils.streaming import iter_ndjson_lines
+
+client = TestClient(app)
+
+VALID_LINE = {
+    "company": {"size": "media", "employees": 100, "industry": "Manufatura"},
+    "proposed_materials": [
+        {"type": "latao", "quantity": 8.5, "unit": "toneladas"},
+        {"type": "agua", "quantity": 850, "unit": "toneladas"},
+    ],
+}
+
+
+def _collect(chunks, max_line_bytes=1024):
+    async def source():
+        for chunk in chunks:
+            yield chunk
+
+    async def run():
+        return [item async for item in iter_ndjson_lines(source(), max_line_bytes)]
+
+    return asyncio.run(run())
+
+
+def test_iter_ndjson_lines_across_chunks():
+    """Testa a divisão de linhas que atravessam blocos do corpo"""
+    lines = _collect([b'{"a"', b':1}\n\n{"b":2}\n{"c"', b":3}"])
+
+    assert lines == [(1, b'{"a":1}'), (3, b'{"b":2}'), (4, b'{"c":3}')]
+
+
+def test_iter_ndjson_lines_oversized():
+    """Testa que linhas grandes demais são descartadas sem interromper"""
+    lines = _collect([b"x" * 30, b"x" * 30, b'\n{"ok":1}\n'], max_line_bytes=40)
+
+    assert lines == [(1, None), (2, b'{"ok":1}')]
+
+
+def test_analyze_stream_reports_errors_per_line():
+    """Testa o endpoint NDJSON com linhas válidas e inválidas"""
+    body = "\n".join([
+        json.dumps(VALID_LINE),
+        "not json",
+        json.dumps({**VALID_LINE, "proposed_materials": [{"type": "invalid", "quantity": 1}]}),
+        json.dumps(VALID_LINE),
+    ])
+
+    response = client.post(
+        "/api/v1/sustainability/analyze/stream",
+        content=body,
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["line"] for line in lines] == [1, 2, 3, 4]
+    assert "error" in lines[1] and "error" in lines[2]
+
+    single = client.post("/api/v1/sustainability/analyze", json=VALID_LINE).json()
+    assert lines[0]["analysis"] == single
+    assert lines[3]["analysis"] == single
+
+
+def test_analyze_stream_non_finite_quantity_does_not_abort():
+    """Testa que uma quantidade não finita no meio do fluxo vira erro só da sua linha"""
+    infinite = json.dumps(VALID_LINE).replace("8.5", "1e400")
+    huge = json.dumps({**VALID_LINE, "proposed_materials": [{"type": "agua", "quantity": 1.7e308}] * 2})
+    body = "\n".join([json.dumps(VALID_LINE), infinite, huge, json.dumps(VALID_LINE)]) + "\n"
+
+    response = client.post("/api/v1/sustainability/analyze/stream", content=body.encode())
+    lines = [json.loads(line) for line in response.text.splitlines()]
+
+    assert [line["line"] for line in lines] == [1, 2, 3, 4]
+    assert "analysis" in lines[0] and "analysis" in lines[3]
+    assert "quantity" in lines[1]["error"]
+    assert "error" in lines[2]
+
+
+def test_analyze_stream_validates_lines_off_the_event_loop(monkeypatch):
+    """Testa que as linhas chegam brutas ao executor e são validadas fora do event loop"""
+    calls = []
+    validate = streaming.validate_lines
+
+    def check(entries):
+        try:
+            asyncio.get_running_loop()
+            calls.append("loop")
+        except RuntimeError:
+            calls.append([type(entry).__name__ for _, entry in entries])
+        return validate(entries)
+
+    monkeypatch.setattr(streaming, "validate_lines", check)
+    body = "\n".join([json.dumps(VALID_LINE), "not json"])
+    response = client.post("/api/v1/sustainability/analyze/stream", content=body.encode())
+
+    assert calls == [["bytes", "bytes"]]
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert "analysis" in lines[0] and "error" in lines[1]
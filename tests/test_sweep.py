@@ -0,0 +1,41 @@
+import numpy as np
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.schemas.sustainability import CompanySize, MaterialType
+from app.utils.sustainability import calculate_carbon_reduction, calculate_efficiency_percentage, get_benchmark
+
+client = TestClient(app)
+
+
+def test_sweep_matches_scalar_functions():
+    """Testa que as curvas batem com as funções escalares em cada ponto"""
+    response = client.get(
+        "/api/v1/sustainability/sweep/pequena",
+        params={"materials": ["latao", "papel"], "points": 50},
+    )
+    assert response.status_code == 200
+    curves = response.json()["curves"]
+    assert [curve["material_type"] for curve in curves] == ["latao", "papel"]
+
+    for curve in curves:
+        material = MaterialType(curve["material_type"])
+        benchmark = get_benchmark(CompanySize.PEQUENA, material)
+        assert len(curve["quantity"]) == 50
+        for quantity, efficiency, carbon in zip(
+            curve["quantity"], curve["efficiency_percentage"], curve["carbon_footprint_reduction"]
+        ):
+            assert efficiency == calculate_efficiency_percentage(quantity, benchmark)
+            is_eco = quantity <= benchmark.recommended_max
+            assert carbon == calculate_carbon_reduction(material, quantity, benchmark, is_eco)
+
+
+def test_sweep_breakpoints_interpolate_full_curve():
+    """Testa que a interpolação entre os pontos de quebra reproduz a curva completa"""
+    full = client.get("/api/v1/sustainability/sweep/media", params={"points": 400}).json()
+    reduced = client.get("/api/v1/sustainability/sweep/media", params={"breakpoints_only": True}).json()
+
+    for dense, sparse in zip(full["curves"], reduced["curves"]):
+        assert len(sparse["quantity"]) <= 6
+        interpolated = np.interp(dense["quantity"], sparse["quantity"], sparse["efficiency_percentage"])
+        np.testing.assert_allclose(interpolated, dense["efficiency_percentage"], atol=1e-9)
@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.schemas.sustainability import Benchmark, CompanySize, MaterialType
+from app.utils.sustainability import calculate_efficiency_percentage
+from app.utils.targets import company_scale_for_targets, max_quantity_for_targets
+
+client = TestClient(app)
+
+TARGETS = [0, 10, 40, 45.5, 60, 70, 80, 95, 100]
+
+
+def benchmark(excellent, recommended, average):
+    return Benchmark(
+        company_size=CompanySize.MEDIA,
+        material_type=MaterialType.PAPEL,
+        excellent_threshold=excellent,
+        recommended_max=recommended,
+        average_usage=average,
+    )
+
+
+@pytest.mark.parametrize("limits", [(5, 10, 15), (0, 10, 15), (5, 5, 15), (5, 10, 10)])
+def test_max_quantity_is_exact_inverse(limits):
+    """Testa que a quantidade máxima atinge o alvo e qualquer excesso fica abaixo dele"""
+    b = benchmark(*limits)
+    quantities = max_quantity_for_targets(np.array(TARGETS), *(np.array([v]) for v in limits))[0]
+
+    for target, quantity in zip(TARGETS, quantities):
+        if target == 0:
+            assert quantity == np.inf
+            continue
+        assert calculate_efficiency_percentage(quantity, b) >= target - 1e-9
+        assert calculate_efficiency_percentage(quantity + 1e-6, b) < target
+
+
+def test_company_scale_reaches_target():
+    """Testa que o fator da empresa leva o score médio exatamente ao alvo"""
+    limits = [(5, 10, 15), (100, 300, 700), (0, 2, 2)]
+    quantity = np.array([20.0, 250.0, 1.0])
+    excellent, recommended, average = (np.array(column, dtype=float) for column in zip(*limits))
+    targets = np.array([0, 20, 50, 65, 80, 99, 100])
+
+    scales = company_scale_for_targets(targets, quantity, excellent, recommended, average)
+
+    def score(scale):
+        return np.mean([calculate_efficiency_percentage(scale * q, benchmark(*l)) for q, l in zip(quantity, limits)])
+
+    assert scales[0] == np.inf
+    for target, scale in zip(targets[1:], scales[1:]):
+        assert score(scale) >= target - 1e-9
+        assert score(scale * (1 + 1e-6) + 1e-9) < target
+
+
+def test_company_scale_with_degenerate_bands():
+    """Testa o fator da empresa com faixas de largura zero em vários materiais"""
+    rng = np.random.default_rng(7)
+    cases = [(
+        np.array([8.43732055, 9.29293182, 3.79962336]),
+        np.array([8.43732055, 17.58955956, 3.79962336]),
+        np.array([10.00599753, 23.66706265, 18.07608444]),
+        np.array([7.11242628, 11.6190314, 12.10007864]),
+    )]
+    for _ in range(50):
+        excellent = rng.uniform(0, 20, 4)
+        recommended = np.where(rng.random(4) < 0.5, excellent, excellent + rng.uniform(0, 20, 4))
+        average = np.where(rng.random(4) < 0.5, recommended, recommended + rng.uniform(0, 20, 4))
+        cases.append((excellent, recommended, average, rng.uniform(1, 20, 4)))
+    targets = np.array([15, 45, 55, 65, 75, 85, 94.92])
+
+    for excellent, recommended, average, quantity in cases:
+        limits = list(zip(excellent, recommended, average))
+        scales = company_scale_for_targets(targets, quantity, excellent, recommended, average)
+
+        def score(scale):
+            # Mesma ordem de soma de calculate_sustainability_score
+            return sum(calculate_efficiency_percentage(scale * q, benchmark(*l)) for q, l in zip(quantity, limits)) / len(limits)
+
+        for target, scale in zip(targets, scales):
+            assert score(scale) >= target
+            assert score(scale * (1 + 1e-6)) < target
+
+
+def test_targets_endpoint():
+    """Testa o endpoint de quantidades alvo"""
+    response = client.post("/api/v1/sustainability/targets", json={
+        "company": {"size": "media", "employees": 100, "industry": "Alvos"},
+        "proposed_materials": [{"type": "latao", "quantity": 30}, {"type": "agua", "quantity": 850}],
+        "targets": [0, 60, 80],
+    })
+    assert response.status_code == 200
+    data = response.json()
+    latao = data["materials"][0]
+    assert latao["max_quantity"][0] is None
+    assert latao["required_reduction"][2] == pytest.approx(30 - latao["max_quantity"][2])
+    assert data["company"]["scale"][0] is None
+    assert 0 < data["company"]["scale"][2] < 1
+
+    invalid = client.post("/api/v1/sustainability/targets", json={
+        "company": {"size": "media", "employees": 100, "industry": "Alvos"},
+        "proposed_materials": [{"type": "latao", "quantity": 30}],
+        "targets": [120],
+    })
+    assert invalid.status_code == 422
@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app
+from app.schemas.sustainability import CompanyData, MaterialUsage
+from app.utils.executor import AnalysisExecutor
+from app.utils.sustainability import calculate_efficiency_percentage, get_benchmark, is_eco_efficient
+from app.utils.uncertainty import monte_carlo_chunks, simulate_chunk, simulate_uncertainty, summarize_uncertainty
+
+client = TestClient(app)
+
+COMPANY = {"size": "media", "employees": 100, "industry": "Incerteza"}
+
+
+def test_uncertainty_without_spread_matches_scalar():
+    """Testa que materiais sem incerteza reproduzem a análise escalar"""
+    company = CompanyData(**COMPANY)
+    materials = [MaterialUsage(type="latao", quantity=8.5), MaterialUsage(type="papel", quantity=60)]
+    result = simulate_uncertainty(company, materials, 1000, [5, 95], seed=3)
+
+    for material, summary in zip(materials, result["materials"]):
+        benchmark = get_benchmark(company.size, material.type)
+        efficiency = calculate_efficiency_percentage(material.quantity, benchmark)
+        assert summary["percentiles"] == pytest.approx([efficiency, efficiency])
+        assert summary["std"] == pytest.approx(0.0)
+        assert summary["probability_eco_efficient"] == float(is_eco_efficient(material.quantity, benchmark))
+    assert result["overall_score"]["probability_eco_efficient"] == 0.0
+
+
+def test_uncertainty_endpoint_is_reproducible():
+    """Testa que a mesma semente gera o mesmo resultado e que as faixas são respeitadas"""
+    payload = {
+        "company": COMPANY,
+        "proposed_materials": [
+            {"type": "latao", "quantity": 10, "std_dev": 3},
+            {"type": "agua", "quantity": 900, "quantity_min": 500, "quantity_max": 1200},
+        ],
+        "samples": 60_000,
+        "percentiles": [0, 50, 100],
+        "seed": 42,
+    }
+    first = client.post("/api/v1/sustainability/analyze/uncertainty", json=payload)
+    second = client.post("/api/v1/sustainability/analyze/uncertainty", json=payload)
+    assert first.status_code == 200
+    assert first.content == second.content
+
+    data = first.json()
+    assert data["samples"] == 60_000
+    assert data["seed"] == 42
+    low, median, high = data["overall_score"]["percentiles"]
+    assert 0 <= low <= median <= high <= 100
+    assert 0 < data["materials"][1]["probability_eco_efficient"] < 1
+
+
+def test_uncertainty_fanout_matches_serial():
+    """Testa que os blocos distribuídos pelo executor dão o mesmo resultado da execução em sequência"""
+    company = CompanyData(**COMPANY)
+    materials = [MaterialUsage(type="plastico", quantity=20, std_dev=6)]
+    executor = AnalysisExecutor(workers=0, threshold=0)
+
+    seed, plan = monte_carlo_chunks(70_000, 7)
+    calls = [(company.size, materials, samples, sequence) for samples, sequence in plan]
+    chunks = asyncio.run(executor.map(simulate_chunk, calls))
+
+    assert len(plan) > 1
+    assert summarize_uncertainty(materials, seed, [50], chunks) == simulate_uncertainty(company, materials, 70_000, [50], 7)
+
+
+def test_uncertainty_rejects_incomplete_range():
+    """Testa que a faixa exige os dois limites"""
+    response = client.post("/api/v1/sustainability/analyze/uncertainty", json={
+        "company": COMPANY,
+        "proposed_materials": [{"type": "latao", "quantity": 10, "quantity_min": 5}],
+    })
+    assert response.status_code == 422
+
+
+def test_uncertainty_rejects_seed_over_63_bits():
+    """Testa que sementes que não cabem em 63 bits são rejeitadas na validação"""
+    payload = {"company": COMPANY, "proposed_materials": [{"type": "latao", "quantity": 10, "std_dev": 3}], "samples": 10}
+    accepted = client.post("/api/v1/sustainability/analyze/uncertainty", json={**payload, "seed": 2**63 - 1})
+    assert accepted.status_code == 200
+    assert accepted.json()["seed"] == 2**63 - 1
+    for seed in (2**63, 2**70):
+        response = client.post("/api/v1/sustainability/analyze/uncertainty", json={**payload, "seed": seed})
+        assert response.status_code == 422
+
+
+def test_uncertainty_rejects_too_many_samples(monkeypatch):
+    """Testa o limite de amostras (materiais x amostras) por request"""
+    monkeypatch.setattr(settings, "MONTE_CARLO_MAX_SAMPLES", 1_000)
+    materials = [{"type": "latao", "quantity": 10, "std_dev": 3}, {"type": "papel", "quantity": 50}]
+    payload = {"company": COMPANY, "proposed_materials": materials}
+
+    assert client.post("/api/v1/sustainability/analyze/uncertainty", json={**payload, "samples": 500}).status_code == 200
+    response = client.post("/api/v1/sustainability/analyze/uncertainty", json={**payload, "samples": 501})
+    assert response.status_code == 422
+    assert "1000" in response.json()["detail"]
@@ -0,0 +1,99 @@
+import io
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app
+
+client = TestClient(app)
+
+URL = "/api/v1/sustainability/analyze/upload"
+
+CSV = """company_id,size,employees,industry,material_type,quantity
+a,media,100,Manufatura,latao,8.5
+a,media,100,Manufatura,agua,850
+a,media,100,Manufatura,ouro,3
+b,micro,5,Varejo,papel,12
+b,micro,5,Varejo,plastico,-1
+c,grande,-3,Varejo,papel,12
+"""
+
+
+def upload(content: bytes, filename: str = "planilha.csv", content_type: str = "text/csv"):
+    response = client.post(URL, files={"file": (filename, content, content_type)})
+    return response, [json.loads(line) for line in response.text.splitlines()]
+
+
+def analyze(company: dict, materials: list) -> dict:
+    return client.post(
+        "/api/v1/sustainability/analyze", json={"company": company, "proposed_materials": materials}
+    ).json()
+
+
+@pytest.mark.parametrize("chunk_rows", [2, 5_000])
+def test_csv_upload_groups_companies_and_reports_rows(monkeypatch, chunk_rows):
+    """Testa o agrupamento por empresa, inclusive entre blocos, e os erros por linha"""
+    monkeypatch.setattr(settings, "UPLOAD_CHUNK_ROWS", chunk_rows)
+
+    response, lines = upload(CSV.encode())
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert [line.get("company_id") or line["row"] for line in lines] == ["a", 4, "b", 6, 7]
+    assert lines[0]["rows"] == [2, 3]
+    assert lines[0]["analysis"] == analyze(
+        {"size": "media", "employees": 100, "industry": "Manufatura"},
+        [{"type": "latao", "quantity": 8.5}, {"type": "agua", "quantity": 850}],
+    )
+    assert lines[2]["analysis"]["materials_analysis"][0]["material_type"] == "papel"
+    assert "employees" in lines[4]["error"]
+
+
+def test_parquet_upload_matches_csv():
+    """Testa que o upload Parquet produz o mesmo resultado do CSV"""
+    pa = pytest.importorskip("pyarrow")
+    parquet = pytest.importorskip("pyarrow.parquet")
+    rows = [line.split(",") for line in CSV.strip().splitlines()]
+    columns = {name: [row[i] for row in rows[1:]] for i, name in enumerate(rows[0])}
+    columns["employees"] = [int(value) for value in columns["employees"]]
+    columns["quantity"] = [float(value) for value in columns["quantity"]]
+    buffer = io.BytesIO()
+    parquet.write_table(pa.table(columns), buffer)
+
+    _, from_parquet = upload(buffer.getvalue(), "planilha.parquet", "application/octet-stream")
+    _, from_csv = upload(CSV.encode())
+
+    assert from_parquet == from_csv
+
+
+def test_upload_rejects_bad_files():
+    """Testa os erros de formato e de cabeçalho"""
+    response, _ = upload(b"company_id,size\n1,media\n")
+    assert response.status_code == 400
+    assert "material_type" in response.json()["detail"]
+
+    response, _ = upload(CSV.encode(), "planilha.xlsx", "application/vnd.ms-excel")
+    assert response.status_code == 415
+
+
+def test_upload_non_finite_values_do_not_abort():
+    """Testa que células inf/nan e resultados não finitos viram erros por linha, sem interromper o upload"""
+    content = (
+        "company_id,size,employees,industry,material_type,quantity\n"
+        "a,media,100,Varejo,papel,12\n"
+        "a,media,100,Varejo,plastico,inf\n"
+        "b,media,100,Varejo,agua,1.7e308\n"
+        "b,media,100,Varejo,agua,1.7e308\n"
+        "c,media,100,Varejo,energia,nan\n"
+        "d,micro,5,Varejo,papel,3\n"
+    )
+
+    response, lines = upload(content.encode())
+
+    assert response.status_code == 200
+    assert [line.get("company_id") or line["row"] for line in lines] == ["a", 3, 4, 6, "d"]
+    assert "quantity" in lines[1]["error"] and "quantity" in lines[3]["error"]
+    assert lines[2]["error"].startswith("Erro ao analisar")
+    assert lines[4]["analysis"]["materials_analysis"][0]["material_type"] == "papel"